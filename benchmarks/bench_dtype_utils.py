@@ -0,0 +1,45 @@
+# Memory and metric of the compact dtypes against the default ones on the ingested files
+# run from the repo root after `dvc pull`: python -m benchmarks.bench_dtype_utils
+import time
+import tracemalloc
+import numpy as np
+from pathlib import Path
+from sklearn.linear_model import Ridge
+from sklearn.metrics import mean_absolute_error
+from src.utils.main_utils import read_data,read_yaml_file
+from src.utils.dtype_utils import get_category_dictionary,to_compact_dtypes
+from src.utils.impute_utils import get_imputer_object
+from src.utils.feature_utils import make_features
+from src.utils.transform_utils import get_transformer_object,get_required_columns
+
+schema = read_yaml_file(Path("data_schema/schema.yaml"))
+train_df = read_data(Path("artifacts/data_ingestion/ingested/train.parquet"))
+test_df = read_data(Path("artifacts/data_ingestion/ingested/test.parquet"))
+category_dictionary = get_category_dictionary([train_df,test_df],schema,"amount",max_levels=1000,rtol=1e-6)
+print(f"categories for {list(category_dictionary['categories'])}, float32 for {category_dictionary['float32_columns']}")
+
+def run(compact: bool):
+    train,test = (to_compact_dtypes(train_df,category_dictionary),to_compact_dtypes(test_df,category_dictionary)) if compact else (train_df,test_df)
+    X_train,y_train = train.drop(columns=["amount"]),train.amount
+    X_test,y_test = test.drop(columns=["amount"]),test.amount
+    imputer = get_imputer_object()
+    transformer = get_transformer_object(dtype=np.float32 if compact else np.float64)
+    required_columns = get_required_columns(transformer)
+    X_train = transformer.fit_transform(make_features(imputer.fit_transform(X_train),required_columns),y_train)
+    X_test = transformer.transform(make_features(imputer.transform(X_test),required_columns))
+    # rows with unscaled missing values are left out of the metric, the same rows in both modes
+    keep_train,keep_test = X_train.notna().all(axis=1),X_test.notna().all(axis=1)
+    model = Ridge().fit(X_train[keep_train],np.log(y_train[keep_train]))
+    return train,X_train,mean_absolute_error(y_test[keep_test],np.exp(model.predict(X_test[keep_test])))
+
+results = {}
+for label,compact in [("default",False),("compact",True)]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    train,X_train,mae = run(compact)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    results[label] = mae
+    print(f"{label}: input frame {train.memory_usage(deep=True).sum()/1e6:.2f}MB, features {X_train.memory_usage(deep=True).sum()/1e6:.2f}MB, peak {peak/1e6:.1f}MB, {elapsed:.2f}s, test mae {mae:.4f}")
+print(f"relative mae difference {abs(results['compact'] - results['default'])/results['default']:.2e}")
@@ -0,0 +1,31 @@
+# Registry features against the chained assigns on the imputed train file
+# run from the repo root after `dvc pull`: python -m benchmarks.bench_feature_utils
+import time
+import pandas as pd
+from pathlib import Path
+from src.utils.main_utils import read_data
+from src.utils.impute_utils import get_imputer_object
+from src.utils.feature_utils import OUTPUT_FEATURES,make_features,select_features
+from tests.reference import make_features_chained
+from src.utils.transform_utils import get_transformer_object,get_required_columns
+
+X = read_data(Path("artifacts/data_validation/validated/train.parquet")).drop(columns=["amount"])
+X = get_imputer_object().fit_transform(X)
+row = X.iloc[0].to_dict()
+required = get_required_columns(get_transformer_object())
+print(f"transformer consumes {select_features(required)}, skipping {sorted(set(OUTPUT_FEATURES) - set(required))}")
+
+for name,data,repeats in [
+    ("1 row",X.iloc[:1],200),
+    ("1 dict row",row,200),
+    ("1k rows",X.iloc[:1000],50),
+    ("1M rows",X.sample(1_000_000,replace=True,random_state=0).reset_index(drop=True),1)
+]:
+    timings = {}
+    for label,func in [("chained",make_features_chained),("all",make_features),("required",lambda data: make_features(data,required))]:
+        data_in = pd.DataFrame([data]) if label == "chained" and isinstance(data,dict) else data
+        start = time.perf_counter()
+        for _ in range(repeats):
+            func(data_in)
+        timings[label] = (time.perf_counter() - start)/repeats
+    print(f"make_features {name}: chained {timings['chained']*1e3:.2f}ms all features {timings['all']*1e3:.2f}ms required only {timings['required']*1e3:.2f}ms")
@@ -0,0 +1,36 @@
+# Per trial overhead of the fold cache against cross_val_score on the transformed train file
+# run from the repo root after `dvc pull`: python -m benchmarks.bench_fold_utils
+import time
+import numpy as np
+from pathlib import Path
+from sklearn.linear_model import Ridge
+from sklearn.model_selection import KFold,cross_val_score
+from sklearn.compose import TransformedTargetRegressor
+from src.utils.main_utils import read_data
+from src.utils.dict_utils import transformer_dict
+from src.utils.fold_utils import FoldCache,fit_and_score_fold
+
+df = read_data(Path("artifacts/data_transformation/transformed/train.parquet")).dropna()
+X_train,y_train = df.drop(columns=["amount"]),df.amount
+cv = KFold(n_splits = 10, shuffle = True, random_state = 42)
+
+start = time.perf_counter()
+folds = FoldCache(X_train,y_train,list(cv.split(X_train)))
+print(f"fold cache built in {(time.perf_counter() - start)*1e3:.1f}ms")
+
+for name in transformer_dict:
+    regressor = Ridge(alpha=0.5)
+    timings = {}
+    start = time.perf_counter()
+    expected = cross_val_score(TransformedTargetRegressor(regressor=regressor,transformer=transformer_dict[name]),X_train,y_train,scoring = "neg_mean_absolute_error",cv = cv)
+    timings["cross_val_score"] = time.perf_counter() - start
+    start = time.perf_counter()
+    scores = np.array([fit_and_score_fold(regressor,name,*folds.fold(fold,name)) for fold in range(len(folds))])
+    timings["fold cache"] = time.perf_counter() - start
+    start = time.perf_counter()
+    for fold in range(len(folds)):
+        X_fold_train,y_fold_train,X_fold_valid,_ = folds.fold(fold,name)
+        Ridge(alpha=0.5).fit(X_fold_train,y_fold_train).predict(X_fold_valid)
+    timings["estimator alone"] = time.perf_counter() - start
+    np.testing.assert_array_equal(scores,expected)
+    print(f"{name}: " + ", ".join(f"{label} {elapsed*1e3:.1f}ms" for label,elapsed in timings.items()) + " for 10 Ridge folds")
@@ -0,0 +1,45 @@
+# Fused imputer against the chained pipeline on the validated train file
+# run from the repo root after `dvc pull`: python -m benchmarks.bench_impute_utils
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from src.utils.main_utils import read_data
+from src.utils.impute_utils import GroupAggregateImputer,get_imputer_object
+from tests.reference import get_chained_imputer_object
+
+X = read_data(Path("artifacts/data_validation/validated/train.parquet")).drop(columns=["amount"])
+
+for label,imputer in [("chained",get_chained_imputer_object()),("fused",get_imputer_object())]:
+    start = time.perf_counter()
+    imputer.fit(X)
+    print(f"fit {label}: {(time.perf_counter() - start)*1e3:.1f}ms")
+
+chained = get_chained_imputer_object().fit(X)
+fused = get_imputer_object().fit(X)
+large = pd.concat([X]*10,ignore_index=True)
+for name,data,repeats in [("1 row",X.iloc[:1],200),(f"{len(X)} rows",X,5),(f"{len(large)} rows",large,2)]:
+    timings = {}
+    for label,imputer in [("chained",chained),("fused",fused)]:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            imputer.transform(data)
+        timings[label] = (time.perf_counter() - start)/repeats
+    print(f"transform {name}: chained {timings['chained']*1e3:.2f}ms fused {timings['fused']*1e3:.2f}ms ({timings['chained']/timings['fused']:.1f}x)")
+
+# group kernels against the groupby/Series.mode statistics they replace
+targets = [
+    {"variable": "furnishing","group_col": "transaction","estimator": "mode"},
+    {"variable": "num_floors","group_col": "floor_num","estimator": "median"},
+    {"variable": "balcony","group_col": "num_bhk","estimator": "median"}
+]
+X_filled = X.assign(floor_num=X.floor_num.fillna(X.floor_num.median()))
+start = time.perf_counter()
+for target in targets:
+    X_filled.groupby(target["group_col"])[target["variable"]].agg(
+        "median" if target["estimator"] == "median" else lambda x: x.mode().iloc[0] if x.notna().any() else np.nan
+    )
+groupby_time = time.perf_counter() - start
+start = time.perf_counter()
+GroupAggregateImputer(targets=targets).fit(X_filled)
+print(f"group statistics: groupby {groupby_time*1e3:.1f}ms kernels {(time.perf_counter() - start)*1e3:.1f}ms")
@@ -0,0 +1,44 @@
+# Inference kernel against the sklearn preprocessing path on the validated files
+# run from the repo root after `dvc pull`: python -m benchmarks.bench_kernel_utils
+import time
+import pickle
+import numpy as np
+from pathlib import Path
+from src.utils.main_utils import read_data
+from src.utils.impute_utils import get_imputer_object
+from src.utils.feature_utils import make_features
+from src.utils.kernel_utils import compile_inference_kernel
+from src.utils.transform_utils import get_transformer_object,get_required_columns
+
+train_df = read_data(Path("artifacts/data_validation/validated/train.parquet"))
+test_df = read_data(Path("artifacts/data_validation/validated/test.parquet"))
+X_train,y_train = train_df.drop(columns=["amount"]),train_df.amount
+X_test = test_df.drop(columns=["amount"])
+
+imputer = get_imputer_object().fit(X_train)
+transformer = get_transformer_object()
+required_columns = get_required_columns(transformer)
+transformer.fit(make_features(imputer.transform(X_train),required_columns),y_train)
+
+def sklearn_path(X):
+    return transformer.transform(make_features(imputer.transform(X),required_columns)).to_numpy()
+
+kernel = pickle.loads(pickle.dumps(compile_inference_kernel(imputer,transformer)))
+records = X_test.to_dict(orient="records")
+print(f"kernel pickles to {len(pickle.dumps(kernel))/1e3:.1f} kB")
+
+for label,func,inputs in [
+    ("sklearn",sklearn_path,[X_test.iloc[[i]] for i in range(300)]),
+    ("kernel",kernel.transform,records[:300])
+]:
+    latencies = []
+    for record in inputs:
+        start = time.perf_counter()
+        func(record)
+        latencies.append(time.perf_counter() - start)
+    print(f"{label} single record: p50 {np.percentile(latencies,50)*1e3:.3f}ms p99 {np.percentile(latencies,99)*1e3:.3f}ms")
+
+for label,func in [("sklearn",sklearn_path),("kernel",kernel.transform)]:
+    start = time.perf_counter()
+    func(X_test)
+    print(f"{label} batch of {len(X_test)}: {(time.perf_counter() - start)*1e3:.1f}ms")
@@ -0,0 +1,27 @@
+# Parser and clean_data timings on the full raw file
+# run from the repo root after `dvc pull`: python -m benchmarks.bench_parse_utils
+import time
+import pandas as pd
+from src.utils.clean_data import clean_data,normalize_column_name
+from src.utils.parse_utils import parse_amount,parse_area,parse_floor,parse_car_parking
+from tests import reference
+
+raw = pd.read_csv("raw_data/houses.csv",encoding = 'latin1')
+columns = raw.rename(columns = normalize_column_name)
+for name,parser,column in [
+    ("parse_amount",parse_amount,"amount"),
+    ("parse_area",parse_area,"carpet_area"),
+    ("parse_floor",parse_floor,"floor"),
+    ("parse_car_parking",parse_car_parking,"car_parking")
+]:
+    start = time.perf_counter()
+    parser(columns[column].loc[columns[column].ne("Call for Price")])
+    print(f"{name}: {time.perf_counter() - start:.3f}s")
+
+start = time.perf_counter()
+baseline = reference.clean_data(raw)
+print(f"reference clean_data: {time.perf_counter() - start:.3f}s")
+
+start = time.perf_counter()
+cleaned = clean_data(raw)
+print(f"clean_data: {time.perf_counter() - start:.3f}s for {len(raw)} raw rows -> {len(cleaned)} rows, same as the reference: {cleaned.equals(baseline)}")
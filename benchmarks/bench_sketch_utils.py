@@ -0,0 +1,25 @@
+# Sketch build time, size and quantile accuracy on the ingested train file
+# run from the repo root after `dvc pull`: python -m benchmarks.bench_sketch_utils
+import time
+import json
+import numpy as np
+from pathlib import Path
+from src.utils.main_utils import read_yaml_file,read_data
+from src.utils.sketch_utils import DatasetSketch
+
+schema = read_yaml_file(Path("data_schema/schema.yaml"))
+df = read_data(Path("artifacts/data_ingestion/ingested/train.parquet"))
+
+start = time.perf_counter()
+full = DatasetSketch.from_schema(schema)
+full.update(df)
+print(f"sketch: {time.perf_counter() - start:.3f}s for {len(df)} rows, {len(json.dumps(full.to_dict()))/1e3:.1f} kB as json")
+
+start = time.perf_counter()
+streamed = DatasetSketch.from_schema(schema)
+for start_row in range(0,len(df),3000):
+    streamed.update(df.iloc[start_row:start_row + 3000])
+print(f"chunked sketch: {time.perf_counter() - start:.3f}s, same as a single pass: {streamed.to_dict() == full.to_dict()}")
+
+amount = df.amount.to_numpy()
+print(f"amount p50/p90 sketch {full.sketches['amount'].quantile(np.array([0.5,0.9]))} exact {np.nanquantile(amount,[0.5,0.9])}")
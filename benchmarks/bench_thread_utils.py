@@ -0,0 +1,20 @@
+# Trials per minute with the thread budget against every level using all cores
+# run from the repo root after `dvc pull`: python -m benchmarks.bench_thread_utils
+import time
+import optuna
+from pathlib import Path
+from src.utils.main_utils import read_data
+from src.utils.thread_utils import get_core_budget,get_thread_layouts
+from src.utils.train_utils import REGRESSOR_NAMES,train_model
+
+optuna.logging.set_verbosity(optuna.logging.WARNING)
+df = read_data(Path("artifacts/data_transformation/transformed/train.parquet")).dropna()
+X_train,y_train = df.drop(columns=["amount"]),df.amount
+n_cores = get_core_budget()
+print(f"{n_cores} cores, layouts {get_thread_layouts(REGRESSOR_NAMES,n_cores,kfold_nsplits=5)}")
+
+for label,thread_budget in [("unbounded",False),("thread budget",True)]:
+    start = time.perf_counter()
+    train_model(X_train,y_train,kfold_nsplits=5,optuna_ntrials=12,study_name=label,thread_budget=thread_budget,seed=0)
+    elapsed = time.perf_counter() - start
+    print(f"{label}: 12 trials in {elapsed:.1f}s, {12/elapsed*60:.1f} trials per minute")
@@ -0,0 +1,35 @@
+# Study wall time with each pruner and with racing, on a 5000 row sample of the transformed train file
+# run from the repo root after `dvc pull`: python -m benchmarks.bench_train_utils [n_cores]
+# n_cores sets the core budget the thread layouts are planned for (10 gives every trial 10 fold jobs),
+# on a machine with fewer cores the fold jobs share them
+import sys
+import time
+import tempfile
+import optuna
+from collections import Counter
+from pathlib import Path
+from optuna.trial import TrialState
+from src.utils.main_utils import read_data
+from src.utils.train_utils import get_pruner,get_study_storage,train_model
+
+n_cores = int(sys.argv[1]) if len(sys.argv) > 1 else None
+optuna.logging.set_verbosity(optuna.logging.WARNING)
+df = read_data(Path("artifacts/data_transformation/transformed/train.parquet")).dropna().sample(5000,random_state=0)
+X_train,y_train = df.drop(columns=["amount"]),df.amount
+
+with tempfile.TemporaryDirectory() as tmp_dir:
+    storage_path = str(Path(tmp_dir)/"journal.log")
+    for pruner_name,racing_fractions in [("none",()),("median",()),("percentile",()),("successive_halving",()),("none",(0.1,0.3)),("median",(0.1,0.3))]:
+        label = f"{pruner_name}, racing on {list(racing_fractions)}"
+        start = time.perf_counter()
+        train_model(
+            X_train,y_train,kfold_nsplits=10,optuna_ntrials=40,study_name=label,storage_path=storage_path,n_cores=n_cores,seed=0,
+            pruner=get_pruner(pruner_name,n_startup_trials=5,percentile=25.0),racing_fractions=racing_fractions
+        )
+        elapsed = time.perf_counter() - start
+        # the full data study is the most recently created one
+        study = optuna.load_study(study_name=optuna.get_all_study_names(get_study_storage(storage_path))[-1],storage=get_study_storage(storage_path))
+        pruned = study.get_trials(deepcopy=False,states=(TrialState.PRUNED,))
+        pruned_at = dict(sorted(Counter(trial.last_step for trial in pruned).items()))
+        families = sorted({trial.params["regressor"] for trial in study.trials})
+        print(f"{label}: {elapsed:.1f}s for 40 trials ({len(pruned)} pruned, after fold {pruned_at}) over {families}, best cv mae {-study.best_value:.4f} with {study.best_params['regressor']}")
@@ -0,0 +1,42 @@
+# Fused column transformer against the concatenating ColumnTransformer on the validated train file
+# run from the repo root after `dvc pull`: python -m benchmarks.bench_transform_utils
+import time
+import pandas as pd
+from pathlib import Path
+from joblib import parallel_config
+from sklearn.compose import ColumnTransformer
+from src.utils.main_utils import read_data
+from src.utils.impute_utils import get_imputer_object
+from src.utils.feature_utils import make_features
+from src.utils.transform_utils import get_transformer_object,get_required_columns
+
+train_df = read_data(Path("artifacts/data_validation/validated/train.parquet"))
+X_train,y_train = train_df.drop(columns=["amount"]),train_df.amount
+X_train = make_features(get_imputer_object().fit_transform(X_train),get_required_columns(get_transformer_object()))
+
+def concatenating_transformer()->ColumnTransformer:
+    fused = get_transformer_object()
+    for _,transformer,_ in fused.transformers:
+        transformer.set_output(transform = "pandas")
+    return ColumnTransformer(transformers = fused.transformers)
+
+expected = concatenating_transformer().fit(X_train,y_train).transform(X_train)
+for label,make_transformer,backend,n_jobs in [
+    ("concatenating",concatenating_transformer,"loky",None),
+    ("fused",get_transformer_object,"loky",None),
+    ("fused threading n_jobs=-1",get_transformer_object,"threading",-1),
+    ("fused loky n_jobs=-1",get_transformer_object,"loky",-1)
+]:
+    fit_times,transform_times = [],[]
+    for _ in range(5):
+        transformer = make_transformer() if n_jobs is None else make_transformer(n_jobs)
+        with parallel_config(backend = backend):
+            start = time.perf_counter()
+            transformer.fit(X_train,y_train)
+            fit_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            output = transformer.transform(X_train)
+            transform_times.append(time.perf_counter() - start)
+    # cross fitted target encodings only match on transform, not on fit_transform
+    pd.testing.assert_frame_equal(output,expected)
+    print(f"{label}: fit {min(fit_times)*1e3:.0f}ms transform {min(transform_times)*1e3:.0f}ms, same output")
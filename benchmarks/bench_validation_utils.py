@@ -0,0 +1,19 @@
+# Schema validation timings on the ingested train file
+# run from the repo root after `dvc pull`: python -m benchmarks.bench_validation_utils
+import time
+from pathlib import Path
+from src.utils.main_utils import read_yaml_file,read_data
+from src.utils.validation_utils import SchemaValidator
+
+schema = read_yaml_file(Path("data_schema/schema.yaml"))
+file_path = Path("artifacts/data_ingestion/ingested/train.parquet")
+validator = SchemaValidator(schema)
+
+df = read_data(file_path)
+start = time.perf_counter()
+report = validator.validate(df)
+print(f"validate: {time.perf_counter() - start:.3f}s for {report['rows']} rows, passed {report['passed']}")
+
+start = time.perf_counter()
+chunked_report = validator.validate_file(file_path,chunk_size=5000)
+print(f"validate_file: {time.perf_counter() - start:.3f}s, same report {chunked_report == report}")
@@ -1,12 +1,14 @@
-import io
 import sys
 import boto3
 import pandas as pd
 from pathlib import Path
+from typing import Iterable,Iterator,Optional,Union
 from dataclasses import dataclass
-from src.utils import clean_data
 from src.logging import get_logger
 from src.exception import CustomException
+from src.constants import PARAMS_FILE_NAME
+from src.utils import clean_data,clean_data_in_chunks,clean_data_in_parallel,read_yaml_file
+from src.utils.s3_utils import MIN_PART_SIZE,infer_compression,iter_frame_chunks,iter_csv_parts,upload_parts
 
 # Configure logger
 logger = get_logger('data_pusher')
@@ -19,6 +21,12 @@ class DataPusherConfig:
     raw_data_path:Path = Path('raw_data/houses.csv')
     database_name:str = 'housing-property-price-prediction'      
     collection_name:str = 'HouseData'
+    chunk_size:Optional[int] = None
+    n_workers:int = 1
+    partition_size:int = 50000
+    part_size:int = MIN_PART_SIZE
+    upload_workers:int = 4
+    upload_chunk_rows:int = 50000
 
 # DataPusher class
 class DataPusher:
@@ -29,34 +37,72 @@ class DataPusher:
         except Exception as e:
             raise CustomException(e,sys)
 
-    def extract_and_clean(self)->pd.DataFrame:
+    def extract_and_clean(self)->Union[pd.DataFrame,Iterator[pd.DataFrame]]:
         try:
+            if self.config.chunk_size:
+                # the cleaned chunks are handed on as they come, concatenating them would hold the whole file again
+                return self.extract_and_clean_in_chunks()
             logger.info("Converting csv to json")
             data = pd.read_csv(self.config.raw_data_path,encoding='latin1')
             logger.info("Data cleaning started")
-            data = clean_data(data)
+            if self.config.n_workers > 1:
+                logger.info(f"Cleaning partitions of {self.config.partition_size} rows on {self.config.n_workers} workers")
+                data = clean_data_in_parallel(data,self.config.n_workers,self.config.partition_size)
+            else:
+                data = clean_data(data)
             logger.info("Data cleaning completed")
             return data     
         except Exception as e:
             raise CustomException(e,sys)
 
-    def insert_data_to_s3(self,data:pd.DataFrame)->int:
+    def extract_and_clean_in_chunks(self)->Iterator[pd.DataFrame]:
         try:
-            logger.info("Inserting data to s3")
+            logger.info(f"Streaming data cleaning started with chunks of {self.config.chunk_size} rows on {self.config.n_workers} workers")
+            chunks = clean_data_in_chunks(self.config.raw_data_path,self.config.chunk_size,n_workers=self.config.n_workers)
+            for chunk_number,chunk in enumerate(chunks,start=1):
+                logger.info(f"Cleaned chunk {chunk_number} with {len(chunk)} rows")
+                yield chunk
+            logger.info("Streaming data cleaning completed")
+        except Exception as e:
+            raise CustomException(e,sys)
+
+    def insert_data_to_s3(self,data:Union[pd.DataFrame,Iterable[pd.DataFrame]])->int:
+        try:
+            # the key suffix (.gz/.zst) decides the compression of the uploaded csv
+            compression = infer_compression(self.config.data_key)
+            logger.info(f"Inserting data to s3 as multipart upload with compression {compression}")
+            chunks = iter_frame_chunks(data,self.config.upload_chunk_rows) if isinstance(data,pd.DataFrame) else data
+
+            rows = 0
+            def count_rows(chunks):
+                nonlocal rows
+                for chunk in chunks:
+                    rows += len(chunk)
+                    yield chunk
+
             client = boto3.client('s3')
-            csv_buffer = io.StringIO()
-            data.to_csv(csv_buffer,index=False)
-            client.put_object(
-                Bucket=self.config.bucket_name,
-                Key=self.config.data_key,
-                Body=csv_buffer.getvalue()
+            parts = upload_parts(
+                client,
+                self.config.bucket_name,
+                self.config.data_key,
+                iter_csv_parts(count_rows(chunks),max(self.config.part_size,MIN_PART_SIZE),compression),
+                self.config.upload_workers
             )
-            logger.info("Inserting data to s3 completed")
+            logger.info(f"Inserting data to s3 completed with {rows} rows in {parts} parts")
+            return rows
         except Exception as e:
             raise CustomException(e,sys)
 
 if __name__ == "__main__":
-    data_pusher = DataPusher(DataPusherConfig())
+    params = read_yaml_file(Path(PARAMS_FILE_NAME))['data_pusher']
+    data_pusher = DataPusher(DataPusherConfig(
+        chunk_size=params['DATA_PUSHER_CHUNK_SIZE'],
+        n_workers=params['DATA_PUSHER_NUM_WORKERS'],
+        partition_size=params['DATA_PUSHER_PARTITION_SIZE'],
+        upload_chunk_rows=params['DATA_PUSHER_UPLOAD_CHUNK_ROWS'],
+        part_size=params['DATA_PUSHER_PART_SIZE_MB']*1024*1024,
+        upload_workers=params['DATA_PUSHER_UPLOAD_WORKERS']
+    ))
     data = data_pusher.extract_and_clean()
     length = data_pusher.insert_data_to_s3(data)
 
@@ -2,7 +2,10 @@ import io
 import sys
 import boto3
 import pandas as pd
+from typing import Tuple
 from src.utils import *
+from src.utils.cache_utils import ObjectCache
+from src.utils.s3_utils import TransferStats,ChunkReader,infer_compression,iter_object_ranges
 from src.logging import get_logger
 from src.exception import CustomException
 from src.entity.config_entity import DataIngestionConfig
@@ -13,9 +16,19 @@ logger = get_logger('data_ingestion')
 
 # DataIngestion class
 class DataIngestion:
-    def __init__(self,data_ingestion_config: DataIngestionConfig):
+    def __init__(self,data_ingestion_config: DataIngestionConfig,artifact_writer: ArtifactWriter = None):
         try:
             self.data_ingestion_config = data_ingestion_config
+            self.artifact_writer = artifact_writer or ArtifactWriter()
+        except Exception as e:
+            raise CustomException(e,sys)
+
+    def get_source_metadata(self)->dict:
+        try:
+            bucket_name: str = self.data_ingestion_config.bucket_name
+            data_key: str = self.data_ingestion_config.data_key
+            head = boto3.client('s3').head_object(Bucket = bucket_name,Key = data_key)
+            return {"bucket": bucket_name,"key": data_key,"etag": head['ETag'],"size": head['ContentLength']}
         except Exception as e:
             raise CustomException(e,sys)
 
@@ -26,12 +39,32 @@ class DataIngestion:
 
             logger.info("Importing collection as dataframe")
             client = boto3.client('s3')
-            response = client.get_object(
-               Bucket = bucket_name,
-               Key = data_key
-            )
-            content = response['Body'].read()
-            df = pd.read_csv(io.BytesIO(content),encoding='latin1')
+            head = client.head_object(Bucket = bucket_name,Key = data_key)
+            etag,size = head['ETag'],head['ContentLength']
+            compression = infer_compression(data_key)
+
+            cache = ObjectCache(self.data_ingestion_config.cache_dir,self.data_ingestion_config.cache_max_bytes)
+            entry_dir = cache.get(etag,size)
+            logger.info(f"Object cache {'hit' if entry_dir else 'miss'} for etag {etag} and size {size}: {cache.stats()}")
+
+            if entry_dir:
+                df = cache.get_frame(entry_dir)
+                if df is None:
+                    df = pd.read_csv(entry_dir/ObjectCache.RAW_FILE_NAME,encoding='latin1',compression=compression)
+            else:
+                stats = TransferStats()
+                chunks = iter_object_ranges(
+                   client,bucket_name,data_key,
+                   part_size = self.data_ingestion_config.download_part_size,
+                   max_workers = self.data_ingestion_config.download_workers,
+                   max_retries = self.data_ingestion_config.download_max_retries,
+                   stats = stats,
+                   head = head
+                )
+                df = pd.read_csv(io.BufferedReader(ChunkReader(cache.write_through(etag,size,chunks))),encoding='latin1',compression=compression)
+                logger.info(f"Downloaded {stats.bytes/1e6:.1f} MB in {stats.parts} parts with {stats.retries} retries at {stats.mb_per_s:.1f} MB/s")
+                if self.data_ingestion_config.cache_parsed:
+                    cache.put_frame(etag,size,df)
             logger.info("Importing collection as dataframe completed")
 
             return df
@@ -42,16 +75,15 @@ class DataIngestion:
         try:
             logger.info("Exporting data to feature store")
             feature_store_path = self.data_ingestion_config.feature_store_path
-            feature_store_path.parent.mkdir(parents=True,exist_ok=True)
             feature_store_df = df.drop(columns = ["index"],axis=1)
-            feature_store_df.to_csv(feature_store_path,index=False,header=True)
+            self.artifact_writer.save(feature_store_path,feature_store_df)
             logger.info("Exporting data to feature store completed")
 
             return df
         except Exception as e:
             raise CustomException(e,sys)
 
-    def split_data_as_train_test(self,df: pd.DataFrame):
+    def split_data_as_train_test(self,df: pd.DataFrame)->Tuple[pd.DataFrame,pd.DataFrame]:
         try:
             logger.info("Splitting data as train and test")
             train_df,test_df = train_test_split(
@@ -62,18 +94,11 @@ class DataIngestion:
             logger.info("Splitting data as train and test completed")
 
             logger.info("Exporting train and test data to respective file paths")
-            train_file_path = self.data_ingestion_config.training_file_path
-            train_file_path.parent.mkdir(parents=True,exist_ok=True)
-            train_df.to_csv(
-                train_file_path,index=False,header=True
-            )
-
-            test_file_path = self.data_ingestion_config.testing_file_path
-            test_file_path.parent.mkdir(parents=True,exist_ok=True)
-            test_df.to_csv(
-                test_file_path,index=False,header=True
-            )
+            self.artifact_writer.save(self.data_ingestion_config.training_file_path,train_df)
+            self.artifact_writer.save(self.data_ingestion_config.testing_file_path,test_df)
             logger.info("Exporting train and test data to respective file paths completed")
+
+            return train_df,test_df
         except Exception as e:
             raise CustomException(e,sys)
 
@@ -82,13 +107,16 @@ class DataIngestion:
             logger.info("Initiating data ingestion")
             df = self.import_collection_as_dataframe()
             df = self.export_data_to_feature_store(df)
-            self.split_data_as_train_test(df)
+            train_df,test_df = self.split_data_as_train_test(df)
             logger.info("Data ingestion completed")
 
+            in_memory = self.data_ingestion_config.in_memory
             data_ingestion_artifact = DataIngestionArtifact(
                 feature_store_path=self.data_ingestion_config.feature_store_path,
                 train_file_path=self.data_ingestion_config.training_file_path,
-                test_file_path=self.data_ingestion_config.testing_file_path
+                test_file_path=self.data_ingestion_config.testing_file_path,
+                train_df=train_df if in_memory else None,
+                test_df=test_df if in_memory else None
             )
 
             return data_ingestion_artifact
@@ -1,4 +1,7 @@
 import sys
+import numpy as np
+import pandas as pd
+from joblib import parallel_config
 from src.utils import *
 from src.logging import get_logger
 from src.exception import CustomException
@@ -10,10 +13,11 @@ logger = get_logger('data_transformation')
 
 # DataTransformation class
 class DataTransformation:
-    def __init__(self,data_validation_artifact: DataValidationArtifact,data_transformation_config: DataTransformationConfig):
+    def __init__(self,data_validation_artifact: DataValidationArtifact,data_transformation_config: DataTransformationConfig,artifact_writer: ArtifactWriter = None):
         try:
             self.data_validation_artifact = data_validation_artifact
             self.data_transformation_config = data_transformation_config
+            self.artifact_writer = artifact_writer or ArtifactWriter()
             self.train_file_path = self.data_validation_artifact.validated_train_file_path
             self.test_file_path = self.data_validation_artifact.validated_test_file_path
             self.target_column = self.data_transformation_config.target_column
@@ -24,10 +28,23 @@ class DataTransformation:
     def initiate_data_transformation(self)->DataTransformationArtifact:
         try:
             logger.info("Initiating data transformation")
-            logger.info("Reading train and test files")
-            train_df = read_data(self.train_file_path)
-            test_df = read_data(self.test_file_path)
-            logger.info("Reading train and test files completed")
+            schema_dtypes = get_schema_dtypes(self.data_transformation_config.schema)
+            if self.data_validation_artifact.train_df is not None:
+                logger.info("Using train and test dataframes handed over by data validation")
+                train_df = self.data_validation_artifact.train_df
+                test_df = self.data_validation_artifact.test_df
+            elif self.data_transformation_config.compact_dtypes:
+                # csv loses the categoricals, they are cast back from the shared dictionary
+                logger.info("Reading train and test files in compact dtypes")
+                category_dictionary = read_json_file(self.data_validation_artifact.category_dictionary_file_path)
+                train_df = to_compact_dtypes(read_data(self.train_file_path),category_dictionary)
+                test_df = to_compact_dtypes(read_data(self.test_file_path),category_dictionary)
+                logger.info("Reading train and test files completed")
+            else:
+                logger.info("Reading train and test files")
+                train_df = read_data(self.train_file_path,schema_dtypes)
+                test_df = read_data(self.test_file_path,schema_dtypes)
+                logger.info("Reading train and test files completed")
             
             X_train = train_df.drop(columns = [self.target_column],axis=1)
             y_train = train_df[self.target_column].copy()
@@ -41,24 +58,36 @@ class DataTransformation:
             X_test = imputer.transform(X_test)
             logger.info("Imputed missing values in train and test dataframes")
 
+            # only the features the transformer reads are computed
+            sparse_output = self.data_transformation_config.sparse_output
+            transformer = get_transformer_object(
+                n_jobs=self.data_transformation_config.n_jobs,
+                sparse_output=sparse_output,
+                dtype=np.float32 if self.data_transformation_config.compact_dtypes else np.float64
+            )
+            required_columns = get_required_columns(transformer)
+
             logger.info("Making features in train and test dataframes")
-            X_train = make_features(X_train)
-            X_test = make_features(X_test)
+            X_train = make_features(X_train,required_columns)
+            X_test = make_features(X_test,required_columns)
             logger.info("Made features in train and test dataframes")
 
-            logger.info("Transforming train and test dataframes")
-            transformer = get_transformer_object()
-            X_train = transformer.fit_transform(X_train,y_train)
-            X_test = transformer.transform(X_test)
+            logger.info(f"Transforming train and test dataframes with n_jobs {self.data_transformation_config.n_jobs} on the {self.data_transformation_config.parallel_backend} backend")
+            with parallel_config(backend=self.data_transformation_config.parallel_backend):
+                X_train = transformer.fit_transform(X_train,y_train)
+                X_test = transformer.transform(X_test)
+            if sparse_output:
+                # csr outputs travel as sparse frames, zeros are never materialized
+                feature_names = transformer.get_feature_names_out()
+                X_train = pd.DataFrame.sparse.from_spmatrix(X_train,index=y_train.index,columns=feature_names)
+                X_test = pd.DataFrame.sparse.from_spmatrix(X_test,index=y_test.index,columns=feature_names)
             logger.info("Transformed train and test dataframes")
 
             logger.info("Saving transformed train and test dataframes")
             transformed_train_df = X_train.join(y_train)
             transformed_test_df = X_test.join(y_test)
-            self.data_transformation_config.transformed_train_file_path.parent.mkdir(parents=True,exist_ok=True)
-            self.data_transformation_config.transformed_test_file_path.parent.mkdir(parents=True,exist_ok=True)
-            transformed_train_df.to_csv(self.data_transformation_config.transformed_train_file_path,index=False,header=True)
-            transformed_test_df.to_csv(self.data_transformation_config.transformed_test_file_path,index=False,header=True)
+            self.artifact_writer.save(self.data_transformation_config.transformed_train_file_path,transformed_train_df)
+            self.artifact_writer.save(self.data_transformation_config.transformed_test_file_path,transformed_test_df)
             logger.info("Saved transformed train and test dataframes")
 
             logger.info("Saving preprocessor object")
@@ -66,12 +95,21 @@ class DataTransformation:
             save_joblib_file(self.preprocessor_object_file_path,transformer)
             logger.info("Saved preprocessor object")
 
+            logger.info("Compiling imputer, features and preprocessor into an inference kernel")
+            inference_kernel = compile_inference_kernel(imputer,transformer)
+            save_joblib_file(self.data_transformation_config.inference_kernel_file_path,inference_kernel)
+            logger.info("Saved inference kernel")
+
             logger.info("Data transformation completed")
 
+            in_memory = self.data_transformation_config.in_memory
             data_transformation_artifact = DataTransformationArtifact(
                 transformed_train_file_path=self.data_transformation_config.transformed_train_file_path,
                 transformed_test_file_path=self.data_transformation_config.transformed_test_file_path,
-                preprocessor_file_path=self.preprocessor_object_file_path
+                preprocessor_file_path=self.preprocessor_object_file_path,
+                inference_kernel_file_path=self.data_transformation_config.inference_kernel_file_path,
+                train_df=transformed_train_df if in_memory else None,
+                test_df=transformed_test_df if in_memory else None
             )
             return data_transformation_artifact
         except Exception as e:
@@ -1,4 +1,5 @@
 import sys
+import shutil
 import pandas as pd
 from src.utils import *
 from src.logging import get_logger
@@ -11,50 +12,147 @@ logger = get_logger('data_validation')
 
 # DataValidation class
 class DataValidation:
-    def __init__(self,data_ingestion_artifact: DataIngestionArtifact,data_validation_config: DataValidationConfig):
+    def __init__(self,data_ingestion_artifact: DataIngestionArtifact,data_validation_config: DataValidationConfig,artifact_writer: ArtifactWriter = None):
         try:
             self.data_ingestion_artifact = data_ingestion_artifact
             self.data_validation_config = data_validation_config
+            self.artifact_writer = artifact_writer or ArtifactWriter()
             self.train_file_path = self.data_ingestion_artifact.train_file_path
             self.test_file_path = self.data_ingestion_artifact.test_file_path
             self.schema = self.data_validation_config.schema
+            self.schema_validator = SchemaValidator(self.schema)
         except Exception as e:
             raise CustomException(e,sys)
         
-    def validate_number_of_columns(self,dataframe: pd.DataFrame)->bool:
+    def validate_dataframe(self,dataframe: pd.DataFrame,name: str)->dict:
         try:
-            logger.info("Validating number of columns")
-            number_of_columns = len(self.schema["columns"])
-            logger.info(f"Required number of columns: {number_of_columns}")
-            logger.info(f"Actual number of columns: {len(dataframe.columns)}")
-            return len(dataframe.columns) == number_of_columns
+            logger.info(f"Validating {name} dataframe against the schema")
+            report = self.schema_validator.validate(dataframe)
+            if report["passed"]:
+                logger.info(f"{name} dataframe passed all {len(report['columns'])} column checks")
+            else:
+                logger.error(f"{name} dataframe failed validation: missing columns {report['missing_columns']}, unexpected columns {report['unexpected_columns']}, failed columns {report['failed_columns']}")
+            return report
         except Exception as e:
             raise CustomException(e,sys)
         
+    def detect_drift(self,train_df: pd.DataFrame,test_df: pd.DataFrame)->dict:
+        try:
+            config = self.data_validation_config
+            logger.info("Sketching column distributions")
+            sketch_kwargs = dict(
+                relative_accuracy=config.sketch_relative_accuracy,
+                width=config.sketch_cms_width,
+                depth=config.sketch_cms_depth,
+                top_k=config.sketch_top_k
+            )
+            # train then test stream through one sketch, so the heavy hitters are the ones of a single pass
+            # (a merge of separate train and test sketches could miss values ranked just below top_k in both)
+            sketch = DatasetSketch.from_schema(self.schema,**sketch_kwargs)
+            sketch.update(train_df)
+            sketch.update(test_df)
+            save_json_file(config.sketch_file_path,sketch.to_dict())
+
+            if config.reference_sketch_file_path.exists():
+                reference = DatasetSketch.from_dict(read_json_file(config.reference_sketch_file_path))
+                drift_report = sketch.compare(reference,config.drift_psi_threshold,config.drift_ks_threshold)
+                drift_report["reference"] = str(config.reference_sketch_file_path)
+            else:
+                logger.info("No reference sketch yet, skipping drift detection")
+                drift_report = {"drift_detected": False,"drifted_columns": [],"columns": {},"reference": None}
+            save_json_file(config.drift_report_file_path,drift_report)
+
+            if drift_report["drift_detected"]:
+                logger.warning(f"Drift detected against the reference data in columns {drift_report['drifted_columns']}")
+            logger.info(f"Saved drift report to {config.drift_report_file_path}")
+            return drift_report
+        except Exception as e:
+            raise CustomException(e,sys)
+
+    def update_reference_sketch(self,drift_report: dict):
+        try:
+            config = self.data_validation_config
+            # the reference stays fixed until it is promoted, so slow drift adds up against it
+            # instead of being measured against the previous run only
+            if config.reference_sketch_file_path.exists() and not config.promote_reference:
+                logger.info(f"Keeping the reference sketch {config.reference_sketch_file_path}")
+                return
+            if drift_report["drift_detected"]:
+                logger.warning(f"Promoting this dataset to the drift reference although it drifted in {drift_report['drifted_columns']}")
+            else:
+                logger.info("Promoting this dataset to the drift reference")
+            config.reference_sketch_file_path.parent.mkdir(parents=True,exist_ok=True)
+            shutil.copyfile(config.sketch_file_path,config.reference_sketch_file_path)
+        except Exception as e:
+            raise CustomException(e,sys)
+
+    def cast_to_compact_dtypes(self,train_df: pd.DataFrame,test_df: pd.DataFrame)->tuple:
+        try:
+            config = self.data_validation_config
+            previous = read_json_file(config.category_dictionary_file_path) if config.category_dictionary_file_path.exists() else None
+            category_dictionary = get_category_dictionary([train_df,test_df],self.schema,config.target_column,config.category_max_levels,config.float32_rtol,previous)
+            save_json_file(config.category_dictionary_file_path,category_dictionary)
+            logger.info(f"Casting {list(category_dictionary['categories'])} to categoricals and {category_dictionary['float32_columns']} to float32")
+            train_df = to_compact_dtypes(train_df,category_dictionary)
+            test_df = to_compact_dtypes(test_df,category_dictionary)
+            logger.info(f"Train dataframe takes {train_df.memory_usage(deep=True).sum()/1e6:.2f}MB in compact dtypes")
+            return train_df,test_df
+        except Exception as e:
+            raise CustomException(e,sys)
+
     def initiate_data_validation(self)-> DataValidationArtifact:
         try:
             logger.info("Initiating data validation")
-            logger.info("Reading train and test files")
-            train_df = read_data(self.train_file_path)
-            test_df = read_data(self.test_file_path)
-            logger.info("Reading train and test files completed")
+            if self.data_ingestion_artifact.train_df is not None:
+                logger.info("Using train and test dataframes handed over by data ingestion")
+                train_df = self.data_ingestion_artifact.train_df
+                test_df = self.data_ingestion_artifact.test_df
+            else:
+                logger.info("Reading train and test files")
+                train_df = read_data(self.train_file_path)
+                test_df = read_data(self.test_file_path)
+                logger.info("Reading train and test files completed")
 
-            status_df = self.validate_number_of_columns(train_df) and self.validate_number_of_columns(test_df)
+            # checked before the schema cast so uncoercible values are reported instead of raising
+            validation_report = {
+                "train": self.validate_dataframe(train_df,"train"),
+                "test": self.validate_dataframe(test_df,"test")
+            }
+            status_df = validation_report["train"]["passed"] and validation_report["test"]["passed"]
+            validation_report["passed"] = status_df
+            save_json_file(self.data_validation_config.validation_report_file_path,validation_report)
+            logger.info(f"Saved validation report to {self.data_validation_config.validation_report_file_path}")
             if not status_df:
-                raise CustomException("Train and Test dataframes does not contain all the columns")
-            else:
-                logger.info("Train and Test dataframes contains all the columns")
-                self.data_validation_config.validated_train_file_path.parent.mkdir(parents=True,exist_ok=True)
-                self.data_validation_config.validated_test_file_path.parent.mkdir(parents=True,exist_ok=True)
-                train_df.to_csv(self.data_validation_config.validated_train_file_path,index=False,header=True)
-                test_df.to_csv(self.data_validation_config.validated_test_file_path,index=False,header=True)
+                raise ValueError(f"Train and test dataframes failed schema validation, see {self.data_validation_config.validation_report_file_path}")
+
+            schema_dtypes = get_schema_dtypes(self.schema)
+            train_df = cast_to_dtypes(train_df,schema_dtypes)
+            test_df = cast_to_dtypes(test_df,schema_dtypes)
+
+            # sketched at schema precision, so compact and default runs compare the same values
+            drift_report = self.detect_drift(train_df,test_df)
+            if drift_report["drift_detected"] and self.data_validation_config.fail_on_drift:
+                raise ValueError(f"Drift detected in columns {drift_report['drifted_columns']}, see {self.data_validation_config.drift_report_file_path}")
+            self.update_reference_sketch(drift_report)
+
+            if self.data_validation_config.compact_dtypes:
+                train_df,test_df = self.cast_to_compact_dtypes(train_df,test_df)
+            self.artifact_writer.save(self.data_validation_config.validated_train_file_path,train_df)
+            self.artifact_writer.save(self.data_validation_config.validated_test_file_path,test_df)
             
             logger.info("Data validation completed")
 
+            in_memory = self.data_validation_config.in_memory
             data_validation_artifact = DataValidationArtifact(
                 validation_status=status_df,
                 validated_train_file_path=self.data_validation_config.validated_train_file_path,
-                validated_test_file_path=self.data_validation_config.validated_test_file_path
+                validated_test_file_path=self.data_validation_config.validated_test_file_path,
+                validation_report_file_path=self.data_validation_config.validation_report_file_path,
+                sketch_file_path=self.data_validation_config.sketch_file_path,
+                drift_report_file_path=self.data_validation_config.drift_report_file_path,
+                category_dictionary_file_path=self.data_validation_config.category_dictionary_file_path if self.data_validation_config.compact_dtypes else None,
+                train_df=train_df if in_memory else None,
+                test_df=test_df if in_memory else None
             )
 
             return data_validation_artifact
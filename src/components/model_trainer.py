@@ -47,10 +47,15 @@ class ModelTrainer:
     def initiate_model_trainer(self)-> ModelTrainerArtifact:
         try:
             logger.info("Initiating model trainer")
-            logger.info("Reading train and test files")
-            train_df = read_data(self.train_file_path)
-            test_df = read_data(self.test_file_path)
-            logger.info("Reading train and test files completed")
+            if self.data_transformation_artifact.train_df is not None:
+                logger.info("Using train and test dataframes handed over by data transformation")
+                train_df = self.data_transformation_artifact.train_df
+                test_df = self.data_transformation_artifact.test_df
+            else:
+                logger.info("Reading train and test files")
+                train_df = read_data(self.train_file_path)
+                test_df = read_data(self.test_file_path)
+                logger.info("Reading train and test files completed")
 
             X_train = train_df.drop(columns = [self.target_column],axis=1)
             y_train = train_df[self.target_column].copy()
@@ -58,11 +63,40 @@ class ModelTrainer:
             X_test = test_df.drop(columns = [self.target_column],axis=1)
             y_test = test_df[self.target_column].copy()
 
+            if is_sparse_frame(train_df):
+                logger.info("Handing sparse features to the regressors as csr matrices")
+                X_train,X_test = to_sparse_matrix(X_train),to_sparse_matrix(X_test)
+                y_train,y_test = y_train.astype("float64"),y_test.astype("float64")
+
             dagshub.init(repo_owner='rishabhpancholi', repo_name='housing-property-price-prediction-mlops-project', mlflow=True)
 
             with mlflow.start_run():
                 logger.info("Tuning the model and finding best params")
-                trained_model,best_params = train_model(X_train,y_train,self.model_trainer_config.kfold_nsplits,self.model_trainer_config.optuna_ntrials)
+                core_budget = get_core_budget(self.model_trainer_config.n_cores,self.model_trainer_config.n_workers)
+                thread_layouts = get_thread_layouts(REGRESSOR_NAMES,core_budget,self.model_trainer_config.kfold_nsplits)
+                logger.info(f"Thread budget of {core_budget} cores per worker, fold jobs x estimator threads: " + ", ".join(f"{name} {layout.fold_jobs}x{layout.estimator_threads}" for name,layout in thread_layouts.items()))
+                if self.model_trainer_config.racing_fractions:
+                    logger.info(f"Racing the regressor families on {self.model_trainer_config.racing_fractions} of the train rows, keeping {self.model_trainer_config.racing_keep_ratio} of them per rung")
+                if self.model_trainer_config.study_storage_path and self.model_trainer_config.fresh_study:
+                    logger.warning(f"Starting study {self.model_trainer_config.study_name} over, its earlier trials in {self.model_trainer_config.study_storage_path} are deleted")
+                elif self.model_trainer_config.study_storage_path:
+                    logger.warning(f"Resuming study {self.model_trainer_config.study_name} from {self.model_trainer_config.study_storage_path}, finished trials of earlier runs on the same data, folds and search space count towards the {self.model_trainer_config.optuna_ntrials} trials, pass --fresh-study to start it over")
+                logger.info(f"Running study {self.model_trainer_config.study_name} with {self.model_trainer_config.n_workers} workers and the {self.model_trainer_config.pruner} pruner, storage {self.model_trainer_config.study_storage_path or 'in memory'}")
+                trained_model,best_params = train_model(
+                    X_train,y_train,
+                    self.model_trainer_config.kfold_nsplits,
+                    self.model_trainer_config.optuna_ntrials,
+                    study_name=self.model_trainer_config.study_name,
+                    storage_path=self.model_trainer_config.study_storage_path,
+                    n_workers=self.model_trainer_config.n_workers,
+                    n_cores=self.model_trainer_config.n_cores,
+                    pruner=get_pruner(self.model_trainer_config.pruner,self.model_trainer_config.pruner_startup_trials,self.model_trainer_config.pruner_percentile),
+                    racing_fractions=self.model_trainer_config.racing_fractions,
+                    racing_trials_per_family=self.model_trainer_config.racing_trials_per_family,
+                    racing_keep_ratio=self.model_trainer_config.racing_keep_ratio,
+                    fold_cache_dir=self.model_trainer_config.fold_cache_dir,
+                    fresh_study=self.model_trainer_config.fresh_study
+                )
                 mlflow.log_params(best_params)
                 logger.info("Trained and tuned the model for best params")
 
@@ -13,6 +13,7 @@ TRAIN_FILE_NAME: str = "train.csv"
 TEST_FILE_NAME: str = "test.csv"
 PARAMS_FILE_NAME: str = "params.yaml"
 SCHEMA_FILE_PATH: str = "data_schema/schema.yaml"
+STAGE_MANIFEST_FILE_NAME: str = "stage_manifest.json"
 
 """Data Ingestion related constants"""
 DATA_INGESTION_BUCKET_NAME: str = "housepricesbucket130256"
@@ -20,17 +21,24 @@ DATA_INGESTION_DATA_KEY: str = "data/houses.csv"
 DATA_INGESTION_DIR_NAME: str = "data_ingestion"
 DATA_INGESTION_INGESTED_DIR: str = "ingested"
 DATA_INGESTION_FEATURE_STORE_DIR: str = "feature_store"
+DATA_INGESTION_CACHE_DIR: str = "object_cache"
 
 
 """Data Validation related constants"""
 DATA_VALIDATION_DIR_NAME: str = "data_validation"
 DATA_VALIDATION_VALID_DIR: str = "validated"
+DATA_VALIDATION_REPORT_FILE_NAME: str = "report.json"
+DATA_VALIDATION_SKETCH_FILE_NAME: str = "sketch.json"
+DATA_VALIDATION_DRIFT_REPORT_FILE_NAME: str = "drift_report.json"
+DATA_VALIDATION_REFERENCE_DIR: str = "drift_reference"
+DATA_VALIDATION_CATEGORY_DICTIONARY_FILE_NAME: str = "category_dictionary.json"
 
 """Data Transformation related constants"""
 DATA_TRANSFORMATION_DIR_NAME: str = "data_transformation"
 DATA_TRANSFORMATION_TRANSFORMED_DIR: str = "transformed"
 DATA_TRANSFORMATION_PREPROCESSOR_DIR: str = "preprocessor"
 DATA_TRANSFORMATION_PREPROCESSOR_FILE_NAME: str = "preprocessor.joblib"
+DATA_TRANSFORMATION_INFERENCE_KERNEL_FILE_NAME: str = "inference_kernel.joblib"
 
 """Model Trainer related constants"""
 MODEL_TRAINER_DIR_NAME: str = "model_trainer"
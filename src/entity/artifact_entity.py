@@ -1,4 +1,6 @@
-from dataclasses import dataclass
+import pandas as pd
+from typing import Optional
+from dataclasses import dataclass,field
 
 # DataIngestionArtifact class
 @dataclass
@@ -6,6 +8,8 @@ class DataIngestionArtifact:
     feature_store_path: str
     train_file_path: str
     test_file_path: str
+    train_df: Optional[pd.DataFrame] = field(default=None,repr=False)
+    test_df: Optional[pd.DataFrame] = field(default=None,repr=False)
 
 # DataValidationArtifact class
 @dataclass
@@ -13,6 +17,12 @@ class DataValidationArtifact:
     validation_status: bool
     validated_train_file_path: str
     validated_test_file_path: str
+    validation_report_file_path: str
+    sketch_file_path: str
+    drift_report_file_path: str
+    category_dictionary_file_path: Optional[str] = None
+    train_df: Optional[pd.DataFrame] = field(default=None,repr=False)
+    test_df: Optional[pd.DataFrame] = field(default=None,repr=False)
 
 # DataTransformationArtifact class
 @dataclass
@@ -20,6 +30,9 @@ class DataTransformationArtifact:
     transformed_train_file_path: str
     transformed_test_file_path: str
     preprocessor_file_path: str
+    inference_kernel_file_path: str
+    train_df: Optional[pd.DataFrame] = field(default=None,repr=False)
+    test_df: Optional[pd.DataFrame] = field(default=None,repr=False)
 
 # ModelTrainerArtifact class
 @dataclass
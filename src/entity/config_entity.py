@@ -1,6 +1,7 @@
 from pathlib import Path
+from typing import Optional
 from src.constants import *
-from src.utils import read_yaml_file
+from src.utils import read_yaml_file,artifact_file_name
 
 # TrainingPipelineConfig class
 class TrainingPipelineConfig:
@@ -9,37 +10,78 @@ class TrainingPipelineConfig:
         self.artifact_path: Path = Path(ARTIFACT_DIR)
         self.params: dict = read_yaml_file(file_path=Path(PARAMS_FILE_NAME))
         self.schema: dict = read_yaml_file(file_path=Path(SCHEMA_FILE_PATH))
+        self.artifact_format: str = self.params['artifacts']['ARTIFACT_FORMAT']
+        self.in_memory: bool = self.params['artifacts']['ARTIFACT_IN_MEMORY']
+        self.stage_cache: bool = self.params['artifacts']['ARTIFACT_STAGE_CACHE']
+        self.compact_dtypes: bool = self.params['artifacts']['ARTIFACT_COMPACT_DTYPES']
+        self.stage_manifest_path: Path = self.artifact_path/STAGE_MANIFEST_FILE_NAME
 
 
 # DataIngestionConfig class
 class DataIngestionConfig:
     def __init__(self,training_pipeline_config: TrainingPipelineConfig):
         self.data_ingestion_dir: Path = training_pipeline_config.artifact_path/DATA_INGESTION_DIR_NAME
-        self.feature_store_path: Path = self.data_ingestion_dir/DATA_INGESTION_FEATURE_STORE_DIR/FILE_NAME
-        self.training_file_path: Path = self.data_ingestion_dir/DATA_INGESTION_INGESTED_DIR/TRAIN_FILE_NAME
-        self.testing_file_path: Path = self.data_ingestion_dir/DATA_INGESTION_INGESTED_DIR/TEST_FILE_NAME
+        self.feature_store_path: Path = self.data_ingestion_dir/DATA_INGESTION_FEATURE_STORE_DIR/artifact_file_name(FILE_NAME,training_pipeline_config.artifact_format)
+        self.training_file_path: Path = self.data_ingestion_dir/DATA_INGESTION_INGESTED_DIR/artifact_file_name(TRAIN_FILE_NAME,training_pipeline_config.artifact_format)
+        self.testing_file_path: Path = self.data_ingestion_dir/DATA_INGESTION_INGESTED_DIR/artifact_file_name(TEST_FILE_NAME,training_pipeline_config.artifact_format)
         self.bucket_name: str = DATA_INGESTION_BUCKET_NAME
         self.data_key: str = DATA_INGESTION_DATA_KEY
+        self.in_memory: bool = training_pipeline_config.in_memory
         self.train_test_split_ratio: float = training_pipeline_config.params['data_ingestion']['DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO'] 
+        self.download_part_size: int = training_pipeline_config.params['data_ingestion']['DATA_INGESTION_DOWNLOAD_PART_SIZE_MB']*1024*1024
+        self.download_workers: int = training_pipeline_config.params['data_ingestion']['DATA_INGESTION_DOWNLOAD_WORKERS']
+        self.download_max_retries: int = training_pipeline_config.params['data_ingestion']['DATA_INGESTION_DOWNLOAD_MAX_RETRIES']
+        self.cache_dir: Path = training_pipeline_config.artifact_path/DATA_INGESTION_CACHE_DIR
+        self.cache_max_bytes: int = training_pipeline_config.params['data_ingestion']['DATA_INGESTION_CACHE_MAX_MB']*1024*1024
+        self.cache_parsed: bool = training_pipeline_config.params['data_ingestion']['DATA_INGESTION_CACHE_PARSED']
 
 # DataValidationConfig class
 class DataValidationConfig:
     def __init__(self,training_pipeline_config: TrainingPipelineConfig):
         self.schema: dict = training_pipeline_config.schema
+        self.in_memory: bool = training_pipeline_config.in_memory
         self.data_validation_dir: Path = training_pipeline_config.artifact_path/DATA_VALIDATION_DIR_NAME
         self.validated_data_dir: Path = self.data_validation_dir/DATA_VALIDATION_VALID_DIR
-        self.validated_train_file_path: Path = self.validated_data_dir/TRAIN_FILE_NAME
-        self.validated_test_file_path: Path = self.validated_data_dir/TEST_FILE_NAME
+        self.validated_train_file_path: Path = self.validated_data_dir/artifact_file_name(TRAIN_FILE_NAME,training_pipeline_config.artifact_format)
+        self.validated_test_file_path: Path = self.validated_data_dir/artifact_file_name(TEST_FILE_NAME,training_pipeline_config.artifact_format)
+        self.validation_report_file_path: Path = self.data_validation_dir/DATA_VALIDATION_REPORT_FILE_NAME
+        self.sketch_file_path: Path = self.data_validation_dir/DATA_VALIDATION_SKETCH_FILE_NAME
+        self.drift_report_file_path: Path = self.data_validation_dir/DATA_VALIDATION_DRIFT_REPORT_FILE_NAME
+        # sketch of the reference dataset, set by the first run and replaced only when promoted
+        self.reference_sketch_file_path: Path = training_pipeline_config.artifact_path/DATA_VALIDATION_REFERENCE_DIR/DATA_VALIDATION_SKETCH_FILE_NAME
+        self.sketch_relative_accuracy: float = training_pipeline_config.params['data_validation']['DATA_VALIDATION_SKETCH_RELATIVE_ACCURACY']
+        self.sketch_cms_width: int = training_pipeline_config.params['data_validation']['DATA_VALIDATION_SKETCH_CMS_WIDTH']
+        self.sketch_cms_depth: int = training_pipeline_config.params['data_validation']['DATA_VALIDATION_SKETCH_CMS_DEPTH']
+        self.sketch_top_k: int = training_pipeline_config.params['data_validation']['DATA_VALIDATION_SKETCH_TOP_K']
+        self.drift_psi_threshold: float = training_pipeline_config.params['data_validation']['DATA_VALIDATION_DRIFT_PSI_THRESHOLD']
+        self.drift_ks_threshold: float = training_pipeline_config.params['data_validation']['DATA_VALIDATION_DRIFT_KS_THRESHOLD']
+        self.fail_on_drift: bool = training_pipeline_config.params['data_validation']['DATA_VALIDATION_FAIL_ON_DRIFT']
+        self.promote_reference: bool = training_pipeline_config.params['data_validation']['DATA_VALIDATION_PROMOTE_REFERENCE']
+        self.compact_dtypes: bool = training_pipeline_config.compact_dtypes
+        self.target_column: str = TARGET_COLUMN
+        # shared by every run, categories seen before keep their place in it
+        self.category_dictionary_file_path: Path = self.data_validation_dir/DATA_VALIDATION_CATEGORY_DICTIONARY_FILE_NAME
+        self.category_max_levels: int = training_pipeline_config.params['data_validation']['DATA_VALIDATION_CATEGORY_MAX_LEVELS']
+        self.float32_rtol: float = training_pipeline_config.params['data_validation']['DATA_VALIDATION_FLOAT32_RTOL']
 
 # DataTransformationConfig class
 class DataTransformationConfig:
     def __init__(self,training_pipeline_config: TrainingPipelineConfig):
         self.data_transformation_dir: Path = training_pipeline_config.artifact_path/DATA_TRANSFORMATION_DIR_NAME
         self.transformed_data_dir: Path = self.data_transformation_dir/DATA_TRANSFORMATION_TRANSFORMED_DIR
-        self.transformed_train_file_path: Path = self.transformed_data_dir/TRAIN_FILE_NAME
-        self.transformed_test_file_path: Path = self.transformed_data_dir/TEST_FILE_NAME
+        self.schema: dict = training_pipeline_config.schema
+        self.in_memory: bool = training_pipeline_config.in_memory
+        self.compact_dtypes: bool = training_pipeline_config.compact_dtypes
+        self.sparse_output: bool = training_pipeline_config.params['data_transformation']['DATA_TRANSFORMATION_SPARSE_OUTPUT']
+        # sparse matrices are kept as csr on disk too
+        transformed_format: str = "npz" if self.sparse_output else training_pipeline_config.artifact_format
+        self.transformed_train_file_path: Path = self.transformed_data_dir/artifact_file_name(TRAIN_FILE_NAME,transformed_format)
+        self.transformed_test_file_path: Path = self.transformed_data_dir/artifact_file_name(TEST_FILE_NAME,transformed_format)
         self.target_column: str = TARGET_COLUMN
         self.preprocessing_object_file_path: Path = self.data_transformation_dir/DATA_TRANSFORMATION_PREPROCESSOR_DIR/DATA_TRANSFORMATION_PREPROCESSOR_FILE_NAME
+        self.inference_kernel_file_path: Path = self.data_transformation_dir/DATA_TRANSFORMATION_PREPROCESSOR_DIR/DATA_TRANSFORMATION_INFERENCE_KERNEL_FILE_NAME
+        self.n_jobs: int = training_pipeline_config.params['data_transformation']['DATA_TRANSFORMATION_N_JOBS']
+        self.parallel_backend: str = training_pipeline_config.params['data_transformation']['DATA_TRANSFORMATION_PARALLEL_BACKEND']
 
 # ModelTrainerConfig class
 class ModelTrainerConfig:
@@ -48,6 +90,18 @@ class ModelTrainerConfig:
         self.trained_model_file_path: Path = self.model_trainer_dir/MODEL_TRAINER_TRAINED_MODEL_DIR_NAME/MODEL_TRAINER_TRAINED_MODEL_FILE_NAME
         self.kfold_nsplits: int = training_pipeline_config.params['model_trainer']['MODEL_TRAINER_KFOLD_NSPLITS']
         self.optuna_ntrials: int = training_pipeline_config.params['model_trainer']['MODEL_TRAINER_OPTUNA_NTRIALS']
+        self.study_name: str = training_pipeline_config.params['model_trainer']['MODEL_TRAINER_STUDY_NAME']
+        self.study_storage_path: Optional[str] = training_pipeline_config.params['model_trainer']['MODEL_TRAINER_STUDY_STORAGE']
+        self.n_workers: int = training_pipeline_config.params['model_trainer']['MODEL_TRAINER_N_WORKERS']
+        self.n_cores: Optional[int] = training_pipeline_config.params['model_trainer']['MODEL_TRAINER_N_CORES']
+        self.pruner: str = training_pipeline_config.params['model_trainer']['MODEL_TRAINER_PRUNER']
+        self.pruner_startup_trials: int = training_pipeline_config.params['model_trainer']['MODEL_TRAINER_PRUNER_STARTUP_TRIALS']
+        self.pruner_percentile: float = training_pipeline_config.params['model_trainer']['MODEL_TRAINER_PRUNER_PERCENTILE']
+        self.racing_fractions: list = training_pipeline_config.params['model_trainer']['MODEL_TRAINER_RACING_FRACTIONS']
+        self.racing_trials_per_family: int = training_pipeline_config.params['model_trainer']['MODEL_TRAINER_RACING_TRIALS_PER_FAMILY']
+        self.racing_keep_ratio: float = training_pipeline_config.params['model_trainer']['MODEL_TRAINER_RACING_KEEP_RATIO']
+        self.fold_cache_dir: Optional[str] = training_pipeline_config.params['model_trainer']['MODEL_TRAINER_FOLD_CACHE_DIR']
+        self.fresh_study: bool = False
         self.target_column: str = TARGET_COLUMN
 
 class ModelPusherConfig:
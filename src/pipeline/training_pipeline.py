@@ -1,4 +1,8 @@
 import sys
+import argparse
+from typing import Iterable,Optional
+from src.utils import ArtifactWriter
+from src.utils.fingerprint_utils import StageCache,stage_fingerprint,artifact_from_record
 from src.logging import get_logger
 from src.exception import CustomException
 from src.components.data_ingestion import DataIngestion
@@ -12,52 +16,162 @@ from src.entity.artifact_entity import DataIngestionArtifact,DataValidationArtif
 # Configure logger
 logger = get_logger('training_pipeline')
 
+# cached stages in run order, forcing one stage re-runs every stage after it
+STAGES = ["data_ingestion","data_validation","data_transformation","model_trainer"]
+
+# modules whose source goes into each stage's code version
+STAGE_MODULES = {
+    "data_ingestion": ["src.components.data_ingestion","src.utils.split_data","src.utils.s3_utils","src.utils.cache_utils","src.utils.main_utils"],
+    "data_validation": ["src.components.data_validation","src.utils.validation_utils","src.utils.sketch_utils","src.utils.dtype_utils","src.utils.main_utils"],
+    "data_transformation": ["src.components.data_transformation","src.utils.feature_utils","src.utils.impute_utils","src.utils.transform_utils","src.utils.kernel_utils","src.utils.dtype_utils","src.utils.dict_utils","src.utils.main_utils"],
+    "model_trainer": ["src.components.model_trainer","src.utils.train_utils","src.utils.thread_utils","src.utils.fold_utils","src.utils.split_data","src.utils.fingerprint_utils","src.utils.dict_utils","src.utils.main_utils"]
+}
+
 # TrainingPipeline class
 class TrainingPipeline:
-    def __init__(self,training_pipeline_config: TrainingPipelineConfig):
+    def __init__(self,training_pipeline_config: TrainingPipelineConfig,force: Iterable[str] = (),fresh_study: bool = False):
         self.training_pipeline_config = training_pipeline_config
         self.data_ingestion_config = DataIngestionConfig(training_pipeline_config=training_pipeline_config)
         self.data_validation_config = DataValidationConfig(training_pipeline_config=training_pipeline_config)
         self.data_transformation_config = DataTransformationConfig(training_pipeline_config=training_pipeline_config)
         self.model_trainer_config = ModelTrainerConfig(training_pipeline_config=training_pipeline_config)
+        self.model_trainer_config.fresh_study = fresh_study
         self.model_pusher_config = ModelPusherConfig()
+        # in memory mode stages hand their frames over and persist them in the background
+        self.artifact_writer = ArtifactWriter(background=training_pipeline_config.in_memory)
+        self.stage_cache = StageCache(training_pipeline_config.stage_manifest_path) if training_pipeline_config.stage_cache else None
+        forced = [STAGES.index(stage) for stage in force]
+        self.forced_stages = set(STAGES[min(forced):]) if forced else set()
+        self.stage_fingerprints = {}
+
+    def get_stage_fingerprint(self,stage: str,upstream: Optional[str],config: dict)->str:
+        upstream_fingerprints = [self.stage_fingerprints[upstream]] if upstream else []
+        return stage_fingerprint(stage,upstream_fingerprints,config,STAGE_MODULES[stage])
+
+    def load_cached_stage(self,stage: str,fingerprint: Optional[str],artifact_class):
+        if self.stage_cache is None:
+            return None
+        if stage in self.forced_stages:
+            logger.info(f"Stage {stage} forced, skipping the stage cache")
+            return None
+        entry = self.stage_cache.lookup(stage,fingerprint)
+        if entry is None:
+            logger.info(f"Stage cache miss for {stage}")
+            return None
+        logger.info(f"Stage cache hit for {stage} with fingerprint {entry['fingerprint'][:12]}, reusing its outputs")
+        self.stage_fingerprints[stage] = entry["fingerprint"]
+        return artifact_from_record(artifact_class,entry["artifact"])
+
+    def record_stage(self,stage: str,fingerprint: str,artifact):
+        self.stage_fingerprints[stage] = fingerprint
+        if self.stage_cache is not None and fingerprint is not None:
+            # queued behind the stage's own writes so the recorded outputs are complete
+            self.artifact_writer.run(self.stage_cache.record,stage,fingerprint,artifact)
 
     def start_data_ingestion(self)->DataIngestionArtifact:
-        self.data_ingestion = DataIngestion(data_ingestion_config=self.data_ingestion_config)
-        self.data_ingestion_artifact = self.data_ingestion.initiate_data_ingestion()
+        self.data_ingestion = DataIngestion(data_ingestion_config=self.data_ingestion_config,artifact_writer=self.artifact_writer)
+        try:
+            source = self.data_ingestion.get_source_metadata()
+        except CustomException as e:
+            # offline runs fall back to the last ingested data
+            logger.warning(f"Could not read the source object metadata, reusing the last ingestion if there is one: {e}")
+            source = None
+        fingerprint = None if source is None else self.get_stage_fingerprint("data_ingestion",None,{
+            "source": source,
+            "split_ratio": self.data_ingestion_config.train_test_split_ratio,
+            "artifact_format": self.training_pipeline_config.artifact_format
+        })
+        self.data_ingestion_artifact = self.load_cached_stage("data_ingestion",fingerprint,DataIngestionArtifact)
+        if self.data_ingestion_artifact is None:
+            self.data_ingestion_artifact = self.data_ingestion.initiate_data_ingestion()
+            self.record_stage("data_ingestion",fingerprint,self.data_ingestion_artifact)
         return self.data_ingestion_artifact
-    
+
     def start_data_validation(self)->DataValidationArtifact:
-        self.data_validation = DataValidation(data_ingestion_artifact=self.data_ingestion_artifact,data_validation_config=self.data_validation_config)
-        self.data_validation_artifact = self.data_validation.initiate_data_validation()
+        fingerprint = self.get_stage_fingerprint("data_validation","data_ingestion",{
+            "schema": self.data_validation_config.schema,
+            "params": self.training_pipeline_config.params['data_validation'],
+            "compact_dtypes": self.training_pipeline_config.compact_dtypes,
+            "artifact_format": self.training_pipeline_config.artifact_format
+        })
+        self.data_validation_artifact = self.load_cached_stage("data_validation",fingerprint,DataValidationArtifact)
+        if self.data_validation_artifact is None:
+            self.data_validation = DataValidation(data_ingestion_artifact=self.data_ingestion_artifact,data_validation_config=self.data_validation_config,artifact_writer=self.artifact_writer)
+            self.data_validation_artifact = self.data_validation.initiate_data_validation()
+            self.record_stage("data_validation",fingerprint,self.data_validation_artifact)
         return self.data_validation_artifact
-    
+
     def start_data_transformation(self)->DataTransformationArtifact:
-        self.data_transformation = DataTransformation(data_validation_artifact=self.data_validation_artifact,data_transformation_config=self.data_transformation_config)
-        self.data_transformation_artifact = self.data_transformation.initiate_data_transformation()
+        fingerprint = self.get_stage_fingerprint("data_transformation","data_validation",{
+            "schema": self.data_transformation_config.schema,
+            "target_column": self.data_transformation_config.target_column,
+            "sparse_output": self.data_transformation_config.sparse_output,
+            "compact_dtypes": self.data_transformation_config.compact_dtypes,
+            "artifact_format": self.training_pipeline_config.artifact_format
+        })
+        self.data_transformation_artifact = self.load_cached_stage("data_transformation",fingerprint,DataTransformationArtifact)
+        if self.data_transformation_artifact is None:
+            self.data_transformation = DataTransformation(data_validation_artifact=self.data_validation_artifact,data_transformation_config=self.data_transformation_config,artifact_writer=self.artifact_writer)
+            self.data_transformation_artifact = self.data_transformation.initiate_data_transformation()
+            self.record_stage("data_transformation",fingerprint,self.data_transformation_artifact)
         return self.data_transformation_artifact
-    
+
     def start_model_trainer(self)->ModelTrainerArtifact:
-        self.model_trainer = ModelTrainer(data_transformation_artifact=self.data_transformation_artifact,model_trainer_config=self.model_trainer_config)
-        self.model_trainer_artifact = self.model_trainer.initiate_model_trainer()
+        fingerprint = self.get_stage_fingerprint("model_trainer","data_transformation",{
+            "params": self.training_pipeline_config.params['model_trainer'],
+            "target_column": self.model_trainer_config.target_column
+        })
+        self.model_trainer_artifact = self.load_cached_stage("model_trainer",fingerprint,ModelTrainerArtifact)
+        if self.model_trainer_artifact is None:
+            self.model_trainer = ModelTrainer(data_transformation_artifact=self.data_transformation_artifact,model_trainer_config=self.model_trainer_config)
+            self.model_trainer_artifact = self.model_trainer.initiate_model_trainer()
+            self.record_stage("model_trainer",fingerprint,self.model_trainer_artifact)
         return self.model_trainer_artifact
-    
+
     def start_model_pusher(self):
         self.model_saver = ModelPusher(data_transformation_artifact=self.data_transformation_artifact,model_trainer_artifact=self.model_trainer_artifact,model_pusher_config=self.model_pusher_config)
         self.model_saver.initiate_model_pusher()
-    
+
+    def wait_for_artifacts(self,raise_errors: bool = True):
+        if not self.artifact_writer.pending and self.artifact_writer.error is None:
+            return
+        logger.info("Waiting for background artifact writes")
+        try:
+            self.artifact_writer.wait()
+        except Exception as e:
+            if raise_errors:
+                raise
+            # a stage already failed, its error is the one to raise
+            logger.error(f"Background artifact writes failed: {e}")
+            return
+        logger.info("All artifacts written")
+
 if __name__ == "__main__":
+    training_pipeline = None
     try:
+        parser = argparse.ArgumentParser(description="Run the training pipeline")
+        parser.add_argument("--force",nargs="+",choices=STAGES + ["all"],default=[],help="re-run these stages (and every stage after them) even if their outputs are cached")
+        parser.add_argument("--fresh-study",action="store_true",help="delete the stored optuna study of this run and start its trials over (re-runs the model trainer)")
+        args = parser.parse_args()
+        force = STAGES if "all" in args.force else args.force
+        if args.fresh_study and "model_trainer" not in force:
+            force = [*force,"model_trainer"]
+
         logger.info("Initiating training pipeline")
         training_pipeline_config = TrainingPipelineConfig()
-        training_pipeline = TrainingPipeline(training_pipeline_config=training_pipeline_config)
+        training_pipeline = TrainingPipeline(training_pipeline_config=training_pipeline_config,force=force,fresh_study=args.fresh_study)
 
         data_ingestion_artifact = training_pipeline.start_data_ingestion()
         data_validation_artifact = training_pipeline.start_data_validation()
         data_transformation_artifact = training_pipeline.start_data_transformation()
         model_trainer_artifact = training_pipeline.start_model_trainer()
         training_pipeline.start_model_pusher()
+        training_pipeline.wait_for_artifacts()
 
         logger.info(f"Training pipeline completed with train mae {model_trainer_artifact.model_train_mae} and test mae {model_trainer_artifact.model_test_mae} and model pipeline pushed to S3 successfully")
     except Exception as e:
-        raise CustomException(e,sys)
\ No newline at end of file
+        raise CustomException(e,sys)
+    finally:
+        # queued artifact and stage cache writes are flushed even when a stage fails
+        if training_pipeline is not None:
+            training_pipeline.wait_for_artifacts(raise_errors=False)
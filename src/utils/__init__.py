@@ -1,22 +1,50 @@
 from src.utils.dict_utils import *
 from src.utils.main_utils import *
-from src.utils.clean_data import clean_data
-from src.utils.train_utils import train_model
-from src.utils.split_data import train_test_split
+from src.utils.clean_data import clean_data,clean_data_in_chunks,clean_data_in_parallel
+from src.utils.train_utils import train_model,get_pruner,REGRESSOR_NAMES
+from src.utils.thread_utils import get_core_budget,get_thread_layouts
+from src.utils.split_data import train_test_split,hash_split,hash_folds
 from src.utils.feature_utils import make_features
 from src.utils.impute_utils import get_imputer_object
-from src.utils.transform_utils import get_transformer_object
+from src.utils.transform_utils import get_transformer_object,get_required_columns
+from src.utils.validation_utils import SchemaValidator
+from src.utils.sketch_utils import DatasetSketch
+from src.utils.kernel_utils import compile_inference_kernel
+from src.utils.dtype_utils import get_category_dictionary,to_compact_dtypes
 
 __all__ = [
             "clean_data", 
+            "clean_data_in_chunks",
+            "clean_data_in_parallel",
             "train_test_split", 
+            "hash_split",
+            "hash_folds",
             "read_data", 
+            "save_data",
+            "cast_to_dtypes",
+            "is_sparse_frame",
+            "to_sparse_matrix",
+            "ArtifactWriter",
+            "get_schema_dtypes",
+            "artifact_file_name",
             "read_yaml_file", 
+            "read_json_file",
+            "save_json_file",
             "save_joblib_file",
             "make_features",
             "get_imputer_object",
             "get_transformer_object",
+            "get_required_columns",
+            "SchemaValidator",
+            "DatasetSketch",
+            "compile_inference_kernel",
+            "get_category_dictionary",
+            "to_compact_dtypes",
             "regressor_dict",
             "transformer_dict",
-            "train_model"
+            "train_model",
+            "get_pruner",
+            "REGRESSOR_NAMES",
+            "get_core_budget",
+            "get_thread_layouts"
     ]
\ No newline at end of file
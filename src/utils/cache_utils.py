@@ -0,0 +1,100 @@
+import json
+import time
+import shutil
+import hashlib
+import pandas as pd
+from pathlib import Path
+from typing import Iterable,Iterator,Optional
+
+# ObjectCache class
+class ObjectCache:
+    """
+    Content-addressed on-disk cache of S3 objects keyed by ETag and size,
+    evicts least recently used entries once the cache grows past max_bytes
+
+    """
+    RAW_FILE_NAME = "raw"
+    PARSED_FILE_NAME = "parsed.pkl"
+    INDEX_FILE_NAME = "index.json"
+
+    def __init__(self,cache_dir: Path,max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents = True,exist_ok = True)
+        self.index_path = self.cache_dir/self.INDEX_FILE_NAME
+        self.index = json.loads(self.index_path.read_text()) if self.index_path.exists() else {"entries": {},"hits": 0,"misses": 0}
+
+    @staticmethod
+    def entry_key(etag: str,size: int)->str:
+        return hashlib.sha256(f"{etag}:{size}".encode()).hexdigest()
+
+    def save_index(self):
+        tmp_path = self.index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.index,indent = 2))
+        tmp_path.replace(self.index_path)
+
+    def get(self,etag: str,size: int)->Optional[Path]:
+        key = self.entry_key(etag,size)
+        entry_dir = self.cache_dir/key
+        if key in self.index["entries"] and (entry_dir/self.RAW_FILE_NAME).exists():
+            self.index["hits"] += 1
+            self.index["entries"][key]["last_access"] = time.time()
+            self.evict(keep = key)
+            return entry_dir
+        self.index["misses"] += 1
+        self.save_index()
+        return None
+
+    def write_through(self,etag: str,size: int,chunks: Iterable[bytes])->Iterator[bytes]:
+        # the raw copy is written while the chunks stream to the parser and only committed once complete
+        entry_dir = self.cache_dir/self.entry_key(etag,size)
+        entry_dir.mkdir(parents = True,exist_ok = True)
+        tmp_path = entry_dir/f"{self.RAW_FILE_NAME}.tmp"
+        try:
+            with open(tmp_path,"wb") as file:
+                for chunk in chunks:
+                    file.write(chunk)
+                    yield chunk
+        except BaseException:
+            # a failed or abandoned download (the parser stops reading) leaves no partial copy behind
+            shutil.rmtree(entry_dir,ignore_errors = True)
+            raise
+        tmp_path.replace(entry_dir/self.RAW_FILE_NAME)
+        self.index["entries"][entry_dir.name] = {"etag": etag,"size": size,"last_access": time.time()}
+        self.evict(keep = entry_dir.name)
+
+    def put_frame(self,etag: str,size: int,df: pd.DataFrame):
+        entry_dir = self.cache_dir/self.entry_key(etag,size)
+        if entry_dir.name in self.index["entries"]:
+            df.to_pickle(entry_dir/self.PARSED_FILE_NAME)
+            self.evict(keep = entry_dir.name)
+
+    def get_frame(self,entry_dir: Path)->Optional[pd.DataFrame]:
+        parsed_path = entry_dir/self.PARSED_FILE_NAME
+        return pd.read_pickle(parsed_path) if parsed_path.exists() else None
+
+    def entry_bytes(self,key: str)->int:
+        return sum(path.stat().st_size for path in (self.cache_dir/key).glob("*"))
+
+    def evict(self,keep: Optional[str] = None):
+        entries = self.index["entries"]
+        sizes = {key: self.entry_bytes(key) for key in entries}
+        total = sum(sizes.values())
+        # least recently used first, the entry in use is never evicted
+        for key in sorted(entries,key = lambda key: entries[key]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self.cache_dir/key,ignore_errors = True)
+            total -= sizes[key]
+            del entries[key]
+        self.save_index()
+
+    def stats(self)->dict:
+        return {
+            "hits": self.index["hits"],
+            "misses": self.index["misses"],
+            "entries": len(self.index["entries"]),
+            "bytes": sum(self.entry_bytes(key) for key in self.index["entries"])
+        }
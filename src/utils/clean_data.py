@@ -1,74 +1,45 @@
 import numpy as np
 import pandas as pd
+from pathlib import Path
+from collections import deque
+from typing import Callable,Iterable,Iterator
+from concurrent.futures import ProcessPoolExecutor
+from src.utils.parse_utils import parse_amount,parse_area,parse_floor,parse_car_parking
 
-def clean_data(data:pd.DataFrame)->pd.DataFrame:
-        # convert the values to crores scale
-        
-        def convert_to_crores(ser: pd.Series)->pd.Series:
-            return(
-                    ser
-                    .str.split(" ",expand = True)
-                    .set_axis(["amount","unit"],axis=1)
-                    .assign(
-                        amount = lambda df:(
-                            np.where(
-                                df.unit.eq("Lac"),
-                                df.amount.astype(float).mul(0.01),
-                                df.amount.astype(float)
-                            )
-                        )
-                    )
-                    .amount
-            )
-        
-        # all the units converted to sqft
-        
-        conversion_factors = {
-            "sqft": 1,
-            "sqyrd": 9,
-            "sqm": 10.7639,
-            "marla": 272.25,
-            "kanal": 5445,
-            "ground": 2400,
-            "biswa2": 1350,
-            "aankadam": 75,
-            "acre": 43560,
-            "hectare": 107639,
-            "cent": 435.6,
-            "bigha": 27225
-        }
-        
-        def remove_area_units_and_standardize(ser: pd.Series)->pd.Series:
-            return(
-                ser
-                .str.replace(",","")
-                .str.split(" ",expand = True)
-                .set_axis(["value","unit"],axis=1)
-                .assign(
-                    value = lambda df:(
-                        pd.to_numeric(df.value)*df.unit.map(conversion_factors)
-                    )
-                )
-                .value
-            )
-        
-        return(
+# Raw columns that stay numeric, every other raw column is read as text
+NUMERIC_RAW_COLUMNS = ["index","price"]
+
+def normalize_column_name(col: str)->str:
+    return col.lower().replace(" ","_").split("_(")[0].split("(")[0]
+
+def clean_rows(data:pd.DataFrame)->pd.DataFrame:
+        data = (
+            data
+            .rename(columns = normalize_column_name)
+            .drop(columns = ["index","description","status","society","dimensions","plot_area"])
+        )
+
+        data = (
              data
             .assign(**{
                 col: data[col].str.strip()
                 for col in data.select_dtypes(include = "O").columns
             })
-            .rename(columns = lambda col: col.lower().replace(" ","_").split("_(")[0].split("(")[0])
-            .drop(columns = ["index","description","status","society","dimensions","plot_area"])
             .query('amount != "Call for Price"')
+        )
+
+        # each parser yields all components of its column from a single pass
+        floor_num,num_floors = parse_floor(data.floor)
+        parking_spots,parking_cover = parse_car_parking(data.car_parking)
+
+        return(
+             data
             .assign(
                 bathroom = lambda df: pd.to_numeric(df.bathroom.str.replace("> ","")),
                 balcony = lambda df: pd.to_numeric(df.balcony.str.replace("> ","")),
-                amount = lambda df: df.amount.pipe(convert_to_crores),
-                carpet_area = lambda df: df.carpet_area.pipe(remove_area_units_and_standardize),
-                super_area = lambda df: df.super_area.pipe(remove_area_units_and_standardize),
-                floor = lambda df: df.floor.str.replace("200 out of 200","2 out of 2"),
-                car_parking = lambda df: df.car_parking.str.replace(",",""),
+                amount = lambda df: df.amount.pipe(parse_amount),
+                carpet_area = lambda df: df.carpet_area.pipe(parse_area),
+                super_area = lambda df: df.super_area.pipe(parse_area),
                 facing = lambda df: df.facing.str.replace("South -West","South - West"),
                 num_bhk = lambda df: (
                     pd.to_numeric(
@@ -79,40 +50,8 @@ def clean_data(data:pd.DataFrame)->pd.DataFrame:
                     )
                   )
                 ),
-               floor_num = lambda df: (
-                   np.where(
-                           df.floor.str.contains("out of"),
-                           pd.to_numeric(
-                               df.floor
-                               .str.split("out of")
-                               .str[0]
-                               .str.replace("Ground","0")
-                               .str.replace("Lower Basement","0")
-                               .str.replace("Upper Basement","0")
-                           ),
-                           np.where(
-                               df.floor.isnull(),
-                               np.nan,
-                               df.floor
-                               .str.split("out of")
-                               .str[0]
-                               .str.replace("Ground","0")
-                               .str.replace("Lower Basement","0")
-                               .str.replace("Upper Basement","0")
-                           )
-                   )
-               ),
-               num_floors = lambda df: (
-                   np.where(
-                       df.floor.str.contains("out of"),
-                       pd.to_numeric(
-                           df.floor
-                           .str.split("out of")
-                           .str[1]
-                       ),
-                       np.nan
-                   )
-               ),
+               floor_num = floor_num,
+               num_floors = num_floors,
                overlooking_garden = lambda df: (
                    np.where(
                        df.overlooking.isnull(),
@@ -134,22 +73,8 @@ def clean_data(data:pd.DataFrame)->pd.DataFrame:
                        np.where(df.overlooking.str.contains("Pool"),True,False)
                    )
                ),
-               parking_spots = lambda df: (
-                   pd.to_numeric(
-                       df.car_parking
-                       .str.extract(r"(\d+)")[0],
-                       errors = 'coerce'
-                   )
-               ),
-               parking_cover = lambda df: (
-                       np.where(
-                           df.car_parking.isnull(),
-                           np.nan,
-                           df.car_parking
-                           .str.split(" ")
-                           .str[1]
-                       )
-               )
+               parking_spots = parking_spots,
+               parking_cover = parking_cover
             )
             .assign(
                 balcony = lambda df:(
@@ -167,7 +92,62 @@ def clean_data(data:pd.DataFrame)->pd.DataFrame:
                 )
             ]
             .drop(columns = ["title","floor","overlooking","car_parking","price"])
-            .drop_duplicates()
+        )
+
+def clean_data(data:pd.DataFrame)->pd.DataFrame:
+    return(
+        clean_rows(data)
+        .drop_duplicates()
+        .dropna(subset = ["transaction","num_bhk","bathroom"])
+        .reset_index()
+    )
+
+def map_partitions(func: Callable, partitions: Iterable[pd.DataFrame], n_workers: int = 1)->Iterator[pd.DataFrame]:
+    if n_workers <= 1:
+        yield from map(func, partitions)
+        return
+
+    # results come back in partition order with at most n_workers partitions queued ahead
+    with ProcessPoolExecutor(max_workers = n_workers) as executor:
+        pending = deque()
+        for partition in partitions:
+            pending.append(executor.submit(func, partition))
+            if len(pending) > n_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def clean_data_in_parallel(data:pd.DataFrame, n_workers: int, partition_size: int)->pd.DataFrame:
+    # partitions keep their row labels so reset_index restores the same 'index' column
+    partitions = (data.iloc[start:start + partition_size] for start in range(0, len(data), partition_size))
+    return(
+        pd.concat(map_partitions(clean_rows, partitions, n_workers))
+        .drop_duplicates()
+        .dropna(subset = ["transaction","num_bhk","bathroom"])
+        .reset_index()
+    )
+
+def clean_data_in_chunks(file_path: Path, chunk_size: int, encoding: str = 'latin1', n_workers: int = 1)->Iterator[pd.DataFrame]:
+    # text columns are pinned to str so every chunk parses like the full file
+    header = pd.read_csv(file_path, encoding = encoding, nrows = 0).columns
+    dtype = {col: str for col in header if normalize_column_name(col) not in NUMERIC_RAW_COLUMNS}
+
+    # fingerprints of every row emitted so far, stands in for a global drop_duplicates
+    seen_rows = set()
+
+    chunks = pd.read_csv(file_path, encoding = encoding, dtype = dtype, chunksize = chunk_size)
+    for cleaned in map_partitions(clean_rows, chunks, n_workers):
+        # a column is int in a chunk without missing values and float in the others, numbers are hashed as floats
+        numeric = cleaned.select_dtypes(include = "number").columns
+        fingerprints = pd.util.hash_pandas_object(cleaned.astype(dict.fromkeys(numeric, float)).astype(str), index = False)
+        is_new = np.fromiter(
+            (fp not in seen_rows and not seen_rows.add(fp) for fp in fingerprints.tolist()),
+            dtype = bool,
+            count = len(fingerprints)
+        )
+        yield(
+            cleaned
+            .loc[is_new]
             .dropna(subset = ["transaction","num_bhk","bathroom"])
             .reset_index()
         )
\ No newline at end of file
@@ -44,4 +44,8 @@ transformer_dict = {
       func=same,
       inverse_func=same
   )
-}
\ No newline at end of file
+}
+
+# the targets are plain arrays whatever the global pandas output config
+for transformer in transformer_dict.values():
+    transformer.set_output(transform="default")
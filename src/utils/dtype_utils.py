@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+from typing import Iterable,List,Optional
+
+def get_category_levels(dfs: Iterable[pd.DataFrame],columns: List[str],max_levels: int,previous: Optional[dict] = None)-> dict:
+    # levels of earlier runs are kept, so records cast with an older dictionary still map to the same values
+    levels = {column: set(values) for column,values in (previous or {}).items()}
+    for df in dfs:
+        for column in columns:
+            levels.setdefault(column,set()).update(df[column].dropna().unique().tolist())
+    # sorted like the factorizations downstream, so ties in group modes resolve the same way
+    return {column: sorted(values) for column,values in levels.items() if len(values) <= max_levels}
+
+def get_float32_columns(dfs: Iterable[pd.DataFrame],columns: List[str],rtol: float)-> List[str]:
+    # columns whose values survive the float32 round trip within rtol (and inside its range)
+    dfs = list(dfs)
+    float32_columns = []
+    for column in columns:
+        exact = True
+        for df in dfs:
+            values = df[column].to_numpy(dtype=float)
+            with np.errstate(over='ignore'):
+                round_trip = values.astype(np.float32).astype(float)
+            if not np.allclose(round_trip,values,rtol=rtol,atol=0,equal_nan=True):
+                exact = False
+                break
+        if exact:
+            float32_columns.append(column)
+    return float32_columns
+
+def get_category_dictionary(dfs: Iterable[pd.DataFrame],schema: dict,target_column: str,max_levels: int,rtol: float,previous: Optional[dict] = None)-> dict:
+    dfs = list(dfs)
+    dtypes = {name: dtype for column in schema["columns"] for name,dtype in column.items()}
+    text_columns = [name for name,dtype in dtypes.items() if dtype == "str"]
+    float_columns = [name for name,dtype in dtypes.items() if dtype == "float" and name != target_column]
+    return {
+        "categories": get_category_levels(dfs,text_columns,max_levels,(previous or {}).get("categories")),
+        "float32_columns": get_float32_columns(dfs,float_columns,rtol)
+    }
+
+def to_compact_dtypes(df: pd.DataFrame,category_dictionary: dict)-> pd.DataFrame:
+    # values missing from the dictionary would turn into nan, so they fail loudly instead
+    casts = {}
+    for column,levels in category_dictionary["categories"].items():
+        if column not in df.columns:
+            continue
+        dtype = pd.CategoricalDtype(levels)
+        if df[column].dtype != dtype:
+            unknown = set(df[column].dropna().unique().tolist()) - set(levels)
+            if unknown:
+                raise ValueError(f"Values {sorted(unknown)[:5]} of column {column} are not in the category dictionary")
+            casts[column] = dtype
+    casts.update({column: "float32" for column in category_dictionary["float32_columns"] if column in df.columns and df[column].dtype != "float32"})
+    return df.astype(casts) if casts else df
@@ -1,276 +1,161 @@
 import numpy as np
 import pandas as pd
-
-# Function to make features in train and test dataframes
-def make_features(df: pd.DataFrame)->pd.DataFrame:
-
-   # Function to bin house sizes
-   def house_size_binner(X):
-
-      return (
-            X.assign(
-                house_size = lambda df: (
-                    np.select(
-                    [
-                        df.num_bhk.between(1,3,inclusive = "left"),
-                        df.num_bhk.between(3,4,inclusive = "left")
-                    ],
-                    ["small","normal"],
-                    default = "big"
-                )
-                ) 
-            )
-        )
-   
-   df = house_size_binner(df)
-   
-   # Function to bin bathroom number
-   def bathroom_num_binner(X):
-
-    return (
-        X.assign(
-               bathroom_num = lambda df: (
-                np.select(
-                [
-                    df.bathroom.between(1,3,inclusive = "left"),
-                    df.bathroom.between(3,4,inclusive = "left")
-                ],
-                ["low","medium"],
-                default = "high"
-              )
-            ) 
-        )
-    )
-   
-   df = bathroom_num_binner(df)
-
-   # Function to check is unfurnished
-   def is_unfurnished(X):
-
-
-    return (
-        X.assign(
-            is_unfurnished = lambda df:(
-                    np.where(
-                      df.furnishing.eq('Unfurnished'),1,0
-                    )
-            )
-        )
-    )
-   
-   df = is_unfurnished(df)
-   
-   # Function to bin floor height
-   def floor_height_binner(X):
-
-
-    return (
-        X.assign(
-            floor_height = lambda df:(
-                    np.select(
-                        [
-                            (df.floor_num.between(0,3, inclusive = "left")),
-                            (df.floor_num.between(3,6, inclusive = "left"))
-                        ],
-                        ["low","medium"],
-                        default = "high"
-                    )
-            )
-        )
-    )
-   
-   df = floor_height_binner(df)
-   
-   # Function to bin building height
-   def building_height_binner(X):
-
-
-    return (
-        X.assign(
-            building_height = lambda df:(
-                np.select(
-                [
-                    (df.num_floors.between(0,5, inclusive = "left")),
-                    (df.num_floors.between(5,13, inclusive = "left"))
-                ],
-                ["short","medium"],
-                default = "tall"
-            )
-            )
-        )
-    )
-   
-   df = building_height_binner(df)
-   
-   # Function to bin cities
-   def city_binner(X):
-    
-
-
-     return (
-        X.assign(
-            city_tier = lambda df:(
-                np.where(
-                    df.location.isin(["mumbai","gurgaon","new-delhi"]),
-                    1,
-                    0
-                )
-            )
-        )
-    )
-   
-   df = city_binner(df)
-   
-   # Function to round balcony to nearest integer
-   def nearest_integer(X):
-
-
-     return (
-        X.assign(
-            balcony = lambda df:(
-                np.round(df.balcony)
-            )
-        )
-     )
-   
-   df = nearest_integer(df)
-   
-   # Function to bin direction
-   def direction_binner(X):
-
-
-
-     return (
-        X.assign(
-            direction_tier = lambda df:(
-                np.where(
-                    df.facing.isin(["North - East","North - West"]),
-                    1,
-                    0
-                )
-            )
-        )
-     )
-   
-   df = direction_binner(df)
-   
-   # Function to check has parking
-   def has_parking(X):
-
-
-    return (
-        X.assign(
-            has_parking = lambda df:(
-                np.select(
-                            [
-                                df.parking_spots.eq(0),
-                                df.parking_spots.eq(1)
-                            ],
-                            ["no parking","single"],
-                            default = "multiple"
-                        )
-            )
-        )
-     )
-   
-   df = has_parking(df)
-   
-   # Function to check effective area
-   def effective_area(X):
-
-
-    return(
-        X
-        .assign(
-            effective_area = lambda df:(
-                np.where(
-                    df.carpet_area.eq(-1),
-                    df.super_area,
-                    df.carpet_area
-                )
-            ),
-            carpet_areamissing = lambda df:(
-                np.where(
-                    df.carpet_area.eq(-1),
-                    1,
-                    0
-                )
-            ),
-            super_areamissing = lambda df:(
-                np.where(
-                    df.super_area.eq(-1),
-                    1,
-                    0
-                )
-            )
-        )
-    )
-   
-   df = effective_area(df)
-
-   # Function to log transform effective area
-   def effective_area_log(X):
-
-
-     return(
-            X
-            .assign(
-                effective_area = lambda df:(
-                    np.log(df.effective_area)
-                )
-            )
-        )
-   
-   df = effective_area_log(df)
-   
-   # Function for area per room
-   def area_per_room(X):
-
-
-    return(
-        X
-        .assign(
-            area_per_room = lambda df:(
-                np.where(
-                    df.carpet_area.eq(-1),
-                    df.super_area/df.num_bhk,
-                    df.carpet_area/df.num_bhk
-                )
-            )
-        )
-    )
-   
-   df = area_per_room(df)
-   
-   # Function for balcony per room
-   def balcony_per_room(X):
-
-
-    return(
-        X
-        .assign(
-            balcony_per_room = lambda df:(
-                df.balcony/df.num_bhk
-            )
-        )
-    )
-   
-   df = balcony_per_room(df)
-   
-   # Function for bathroom per room
-   def bathroom_per_room(X):
-
-    return(
-        X
-        .assign(
-            bathroom_per_room = lambda df:(
-                df.bathroom/df.num_bhk
-            )
-        )
-    )
-   
-   df = bathroom_per_room(df)
-
-   return df
-    
-    
\ No newline at end of file
+from functools import lru_cache
+from dataclasses import dataclass
+from typing import Callable,Dict,Iterable,List,Mapping,Optional,Tuple,Union
+
+TIER_1_CITIES = ["mumbai","gurgaon","new-delhi"]
+TIER_1_DIRECTIONS = ["North - East","North - West"]
+
+@lru_cache(maxsize=None)
+def categorical_dtype(categories: Tuple[str,...])-> pd.CategoricalDtype:
+    return pd.CategoricalDtype(list(categories))
+
+def from_codes(codes: np.ndarray, categories: Tuple[str,...])-> pd.Categorical:
+    # codes are built in range here, so the per call validation (slow on single rows) is skipped
+    return pd.Categorical.from_codes(codes.astype(np.int8),dtype=categorical_dtype(categories),validate=False)
+
+def bin_values(values: np.ndarray, edges: list, labels: list, default: str)-> pd.Categorical:
+    # label i covers [edges[i], edges[i+1]), everything else (nan included) takes the default
+    values = np.asarray(values,dtype=float)
+    conditions = [(values >= low) & (values < high) for low,high in zip(edges[:-1],edges[1:])]
+    # built from codes, the labels are never materialized per row
+    return from_codes(np.select(conditions,range(len(labels)),default=len(labels)),(*labels,default))
+
+def is_in(values: np.ndarray, choices: list)-> np.ndarray:
+    return pd.Series(values,copy=False).isin(choices).to_numpy()
+
+# Feature class
+@dataclass(frozen=True)
+class Feature:
+    name: str
+    inputs: Tuple[str,...]
+    compute: Callable[...,np.ndarray]
+    # intermediates are shared by several features but never returned
+    output: bool = True
+
+# Every feature by name, in the order make_features appends them
+FEATURE_REGISTRY: Dict[str,Feature] = {}
+
+def register_feature(name: str, inputs: List[str], output: bool = True):
+    def decorator(compute: Callable[...,np.ndarray]):
+        FEATURE_REGISTRY[name] = Feature(name,tuple(inputs),compute,output)
+        return compute
+    return decorator
+
+@register_feature("carpet_area_missing",["carpet_area"],output=False)
+def carpet_area_missing(carpet_area):
+    return np.asarray(carpet_area,dtype=float) == -1
+
+@register_feature("area",["carpet_area_missing","super_area","carpet_area"],output=False)
+def area(carpet_area_missing,super_area,carpet_area):
+    return np.where(carpet_area_missing,np.asarray(super_area,dtype=float),np.asarray(carpet_area,dtype=float))
+
+@register_feature("house_size",["num_bhk"])
+def house_size(num_bhk):
+    return bin_values(num_bhk,[1,3,4],["small","normal"],"big")
+
+@register_feature("bathroom_num",["bathroom"])
+def bathroom_num(bathroom):
+    return bin_values(bathroom,[1,3,4],["low","medium"],"high")
+
+@register_feature("is_unfurnished",["furnishing"])
+def is_unfurnished(furnishing):
+    return is_in(furnishing,["Unfurnished"]).astype(np.int64)
+
+@register_feature("floor_height",["floor_num"])
+def floor_height(floor_num):
+    return bin_values(floor_num,[0,3,6],["low","medium"],"high")
+
+@register_feature("building_height",["num_floors"])
+def building_height(num_floors):
+    return bin_values(num_floors,[0,5,13],["short","medium"],"tall")
+
+@register_feature("city_tier",["location"])
+def city_tier(location):
+    return is_in(location,TIER_1_CITIES).astype(np.int64)
+
+# overwrites the input column in place, features that read balcony get the rounded value
+@register_feature("balcony",["balcony"])
+def balcony(balcony):
+    return np.round(np.asarray(balcony,dtype=float))
+
+@register_feature("direction_tier",["facing"])
+def direction_tier(facing):
+    return is_in(facing,TIER_1_DIRECTIONS).astype(np.int64)
+
+@register_feature("has_parking",["parking_spots"])
+def has_parking(parking_spots):
+    parking_spots = np.asarray(parking_spots,dtype=float)
+    return from_codes(np.select([parking_spots == 0,parking_spots == 1],[0,1],default=2),("no parking","single","multiple"))
+
+@register_feature("effective_area",["area"])
+def effective_area(area):
+    return np.log(area)
+
+@register_feature("carpet_areamissing",["carpet_area_missing"])
+def carpet_areamissing(carpet_area_missing):
+    return carpet_area_missing.astype(np.int64)
+
+@register_feature("super_areamissing",["super_area"])
+def super_areamissing(super_area):
+    return (np.asarray(super_area,dtype=float) == -1).astype(np.int64)
+
+@register_feature("area_per_room",["area","num_bhk"])
+def area_per_room(area,num_bhk):
+    return area/np.asarray(num_bhk,dtype=float)
+
+@register_feature("balcony_per_room",["balcony","num_bhk"])
+def balcony_per_room(balcony,num_bhk):
+    return balcony/np.asarray(num_bhk,dtype=float)
+
+@register_feature("bathroom_per_room",["bathroom","num_bhk"])
+def bathroom_per_room(bathroom,num_bhk):
+    return np.asarray(bathroom,dtype=float)/np.asarray(num_bhk,dtype=float)
+
+OUTPUT_FEATURES = [name for name,feature in FEATURE_REGISTRY.items() if feature.output]
+
+def evaluate_features(columns: Mapping[str,np.ndarray], features: Iterable[str])-> dict:
+    # depth first, so every feature runs after its inputs and each one runs at most once
+    values = {}
+    visiting = set()
+
+    def evaluate(name: str)-> np.ndarray:
+        if name not in values:
+            if name in visiting:
+                raise ValueError(f"Feature {name} depends on itself")
+            visiting.add(name)
+            feature = FEATURE_REGISTRY[name]
+            # a feature reading its own name reads the input column it replaces
+            values[name] = feature.compute(*[
+                evaluate(column) if column in FEATURE_REGISTRY and column != name else columns[column]
+                for column in feature.inputs
+            ])
+            visiting.discard(name)
+        return values[name]
+
+    with np.errstate(divide='ignore',invalid='ignore'):
+        return {name: evaluate(name) for name in features}
+
+def select_features(requested: Optional[Iterable[str]] = None)-> List[str]:
+    # names that are not output features (raw columns asked for by a transformer) are ignored
+    if requested is None:
+        return OUTPUT_FEATURES
+    requested = set(requested)
+    return [name for name in OUTPUT_FEATURES if name in requested]
+
+# Function to make features in train and test dataframes or in a single dict row,
+# only the requested features (all of them by default) and what they depend on are computed
+def make_features(data: Union[pd.DataFrame,Mapping], features: Optional[Iterable[str]] = None)-> Union[pd.DataFrame,dict]:
+    features = select_features(features)
+    if isinstance(data,pd.DataFrame):
+        # categorical columns are handed over as Categoricals, their values are never materialized per row
+        values = evaluate_features({name: data[name].array if isinstance(data[name].dtype,pd.CategoricalDtype) else data[name].to_numpy() for name in data.columns},features)
+        # input columns keep their place and dtype (balcony is overwritten in place), new ones are appended
+        columns = {name: values.pop(name) if name in values else data[name].array for name in data.columns}
+        columns.update(values)
+        return pd.DataFrame(columns,index=data.index,copy=False)
+    values = evaluate_features({name: np.array([value]) for name,value in data.items()},features)
+    row = dict(data)
+    row.update({name: value[0] for name,value in values.items()})
+    return row
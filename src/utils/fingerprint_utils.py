@@ -0,0 +1,102 @@
+import json
+import time
+import hashlib
+import threading
+import importlib
+from pathlib import Path
+from dataclasses import fields
+from typing import Iterable,List,Optional
+
+def hash_file(file_path: Path,chunk_size: int = 1024*1024)->str:
+    digest = hashlib.sha256()
+    with open(file_path,"rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size),b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_value(value)->str:
+    return hashlib.sha256(json.dumps(value,sort_keys = True,default = str).encode()).hexdigest()
+
+def code_version(modules: Iterable[str])->str:
+    # the source of every module a stage depends on, so an edit to one stage leaves the others cached
+    digest = hashlib.sha256()
+    for module in sorted(modules):
+        digest.update(module.encode())
+        digest.update(Path(importlib.import_module(module).__file__).read_bytes())
+    return digest.hexdigest()
+
+def stage_fingerprint(stage: str,upstream: List[str],config: dict,modules: Iterable[str])->str:
+    # upstream fingerprints chain the stages, a re-run upstream invalidates everything after it
+    return hash_value({
+        "stage": stage,
+        "upstream": upstream,
+        "config": config,
+        "code": code_version(modules)
+    })
+
+def artifact_to_record(artifact)->dict:
+    # in memory frames are not persisted, downstream stages read the files on a cache hit
+    record = {}
+    for artifact_field in fields(artifact):
+        value = getattr(artifact,artifact_field.name)
+        if isinstance(value,Path):
+            record[artifact_field.name] = {"path": str(value)}
+        elif value is None or isinstance(value,(bool,int,float,str)):
+            record[artifact_field.name] = {"value": value}
+    return record
+
+def artifact_from_record(artifact_class,record: dict):
+    return artifact_class(**{
+        name: Path(item["path"]) if "path" in item else item["value"]
+        for name,item in record.items()
+    })
+
+# StageCache class
+class StageCache:
+    """
+    Manifest of the last successful run of every pipeline stage, a stage is
+    skipped when its fingerprint matches and its recorded outputs are intact
+
+    """
+    def __init__(self,manifest_path: Path):
+        self.manifest_path = Path(manifest_path)
+        self.manifest = json.loads(self.manifest_path.read_text()) if self.manifest_path.exists() else {}
+        self.lock = threading.Lock()
+
+    def save_manifest(self):
+        self.manifest_path.parent.mkdir(parents = True,exist_ok = True)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.manifest,indent = 2))
+        tmp_path.replace(self.manifest_path)
+
+    @staticmethod
+    def outputs_intact(entry: dict)->bool:
+        for file_path,output in entry["outputs"].items():
+            path = Path(file_path)
+            if not path.exists() or path.stat().st_size != output["size"] or hash_file(path) != output["sha256"]:
+                return False
+        return True
+
+    def lookup(self,stage: str,fingerprint: Optional[str])->Optional[dict]:
+        # without a fingerprint (source unreachable) the last recorded run is reused as is
+        with self.lock:
+            entry = self.manifest.get(stage)
+        if entry is None or (fingerprint is not None and entry["fingerprint"] != fingerprint):
+            return None
+        return entry if self.outputs_intact(entry) else None
+
+    def record(self,stage: str,fingerprint: str,artifact):
+        artifact_record = artifact_to_record(artifact)
+        outputs = {
+            item["path"]: {"size": Path(item["path"]).stat().st_size,"sha256": hash_file(item["path"])}
+            for item in artifact_record.values()
+            if "path" in item and Path(item["path"]).is_file()
+        }
+        with self.lock:
+            self.manifest[stage] = {
+                "fingerprint": fingerprint,
+                "artifact": artifact_record,
+                "outputs": outputs,
+                "created": time.time()
+            }
+            self.save_manifest()
@@ -0,0 +1,101 @@
+import warnings
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from scipy import sparse
+from sklearn.base import clone
+from typing import List,Optional,Tuple,Union
+from sklearn.metrics import mean_absolute_error
+from sklearn.exceptions import ConvergenceWarning
+from src.utils.dict_utils import transformer_dict
+
+def take_rows(X: Union[pd.DataFrame,np.ndarray,sparse.csr_matrix],rows: np.ndarray)->Union[np.ndarray,sparse.csr_matrix]:
+    # the values and memory layout cross_val_score hands the estimator (a column major copy for a
+    # frame), so BLAS sums in the same order and the fold scores come out bit for bit the same
+    if sparse.issparse(X):
+        return X[rows]
+    if isinstance(X,pd.DataFrame):
+        return np.asarray(X.iloc[rows])
+    return np.ascontiguousarray(X[rows])
+
+def memmap_array(array: np.ndarray,file_path: Path)->np.ndarray:
+    # written once, every later study, trial and worker process maps the same file read only
+    if not file_path.exists():
+        tmp_path = file_path.with_name(f"{file_path.stem}.tmp.npy")
+        np.save(tmp_path,array)
+        tmp_path.replace(file_path)
+    return np.load(file_path,mmap_mode="r")
+
+# FoldCache class
+class FoldCache:
+    """
+    Fold indices, contiguous fold train/valid matrices and the fold train
+    targets under every target transform, built once per study and shared
+    by all of its trials, memory mapped from cache_dir when one is given,
+    in which case it pickles as that directory and every process that
+    unpickles it (loky trial workers) maps the same files again
+
+    """
+    def __init__(self,X_train: Union[pd.DataFrame,sparse.csr_matrix],y_train: pd.Series,splits: List[Tuple[np.ndarray,np.ndarray]],cache_dir: Optional[Path] = None):
+        X = X_train.tocsr() if sparse.issparse(X_train) else X_train
+        y = np.asarray(y_train)
+        # csr folds stay in memory, only dense ones are memory mapped
+        self.cache_dir = None if cache_dir is None or sparse.issparse(X) else Path(cache_dir)
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True,exist_ok=True)
+
+        def store(array: np.ndarray,name: str):
+            return array if self.cache_dir is None else memmap_array(array,self.cache_dir/f"{name}.npy")
+
+        self.splits,self.X_train_folds,self.X_valid_folds,self.y_valid_folds = [],[],[],[]
+        self.y_train_folds = {name: [] for name in transformer_dict}
+        for fold,(train_rows,valid_rows) in enumerate(splits):
+            train_rows,valid_rows = np.asarray(train_rows),np.asarray(valid_rows)
+            self.splits.append((store(train_rows,f"train_rows_{fold}"),store(valid_rows,f"valid_rows_{fold}")))
+            self.X_train_folds.append(store(take_rows(X,train_rows),f"X_train_{fold}"))
+            self.X_valid_folds.append(store(take_rows(X,valid_rows),f"X_valid_{fold}"))
+            self.y_valid_folds.append(store(y[valid_rows],f"y_valid_{fold}"))
+            for name,transformer in transformer_dict.items():
+                # what TransformedTargetRegressor would fit the regressor on
+                self.y_train_folds[name].append(store(transformer.func(y[train_rows]),f"y_train_{name}_{fold}"))
+
+    def __getstate__(self)->dict:
+        if self.cache_dir is None:
+            return self.__dict__
+        return {"cache_dir": self.cache_dir,"n_folds": len(self)}
+
+    def __setstate__(self,state: dict):
+        if "n_folds" not in state:
+            self.__dict__.update(state)
+            return
+        cache_dir = self.cache_dir = state["cache_dir"]
+
+        def load(name: str)->np.ndarray:
+            return np.load(cache_dir/f"{name}.npy",mmap_mode="r")
+
+        folds = range(state["n_folds"])
+        self.splits = [(load(f"train_rows_{fold}"),load(f"valid_rows_{fold}")) for fold in folds]
+        self.X_train_folds = [load(f"X_train_{fold}") for fold in folds]
+        self.X_valid_folds = [load(f"X_valid_{fold}") for fold in folds]
+        self.y_valid_folds = [load(f"y_valid_{fold}") for fold in folds]
+        self.y_train_folds = {name: [load(f"y_train_{name}_{fold}") for fold in folds] for name in transformer_dict}
+
+    def __len__(self)->int:
+        return len(self.splits)
+
+    def fold(self,fold: int,target_transformer_name: str)->tuple:
+        return (self.X_train_folds[fold],self.y_train_folds[target_transformer_name][fold],self.X_valid_folds[fold],self.y_valid_folds[fold])
+
+def fit_and_score_fold(regressor,target_transformer_name: str,X_fold_train,y_fold_train,X_fold_valid,y_fold_valid)->float:
+    # negative mae of the regressor fitted on the transformed fold targets, a failed fit scores nan
+    # and warns like cross_val_score does with its default error_score
+    try:
+        # searched configurations that stop before converging (small Lasso alphas) are scored like any other
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore",ConvergenceWarning)
+            fitted = clone(regressor).fit(X_fold_train,y_fold_train)
+        y_pred = transformer_dict[target_transformer_name].inverse_func(fitted.predict(X_fold_valid))
+        return -mean_absolute_error(y_fold_valid,y_pred)
+    except Exception as e:
+        warnings.warn(f"Fold fit failed, its score is set to nan: {e!r}")
+        return np.nan
@@ -1,206 +1,218 @@
 import sklearn
 import numpy as np
-from sklearn.pipeline import Pipeline
-from sklearn.impute import SimpleImputer
-from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import FunctionTransformer
+import pandas as pd
+from typing import Dict,List,Tuple
 from sklearn.base import BaseEstimator,TransformerMixin
 
 # Setting sklearn config to pandas
 sklearn.set_config(transform_output='pandas')
 
-def get_imputer_object()-> Pipeline:
-        # Function to rename the columns before putting back into imputation pipeline
-        def prefix_remover(X, prefixes):
-
-            prefix_list = [f"{prefix}__" for prefix in prefixes]
-            new_cols = X.columns
-            
-            for prefix in prefix_list:
-                new_cols = [col.replace(prefix,"") if col.startswith(prefix) else col for col in new_cols]
-
-            return X.rename(
-                columns = dict(zip(X.columns,new_cols))
+# Imputation steps in the order the chained pipeline applied them, later
+# steps see the values filled by earlier ones (num_floors groups by the
+# imputed floor_num)
+IMPUTATION_STEPS = [
+    {"column": "furnishing", "strategy": "group_mode", "group_col": "transaction"},
+    {"column": "floor_num", "strategy": "median"},
+    {"column": "num_floors", "strategy": "group_median", "group_col": "floor_num"},
+    {"column": "balcony", "strategy": "group_median", "group_col": "num_bhk"},
+    {"column": "ownership", "strategy": "most_frequent", "add_indicator": True},
+    {"column": "facing", "strategy": "constant", "fill_value": "Missing", "add_indicator": True},
+    {"column": "overlooking_garden", "strategy": "constant", "fill_value": -1},
+    {"column": "overlooking_mainroad", "strategy": "constant", "fill_value": -1},
+    {"column": "overlooking_pool", "strategy": "constant", "fill_value": -1},
+    {"column": "parking_cover", "strategy": "constant", "fill_value": "No parking"},
+    {"column": "parking_spots", "strategy": "constant", "fill_value": 0},
+    {"column": "carpet_area", "strategy": "constant", "fill_value": -1},
+    {"column": "super_area", "strategy": "constant", "fill_value": -1}
+]
+
+GROUP_STRATEGIES = {
+    "group_median": "median",
+    "group_mode": "mode"
+}
+
+def most_frequent(ser: pd.Series):
+    # ties go to the smallest value, like SimpleImputer and Series.mode
+    counts = ser.value_counts()
+    # categoricals also count the categories that never occur
+    counts = counts[counts > 0]
+    return np.nan if counts.empty else min(counts.index[counts == counts.max()])
+
+def factorize_groups(keys: pd.Series)-> Tuple[np.ndarray,pd.Index]:
+    # missing keys get the -1 code and belong to no group, like groupby's dropna
+    codes,uniques = pd.factorize(keys,sort=True)
+    return codes,pd.Index(uniques)
+
+def group_median(codes: np.ndarray, n_groups: int, values: np.ndarray)-> np.ndarray:
+    values = np.asarray(values,dtype=float)
+    valid = (codes >= 0) & ~np.isnan(values)
+    codes,values = codes[valid],values[valid]
+    order = np.lexsort((values,codes))
+    codes,values = codes[order],values[order]
+    counts = np.bincount(codes,minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    medians = np.full(n_groups,np.nan)
+    present = counts > 0
+    # the mean of the two middle values of every sorted group, one middle value for odd counts
+    lower = starts[present] + (counts[present] - 1)//2
+    upper = starts[present] + counts[present]//2
+    medians[present] = (values[lower] + values[upper])/2
+    return medians
+
+def group_mode(codes: np.ndarray, n_groups: int, values: np.ndarray)-> np.ndarray:
+    # sorted value codes order like the values, so the first of the tied counts is the smallest value
+    value_codes,value_uniques = pd.factorize(values,sort=True)
+    n_values = max(len(value_uniques),1)
+    valid = (codes >= 0) & (value_codes >= 0)
+    pairs,counts = np.unique(codes[valid].astype(np.int64)*n_values + value_codes[valid],return_counts=True)
+    groups,value_codes = pairs//n_values,pairs%n_values
+    order = np.lexsort((value_codes,-counts,groups))
+    groups,value_codes = groups[order],value_codes[order]
+    first = np.r_[True,groups[1:] != groups[:-1]] if len(groups) else np.zeros(0,dtype=bool)
+    value_uniques = np.asarray(value_uniques)
+    modes = np.full(n_groups,np.nan,dtype=object if value_uniques.dtype == object else float)
+    modes[groups[first]] = value_uniques[value_codes[first]]
+    return modes
+
+GROUP_KERNELS = {
+    "median": group_median,
+    "mode": group_mode
+}
+
+def group_lookup(codes: np.ndarray, n_groups: int, values: np.ndarray, estimator: str)-> np.ndarray:
+    # the trailing nan is the fill of keys that were missing or unseen at fit time
+    statistics = GROUP_KERNELS[estimator](codes,n_groups,values)
+    return np.append(statistics,np.array([np.nan],dtype=statistics.dtype))
+
+def fill_from_lookup(values: pd.Series, codes: np.ndarray, lookup: np.ndarray)-> pd.Series:
+    mask = values.isna().to_numpy()
+    if not mask.any():
+        return values
+    if isinstance(values.dtype,pd.CategoricalDtype):
+        # categoricals are filled through their codes, a nan lookup leaves the code at -1
+        filled = values.cat.codes.to_numpy(copy=True)
+        filled[mask] = values.cat.categories.get_indexer(lookup[codes[mask]])
+        return pd.Series(pd.Categorical.from_codes(filled,dtype=values.dtype),index=values.index,name=values.name)
+    filled = values.to_numpy(copy=True)
+    filled[mask] = lookup[codes[mask]]
+    return pd.Series(filled,index=values.index,name=values.name)
+
+def fill_missing(values: pd.Series, statistic)-> pd.Series:
+    # a constant fill has to become a category before a categorical can hold it
+    if isinstance(values.dtype,pd.CategoricalDtype) and not pd.isna(statistic) and statistic not in values.cat.categories:
+        values = values.cat.add_categories([statistic])
+    return values.fillna(statistic)
+
+# GroupAggregateImputer class
+class GroupAggregateImputer(BaseEstimator, TransformerMixin):
+    """
+    Fills every target variable with the median or mode of its group, each
+    group column is factorized once and shared by all its targets
+
+    """
+    def __init__(self, targets: List[dict], add_indicator: bool = False):
+        self.targets = targets
+        self.add_indicator = add_indicator
+
+    def fit(self, X: pd.DataFrame, y = None):
+        self.group_index_: Dict[str,pd.Index] = {}
+        group_codes = {}
+        for group_col in dict.fromkeys(target["group_col"] for target in self.targets):
+            group_codes[group_col],self.group_index_[group_col] = factorize_groups(X[group_col])
+        self.lookups_ = {
+            target["variable"]: group_lookup(
+                group_codes[target["group_col"]],
+                len(self.group_index_[target["group_col"]]),
+                X[target["variable"]].to_numpy(),
+                target["estimator"]
             )
-
-        # imputer to impute bathroom values based on num_bhk
-        class GroupAggregateImputer(BaseEstimator, TransformerMixin):
-
-            def __init__(self,variable,group_col,estimator,add_indicator = False):
-                self.variable = variable
-                self.group_col = group_col
-                self.estimator = estimator
-                self.add_indicator = add_indicator
-
-            def fit(self,X,y = None):
-
-                self.group_medians_ = {}
-                self.group_modes_ = {}
-
-                if self.estimator == "median":
-                        self.group_medians_[self.variable] =  X.groupby(self.group_col)[self.variable].median()
-                        
-                elif self.estimator == "mode":
-                        self.group_modes_[self.variable] =  X.groupby(self.group_col)[self.variable].agg(lambda x: x.mode().iloc[0])
-                    
-                return self
-
-            def transform(self,X):
-                X = X.copy()
-
-                if self.add_indicator:
-                    X = X.assign(**{
-                        f"{self.variable}_missingindicator" : lambda df:(
-                                np.where(
-                                    df[self.variable].isnull(),
-                                    1,0
-                                )
-                            )
-                    })
-
-                if self.estimator == "median":
-                        mask = X[self.variable].isnull()
-                        X.loc[mask,self.variable] = X.loc[mask,self.group_col].map(self.group_medians_[self.variable])
-                        
-                elif self.estimator == "mode":
-                        mask = X[self.variable].isnull()
-                        X.loc[mask,self.variable] = X.loc[mask,self.group_col].map(self.group_modes_[self.variable]) 
-
-                
-                return X
-
-        furnishing_imputer = ColumnTransformer(transformers = [
-            ("furnishing_imputer",GroupAggregateImputer(variable = "furnishing",group_col = "transaction",estimator = "mode"),["furnishing","transaction"])
-        ],remainder = "passthrough")
-
-        furnishing_imputation_pipeline = Pipeline(steps = [
-            ("furnishing_imputer",furnishing_imputer),
-            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["furnishing_imputer","remainder"]}))
-        ])
-
-        floor_num_imputer = ColumnTransformer(transformers = [
-            ("floor_num_imputer",SimpleImputer(strategy = "median"),["floor_num"])
-        ],remainder = "passthrough")
-
-        floor_num_imputation_pipeline = Pipeline(steps = [
-            ("floor_num_imputer",floor_num_imputer),
-            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["floor_num_imputer","remainder"]}))
-        ])
-
-        num_floors_imputer = ColumnTransformer(transformers = [
-            ("num_floors_imputer",GroupAggregateImputer(variable = "num_floors",group_col = "floor_num",estimator = "median"),["num_floors","floor_num"])
-        ],remainder = "passthrough")
-
-        num_floors_imputation_pipeline = Pipeline(steps = [
-            ("num_floors_imputer",num_floors_imputer),
-            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["num_floors_imputer","remainder"]}))
-        ])
-
-        balcony_imputer = ColumnTransformer(transformers = [
-            ("balcony_imputer", GroupAggregateImputer(variable = "balcony",group_col = "num_bhk",estimator = "median"),["balcony","num_bhk"])
-        ],remainder = "passthrough")
-
-        balcony_imputation_pipeline = Pipeline(steps = [
-            ("balcony_imputer",balcony_imputer),
-            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["balcony_imputer","remainder"]}))
-        ])
-
-        ownership_imputer = ColumnTransformer(transformers = [
-            ("ownership_imputer",SimpleImputer(strategy = 'most_frequent',add_indicator = True),["ownership"])
-        ], remainder = "passthrough")
-
-
-        ownership_imputation_pipeline = Pipeline(steps = [
-            ("ownership_imputer",ownership_imputer),
-            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["ownership_imputer","remainder"]}))
-        ])
-
-        facing_imputer = ColumnTransformer(transformers = [
-            ("facing_imputer",SimpleImputer(strategy = 'constant',fill_value = 'Missing',add_indicator = True),["facing"])
-        ], remainder = "passthrough")
-
-        facing_imputation_pipeline = Pipeline(steps = [
-            ("facing_imputer",facing_imputer),
-            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["facing_imputer","remainder"]}))
-        ])
-
-        overlooking_garden_imputer = ColumnTransformer(transformers = [
-            ("overlooking_garden_imputer",SimpleImputer(strategy = 'constant',fill_value = -1),["overlooking_garden"])
-        ], remainder = "passthrough")
-
-        overlooking_garden_imputation_pipeline = Pipeline(steps = [
-            ("overlooking_garden_imputer",overlooking_garden_imputer),
-            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["overlooking_garden_imputer","remainder"]}))
-        ])
-
-        overlooking_mainroad_imputer = ColumnTransformer(transformers = [
-            ("overlooking_mainroad_imputer",SimpleImputer(strategy = 'constant',fill_value = -1),["overlooking_mainroad"])
-        ], remainder = "passthrough")
-
-        overlooking_mainroad_imputation_pipeline = Pipeline(steps = [
-            ("overlooking_mainroad_imputer",overlooking_mainroad_imputer),
-            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["overlooking_mainroad_imputer","remainder"]}))
-        ])
-
-        overlooking_pool_imputer = ColumnTransformer(transformers = [
-            ("overlooking_pool_imputer",SimpleImputer(strategy = 'constant',fill_value = -1),["overlooking_pool"])
-        ], remainder = "passthrough")
-
-        overlooking_pool_imputation_pipeline = Pipeline(steps = [
-            ("overlooking_pool_imputer",overlooking_pool_imputer),
-            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["overlooking_pool_imputer","remainder"]}))
-        ])
-
-        parking_cover_imputer =  ColumnTransformer(transformers = [
-            ("parking_cover_imputer",SimpleImputer(strategy = 'constant',fill_value = "No parking"),["parking_cover"])
-        ],remainder = "passthrough")
-
-        parking_cover_imputation_pipeline = Pipeline(steps = [
-            ("parking_cover_imputer",parking_cover_imputer),
-            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["parking_cover_imputer","remainder"]}))
-        ])
-
-        parking_spots_imputer =  ColumnTransformer(transformers = [
-            ("parking_spots_imputer",SimpleImputer(strategy = 'constant',fill_value = 0),["parking_spots"])
-        ],remainder = "passthrough")
-
-        parking_spots_imputation_pipeline = Pipeline(steps = [
-            ("parking_spots_imputer",parking_spots_imputer),
-            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["parking_spots_imputer","remainder"]}))
-        ])
-
-        carpet_area_imputer =  ColumnTransformer(transformers = [
-            ("carpet_area_imputer",SimpleImputer(strategy = 'constant',fill_value = -1),["carpet_area"])
-        ],remainder = "passthrough")
-
-        carpet_area_imputation_pipeline = Pipeline(steps = [
-            ("carpet_area_imputer",carpet_area_imputer),
-            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["carpet_area_imputer","remainder"]}))
-        ])
-
-        super_area_imputer =  ColumnTransformer(transformers = [
-            ("super_area_imputer",SimpleImputer(strategy = 'constant',fill_value = -1),["super_area"])
-        ],remainder = "passthrough")
-
-        super_area_imputation_pipeline = Pipeline(steps = [
-            ("super_area_imputer",super_area_imputer),
-            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["super_area_imputer","remainder"]}))
-        ])
-
-        imputation_pipeline = Pipeline(steps = [
-            ("furnishing_imputation_pipeline",furnishing_imputation_pipeline),
-            ("floor_num_imputation_pipeline",floor_num_imputation_pipeline),
-            ("num_floors_imputation_pipeline",num_floors_imputation_pipeline),
-            ("balcony_imputation_pipeline",balcony_imputation_pipeline),
-            ("ownership_imputation_pipeline",ownership_imputation_pipeline),
-            ("facing_imputation_pipeline",facing_imputation_pipeline),
-            ("overlooking_garden_imputation_pipeline",overlooking_garden_imputation_pipeline),
-            ("overlooking_mainroad_imputation_pipeline",overlooking_mainroad_imputation_pipeline),
-            ("overlooking_pool_imputation_pipeline",overlooking_pool_imputation_pipeline),
-            ("parking_cover_imputation_pipeline",parking_cover_imputation_pipeline),
-            ("parking_spots_imputation_pipeline",parking_spots_imputation_pipeline),
-            ("carpet_area_imputation_pipeline",carpet_area_imputation_pipeline),
-            ("super_area_imputation_pipeline",super_area_imputation_pipeline)
-        ])
-
-        return imputation_pipeline
+            for target in self.targets
+        }
+        return self
+
+    def transform(self, X: pd.DataFrame)-> pd.DataFrame:
+        group_codes = {group_col: group_index.get_indexer(X[group_col]) for group_col,group_index in self.group_index_.items()}
+        columns = {}
+        for target in self.targets:
+            variable = target["variable"]
+            if self.add_indicator:
+                columns[f"{variable}_missingindicator"] = np.where(X[variable].isnull(),1,0)
+            columns[variable] = fill_from_lookup(X[variable],group_codes[target["group_col"]],self.lookups_[variable])
+        return X.assign(**columns)
+
+# FusedImputer class
+class FusedImputer(BaseEstimator, TransformerMixin):
+    """
+    Learns every fill statistic of the imputation steps in one fit and
+    fills all columns with a single output frame per transform, matching
+    the columns, order and indicators of the chained ColumnTransformers
+
+    """
+    def __init__(self, steps: List[dict] = None):
+        self.steps = steps
+
+    @staticmethod
+    def get_group_codes(group_codes: dict, group_col: str, keys: pd.Series, group_index: pd.Index = None)-> np.ndarray:
+        # one factorization per group column, dropped again whenever a step refills that column
+        if group_col not in group_codes:
+            group_codes[group_col] = factorize_groups(keys) if group_index is None else (group_index.get_indexer(keys),group_index)
+        return group_codes[group_col]
+
+    def fit(self, X: pd.DataFrame, y = None):
+        steps = IMPUTATION_STEPS if self.steps is None else self.steps
+        # only the columns a step reads are copied, filled as the steps go
+        columns = {}
+        group_codes = {}
+        self.statistics_ = []
+        self.indicators_ = []
+        order = list(X.columns)
+        for step in steps:
+            column,strategy = step["column"],step["strategy"]
+            values = columns.get(column,X[column])
+            if strategy in GROUP_STRATEGIES:
+                codes,group_index = self.get_group_codes(group_codes,step["group_col"],columns.get(step["group_col"],X[step["group_col"]]))
+                lookup = group_lookup(codes,len(group_index),values.to_numpy(),GROUP_STRATEGIES[strategy])
+                statistic = (group_index,lookup)
+                columns[column] = fill_from_lookup(values,codes,lookup)
+                step_columns = [column,step["group_col"]]
+            else:
+                statistic = {"median": values.median,"most_frequent": lambda: most_frequent(values)}.get(strategy,lambda: step["fill_value"])()
+                # like SimpleImputer, the indicator only exists when the fit data had missing values
+                if step.get("add_indicator") and values.isna().any():
+                    self.indicators_.append(column)
+                columns[column] = fill_missing(values,statistic)
+                step_columns = [column] + ([f"missingindicator_{column}"] if column in self.indicators_ else [])
+            group_codes.pop(column,None)
+            self.statistics_.append(statistic)
+            # each ColumnTransformer put its own columns first and passed the remainder through
+            order = step_columns + [col for col in order if col not in step_columns]
+        self.steps_ = steps
+        self.feature_names_in_ = np.array(X.columns,dtype=object)
+        self.feature_names_out_ = np.array(order,dtype=object)
+        return self
+
+    def transform(self, X: pd.DataFrame)-> pd.DataFrame:
+        columns = {}
+        group_codes = {}
+        for step,statistic in zip(self.steps_,self.statistics_):
+            column = step["column"]
+            values = columns.get(column,X[column])
+            if step["strategy"] in GROUP_STRATEGIES:
+                group_index,lookup = statistic
+                codes,_ = self.get_group_codes(group_codes,step["group_col"],columns.get(step["group_col"],X[step["group_col"]]),group_index)
+                columns[column] = fill_from_lookup(values,codes,lookup)
+            else:
+                if column in self.indicators_:
+                    columns[f"missingindicator_{column}"] = pd.Series(values.isna().to_numpy().astype(object),index=X.index)
+                columns[column] = fill_missing(values,statistic)
+            group_codes.pop(column,None)
+        return pd.DataFrame({
+            name: columns[name] if name in columns else X[name]
+            for name in self.feature_names_out_
+        },index=X.index)
+
+    def get_feature_names_out(self, input_features = None)-> np.ndarray:
+        return self.feature_names_out_
+
+def get_imputer_object()-> FusedImputer:
+    return FusedImputer(steps=IMPUTATION_STEPS)
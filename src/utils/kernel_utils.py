@@ -0,0 +1,192 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from typing import List,Mapping,Optional,Union
+from sklearn.pipeline import Pipeline,FeatureUnion
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import MinMaxScaler,RobustScaler
+from src.utils.impute_utils import FusedImputer,GROUP_STRATEGIES
+from src.utils.feature_utils import evaluate_features,select_features
+
+# stands in for nan in the python dict lookups, nan never equals itself
+MISSING_KEY = "__missing__"
+# batches up to this size look categories up in python dicts, larger ones go through pd.Index
+SMALL_BATCH = 16
+
+def lookup_key(value):
+    return MISSING_KEY if value is None or (isinstance(value,float) and value != value) else value
+
+# CategoryLookup class
+class CategoryLookup:
+    """
+    Maps values to their row in a lookup table, unknown values map to -1
+
+    """
+    def __init__(self,keys: list):
+        self.index = pd.Index(keys,dtype=object)
+        self.positions = {lookup_key(key): position for position,key in enumerate(keys)}
+
+    def codes(self,values: np.ndarray)->np.ndarray:
+        if len(values) <= SMALL_BATCH:
+            return np.array([self.positions.get(lookup_key(value),-1) for value in values.tolist()],dtype=np.int64)
+        return self.index.get_indexer(pd.Index(values,dtype=object))
+
+def iter_fitted_steps(transformer):
+    yield transformer
+    if isinstance(transformer,Pipeline):
+        for _,step in transformer.steps:
+            yield from iter_fitted_steps(step)
+    elif isinstance(transformer,FeatureUnion):
+        for _,step in transformer.transformer_list:
+            yield from iter_fitted_steps(step)
+
+def known_categories(transformer,column: str)->list:
+    # every category any step of the encoder knows about, in first seen order
+    categories = {}
+    for step in iter_fitted_steps(transformer):
+        for values in getattr(step,"categories_",[]):
+            categories.update((lookup_key(value),value) for value in values)
+        for value in getattr(step,"encoder_dict_",{}).get(column,[]):
+            categories.setdefault(lookup_key(value),value)
+    categories.pop(MISSING_KEY,None)
+    return list(categories.values())
+
+def transform_rows(transformer,column: str,values: list,dtype = None)->np.ndarray:
+    output = transformer.transform(pd.DataFrame({column: pd.Series(values,dtype=dtype)}))
+    return np.asarray(output.toarray() if sparse.issparse(output) else output,dtype=float)
+
+def probe_row(transformer,column: str,value,dtype = None)->Optional[np.ndarray]:
+    # None when the fitted encoder refuses the value (unknown categories without handle_unknown)
+    try:
+        return transform_rows(transformer,column,[value],dtype)
+    except (ValueError,TypeError):
+        return None
+
+# InferenceKernel class
+class InferenceKernel:
+    """
+    Flat, picklable replacement for the fitted imputer, make_features and
+    ColumnTransformer chain, maps raw records or batches straight to the
+    model input matrix with lookup tables and one fused affine transform
+
+    """
+    UNKNOWN_ROW = -2
+    MISSING_ROW = -1
+
+    def __init__(self,imputer: FusedImputer,transformer: ColumnTransformer):
+        self.input_columns = list(imputer.feature_names_in_)
+        self.feature_names = list(transformer.get_feature_names_out())
+        self.features = select_features([column for _,_,columns in transformer.transformers_ for column in columns])
+
+        # imputation, group statistics become python/pandas lookups of their fitted keys
+        self.imputation_steps = []
+        for step,statistic in zip(imputer.steps_,imputer.statistics_):
+            if step["strategy"] in GROUP_STRATEGIES:
+                group_index,lookup = statistic
+                self.imputation_steps.append((step["column"],step["group_col"],CategoryLookup(list(group_index)),lookup))
+            else:
+                self.imputation_steps.append((step["column"],None,None,statistic))
+        self.indicators = list(imputer.indicators_)
+
+        # encoders, every category is pushed through the fitted encoder once, plus a missing and an unknown row
+        self.tables = []
+        affine_columns,affine_positions,weights,offsets = [],[],[],[]
+        position = 0
+        for name,fitted,columns in transformer.transformers_:
+            if name == "remainder" or fitted == "drop":
+                continue
+            column = columns[0]
+            width = len(fitted.get_feature_names_out())
+            if isinstance(fitted,MinMaxScaler):
+                weight,offset = fitted.scale_,fitted.min_
+            elif isinstance(fitted,RobustScaler):
+                weight = 1/fitted.scale_ if fitted.scale_ is not None else np.ones(1)
+                offset = -fitted.center_*weight if fitted.center_ is not None else np.zeros(1)
+            else:
+                categories = known_categories(fitted,column)
+                text = all(isinstance(value,str) for value in categories)
+                dtype = object if text else None
+                table = transform_rows(fitted,column,categories,dtype)
+                missing = probe_row(fitted,column,np.nan,dtype)
+                unknown = probe_row(fitted,column,"__unknown__" if text else np.inf,dtype)
+                # values the encoder refuses have a placeholder row and raise in transform, as sklearn does
+                refused = np.array([row for row,probe in [(self.UNKNOWN_ROW,unknown),(self.MISSING_ROW,missing)] if probe is None],dtype=np.int64)
+                table = np.vstack([
+                    table,
+                    np.full((1,width),np.nan) if unknown is None else unknown,
+                    np.full((1,width),np.nan) if missing is None else missing
+                ])
+                self.tables.append((column,slice(position,position + width),CategoryLookup(categories),table,refused))
+                position += width
+                continue
+            affine_columns.append(column)
+            affine_positions.append(position)
+            weights.append(weight[0])
+            offsets.append(offset[0])
+            position += width
+        self.affine_columns = affine_columns
+        self.affine_positions = np.array(affine_positions,dtype=np.int64)
+        self.weights = np.array(weights,dtype=float)
+        self.offsets = np.array(offsets,dtype=float)
+        self.n_outputs = position
+
+    def impute(self,columns: dict)->dict:
+        for column,group_col,group_lookup,statistic in self.imputation_steps:
+            values = columns[column]
+            mask = pd.isna(values)
+            if column in self.indicators:
+                columns[f"missingindicator_{column}"] = mask.astype(object)
+            if not mask.any():
+                continue
+            values = values.copy()
+            if group_lookup is None:
+                values[mask] = statistic
+            else:
+                # unseen or missing group keys pick the trailing nan of the lookup
+                values[mask] = statistic[group_lookup.codes(columns[group_col][mask])]
+            columns[column] = values
+        return columns
+
+    def transform_columns(self,columns: dict,n_rows: int)->np.ndarray:
+        columns = self.impute(columns)
+        columns.update(evaluate_features(columns,self.features))
+        output = np.empty((n_rows,self.n_outputs))
+        for column,block,lookup,table,refused in self.tables:
+            values = columns[column]
+            if isinstance(values,pd.Categorical):
+                # categoricals are looked up once per category and spread through their codes
+                rows = lookup.codes(np.asarray(values.categories,dtype=object))
+                rows[rows == -1] = self.UNKNOWN_ROW
+                codes = np.append(rows,self.MISSING_ROW)[values.codes]
+            else:
+                codes = lookup.codes(values)
+                missing = pd.isna(values)
+                codes[(codes == -1) & missing] = self.MISSING_ROW
+                codes[(codes == -1) & ~missing] = self.UNKNOWN_ROW
+            if len(refused) and (codes < 0).any():
+                rejected = np.isin(codes,refused)
+                if rejected.any():
+                    raise ValueError(f"Found unknown categories {list(pd.unique(np.asarray(values,dtype=object)[rejected]))} in column {column} during transform")
+            output[:,block] = table[codes]
+        if len(self.affine_columns):
+            inputs = np.column_stack([np.asarray(columns[column],dtype=float) for column in self.affine_columns])
+            output[:,self.affine_positions] = inputs*self.weights + self.offsets
+        return output
+
+    def transform(self,data: Union[pd.DataFrame,Mapping,np.ndarray])->np.ndarray:
+        # a DataFrame, a dict of columns or of scalars (one record), or an array with the input columns in order
+        if isinstance(data,pd.DataFrame):
+            columns = {column: data[column].to_numpy() for column in self.input_columns}
+        elif isinstance(data,np.ndarray):
+            columns = {column: data[:,position] for position,column in enumerate(self.input_columns)}
+        else:
+            # scalars of a single record keep their python types in object arrays, like a DataFrame row would
+            columns = {
+                column: np.array([data[column]],dtype=object) if np.ndim(data[column]) == 0 else np.asarray(data[column])
+                for column in self.input_columns
+            }
+        n_rows = len(columns[self.input_columns[0]])
+        return self.transform_columns(columns,n_rows)
+
+def compile_inference_kernel(imputer: FusedImputer,transformer: ColumnTransformer)->InferenceKernel:
+    return InferenceKernel(imputer,transformer)
@@ -1,18 +1,147 @@
+import json
 import yaml
 import joblib
+import numpy as np
 import pandas as pd
+from scipy import sparse
 from pathlib import Path
-from typing import Union
+from typing import Optional, Union
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 
-def read_data(file_path: Path)-> pd.DataFrame:
-    return pd.read_csv(file_path)
+# File extension of every supported artifact format
+ARTIFACT_FORMATS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "feather": ".feather",
+    # csr matrix plus column names, for the sparse transformed data
+    "npz": ".npz"
+}
+
+# pandas dtype of every type name used in schema.yaml
+SCHEMA_DTYPES = {
+    "float": "float64",
+    "float32": "float32",
+    "int": "int64",
+    "str": "object",
+    "bool": "boolean",
+    "category": "category"
+}
+
+def artifact_file_name(file_name: str, artifact_format: str)-> str:
+    return Path(file_name).with_suffix(ARTIFACT_FORMATS[artifact_format]).name
+
+def get_schema_dtypes(schema: dict)-> dict:
+    return {name: SCHEMA_DTYPES[dtype] for column in schema["columns"] for name, dtype in column.items()}
+
+def read_data(file_path: Path, dtypes: Optional[dict] = None)-> pd.DataFrame:
+    suffix = Path(file_path).suffix
+    if suffix == ARTIFACT_FORMATS["parquet"]:
+        df = pd.read_parquet(file_path)
+    elif suffix == ARTIFACT_FORMATS["feather"]:
+        df = pd.read_feather(file_path)
+    elif suffix == ARTIFACT_FORMATS["npz"]:
+        return read_sparse_data(file_path)
+    else:
+        df = pd.read_csv(file_path)
+    # columnar formats hand missing strings back as None, the imputers only treat nan as missing
+    text_columns = df.select_dtypes(include="object").columns
+    df[text_columns] = df[text_columns].where(df[text_columns].notna(), np.nan)
+    # columnar formats keep their dtypes, csv columns are cast back to the schema
+    return cast_to_dtypes(df, dtypes) if dtypes else df
+
+def cast_to_dtypes(df: pd.DataFrame, dtypes: dict)-> pd.DataFrame:
+    casts = {col: dtype for col, dtype in dtypes.items() if col in df.columns and df[col].dtype != dtype}
+    return df.astype(casts) if casts else df
+
+def is_sparse_frame(df: pd.DataFrame)-> bool:
+    return any(isinstance(dtype, pd.SparseDtype) for dtype in df.dtypes)
+
+def to_sparse_matrix(df: pd.DataFrame)-> sparse.csr_matrix:
+    # dense columns (the target) are stored with the sparse ones, zeros are dropped either way
+    return df.astype(pd.SparseDtype("float64", 0.0)).sparse.to_coo().tocsr()
+
+def read_sparse_data(file_path: Path)-> pd.DataFrame:
+    with np.load(file_path, allow_pickle=False) as arrays:
+        matrix = sparse.csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]), shape=tuple(arrays["shape"]))
+        return pd.DataFrame.sparse.from_spmatrix(matrix, columns=arrays["columns"].tolist())
+
+def save_sparse_data(file_path: Path, df: pd.DataFrame):
+    matrix = to_sparse_matrix(df)
+    # np.savez appends .npz to names without it, the file is written under its own name
+    with open(file_path, "wb") as file:
+        np.savez_compressed(file, data=matrix.data, indices=matrix.indices, indptr=matrix.indptr, shape=np.array(matrix.shape), columns=np.array(df.columns, dtype=str))
+
+def save_data(file_path: Path, df: pd.DataFrame):
+    suffix = Path(file_path).suffix
+    if suffix == ARTIFACT_FORMATS["parquet"]:
+        df.to_parquet(file_path, index=False)
+    elif suffix == ARTIFACT_FORMATS["feather"]:
+        df.reset_index(drop=True).to_feather(file_path)
+    elif suffix == ARTIFACT_FORMATS["npz"]:
+        save_sparse_data(file_path, df)
+    else:
+        df.to_csv(file_path, index=False, header=True)
+
+# ArtifactWriter class
+class ArtifactWriter:
+    """
+    Persists stage outputs, on a background thread when the stages hand
+    their frames over in memory so disk writes stay off the critical path
+
+    """
+    def __init__(self, background: bool = False):
+        self.executor = ThreadPoolExecutor(max_workers=1) if background else None
+        self.pending: list[Future] = []
+        self.error: Optional[BaseException] = None
+
+    @staticmethod
+    def write(file_path: Path, df: pd.DataFrame):
+        Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+        save_data(file_path, df)
+
+    def call(self, func, *args):
+        # tasks after a failed one are skipped, they may rely on its output being on disk
+        if self.error is not None:
+            return
+        try:
+            func(*args)
+        except BaseException as e:
+            self.error = e
+            raise
+
+    def run(self, func, *args):
+        # a single worker runs the tasks in submission order, so a task sees every earlier write on disk
+        if self.executor is None:
+            func(*args)
+        else:
+            self.pending.append(self.executor.submit(self.call, func, *args))
+
+    def save(self, file_path: Path, df: pd.DataFrame):
+        self.run(self.write, file_path, df)
+
+    def wait(self):
+        # joins every queued task, then raises the first failure of the background thread
+        pending, self.pending = self.pending, []
+        wait(pending)
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
 
 def read_yaml_file(file_path: Path)-> dict:
     with open(file_path, 'r') as file:
         return yaml.safe_load(file)
     
+def read_json_file(file_path: Path)-> dict:
+    with open(file_path, 'r') as file:
+        return json.load(file)
+
+def save_json_file(file_path: Path, data: dict):
+    Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(file_path, 'w') as file:
+        json.dump(data, file, indent=2)
+
 def save_joblib_file(file_path: Path, obj: Union[Pipeline, ColumnTransformer]):
     with open(file_path, 'wb') as file:
-        return joblib.dump(obj,file) 
\ No newline at end of file
+        return joblib.dump(obj,file) 
@@ -0,0 +1,86 @@
+import re
+import numpy as np
+import pandas as pd
+from typing import Tuple
+
+# Raw listing columns repeat a small vocabulary of strings, so every parser
+# factorizes the column, runs one precompiled regex over the unique values
+# and takes the parsed components back to the rows by code.
+
+# amounts and areas are both a value and an optional unit after the first space
+VALUE_UNIT_PATTERN = re.compile(r"^(?P<value>[^ ]*)(?: (?P<unit>.*))?$", re.DOTALL)
+FLOOR_PATTERN = re.compile(r"^(?P<floor>.*?)(?:out of(?P<total>.*?)(?:out of.*)?)?$", re.DOTALL)
+PARKING_PATTERN = re.compile(r"^[^ ]*(?: (?P<cover>[^ ]*))?")
+DIGITS_PATTERN = re.compile(r"(\d+)")
+
+# all the units converted to sqft
+AREA_CONVERSION_FACTORS = {
+    "sqft": 1,
+    "sqyrd": 9,
+    "sqm": 10.7639,
+    "marla": 272.25,
+    "kanal": 5445,
+    "ground": 2400,
+    "biswa2": 1350,
+    "aankadam": 75,
+    "acre": 43560,
+    "hectare": 107639,
+    "cent": 435.6,
+    "bigha": 27225
+}
+AREA_UNITS = pd.Index(list(AREA_CONVERSION_FACTORS))
+# the trailing nan is picked up by the -1 code of unknown units
+AREA_FACTORS = np.append(np.array(list(AREA_CONVERSION_FACTORS.values()),dtype = float),np.nan)
+
+def factorize_text(ser: pd.Series)->Tuple[np.ndarray,pd.Series]:
+    codes,uniques = pd.factorize(ser)
+    return codes,pd.Series(uniques,dtype = object)
+
+def take_by_codes(values,codes: np.ndarray)->np.ndarray:
+    # missing rows carry the -1 code and upcast to nan like the row-wise parse would
+    values = np.asarray(values)
+    if (codes == -1).any():
+        values = np.append(values,np.nan)
+    return values[codes]
+
+# convert the values to crores scale
+def parse_amount(ser: pd.Series)->pd.Series:
+    codes,uniques = factorize_text(ser)
+    parts = uniques.str.extract(VALUE_UNIT_PATTERN)
+    value = parts.value.astype(float)
+    amount = np.where(parts.unit.eq("Lac"),value.mul(0.01),value)
+    return pd.Series(take_by_codes(amount,codes),index = ser.index,dtype = float)
+
+def parse_area(ser: pd.Series)->pd.Series:
+    codes,uniques = factorize_text(ser)
+    parts = uniques.str.replace(",","").str.extract(VALUE_UNIT_PATTERN)
+    factors = AREA_FACTORS[AREA_UNITS.get_indexer(parts.unit)]
+    area = pd.to_numeric(parts.value).to_numpy()*factors
+    return pd.Series(take_by_codes(area,codes),index = ser.index,dtype = float)
+
+def parse_floor(ser: pd.Series)->Tuple[np.ndarray,np.ndarray]:
+    codes,uniques = factorize_text(ser)
+    parts = uniques.str.replace("200 out of 200","2 out of 2").str.extract(FLOOR_PATTERN)
+    floor = (
+        parts.floor
+        .str.replace("Ground","0")
+        .str.replace("Lower Basement","0")
+        .str.replace("Upper Basement","0")
+    )
+    # missing floors take the numeric branch, their value is nan either way
+    has_total = np.append(parts.total.notna().to_numpy(),True)[codes]
+    # floors without "out of" keep their text value, exactly as the original np.where did
+    floor_num = np.where(
+        has_total,
+        take_by_codes(pd.to_numeric(floor),codes),
+        take_by_codes(floor.to_numpy(),codes)
+    )
+    num_floors = np.where(has_total,take_by_codes(pd.to_numeric(parts.total),codes),np.nan)
+    return floor_num,num_floors
+
+def parse_car_parking(ser: pd.Series)->Tuple[np.ndarray,np.ndarray]:
+    codes,uniques = factorize_text(ser)
+    parking = uniques.str.replace(",","")
+    spots = pd.to_numeric(parking.str.extract(DIGITS_PATTERN)[0],errors = 'coerce')
+    cover = parking.str.extract(PARKING_PATTERN).cover
+    return take_by_codes(spots,codes),take_by_codes(cover.to_numpy(),codes)
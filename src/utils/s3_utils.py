@@ -0,0 +1,173 @@
+import io
+import time
+import zlib
+import threading
+import pandas as pd
+from collections import deque
+from itertools import islice
+from dataclasses import dataclass
+from typing import Iterable,Iterator,Optional
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import BotoCoreError,ClientError
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# S3 rejects multipart parts under 5 MiB except for the last one
+MIN_PART_SIZE = 5*1024*1024
+
+COMPRESSION_EXTENSIONS = {
+    "gzip": ".gz",
+    "zstd": ".zst"
+}
+
+def infer_compression(key: str)->Optional[str]:
+    for compression,extension in COMPRESSION_EXTENSIONS.items():
+        if key.endswith(extension):
+            return compression
+    return None
+
+def get_compressor(compression: Optional[str]):
+    # one compression stream across all parts, so the uploaded object is a single gzip/zstd frame
+    if compression is None:
+        return None
+    if compression == "gzip":
+        return zlib.compressobj(6,zlib.DEFLATED,31)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("zstd compression requires the zstandard package")
+        return zstandard.ZstdCompressor().compressobj()
+    raise ValueError(f"Unsupported compression: {compression}")
+
+def iter_frame_chunks(df: pd.DataFrame,chunk_rows: int)->Iterator[pd.DataFrame]:
+    # an empty frame still yields one chunk so its header gets written
+    for start in range(0,max(len(df),1),chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+def iter_csv_parts(chunks: Iterable[pd.DataFrame],part_size: int,compression: Optional[str] = None)->Iterator[bytes]:
+    compressor = get_compressor(compression)
+    buffer = bytearray()
+    header = True
+    for chunk in chunks:
+        encoded = chunk.to_csv(index = False,header = header).encode()
+        header = False
+        buffer += compressor.compress(encoded) if compressor else encoded
+        if len(buffer) >= part_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if compressor:
+        buffer += compressor.flush()
+    if buffer or header:
+        yield bytes(buffer)
+
+def upload_parts(client,bucket_name: str,key: str,parts: Iterable[bytes],max_workers: int)->int:
+    upload_id = client.create_multipart_upload(Bucket = bucket_name,Key = key)["UploadId"]
+
+    def upload_part(part_number: int,body: bytes)->dict:
+        response = client.upload_part(
+            Bucket = bucket_name,
+            Key = key,
+            UploadId = upload_id,
+            PartNumber = part_number,
+            Body = body
+        )
+        return {"PartNumber": part_number,"ETag": response["ETag"]}
+
+    try:
+        completed_parts = []
+        # at most max_workers parts are held in memory while they upload
+        with ThreadPoolExecutor(max_workers = max_workers) as executor:
+            pending = deque()
+            for part_number,body in enumerate(parts,start = 1):
+                pending.append(executor.submit(upload_part,part_number,body))
+                if len(pending) >= max_workers:
+                    completed_parts.append(pending.popleft().result())
+            while pending:
+                completed_parts.append(pending.popleft().result())
+
+        client.complete_multipart_upload(
+            Bucket = bucket_name,
+            Key = key,
+            UploadId = upload_id,
+            MultipartUpload = {"Parts": completed_parts}
+        )
+        return len(completed_parts)
+    except Exception:
+        client.abort_multipart_upload(Bucket = bucket_name,Key = key,UploadId = upload_id)
+        raise
+
+# TransferStats class
+@dataclass
+class TransferStats:
+    bytes: int = 0
+    parts: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+    @property
+    def mb_per_s(self)->float:
+        return self.bytes/1e6/self.seconds if self.seconds else 0.0
+
+def iter_object_ranges(client,bucket_name: str,key: str,part_size: int,max_workers: int,max_retries: int,stats: TransferStats,head: Optional[dict] = None)->Iterator[bytes]:
+    start_time = time.perf_counter()
+    head = head or client.head_object(Bucket = bucket_name,Key = key)
+    size,etag = head["ContentLength"],head["ETag"]
+    ranges = [(start,min(start + part_size,size) - 1) for start in range(0,size,part_size)]
+    retries_lock = threading.Lock()
+
+    def fetch_range(byte_range: tuple)->bytes:
+        for attempt in range(max_retries + 1):
+            try:
+                # IfMatch pins every range to the same version of the object
+                return client.get_object(
+                    Bucket = bucket_name,
+                    Key = key,
+                    Range = f"bytes={byte_range[0]}-{byte_range[1]}",
+                    IfMatch = etag
+                )["Body"].read()
+            except (BotoCoreError,ClientError):
+                if attempt == max_retries:
+                    raise
+                with retries_lock:
+                    stats.retries += 1
+                time.sleep(0.1*2**attempt)
+
+    # ranges download ahead of the consumer, at most max_workers at a time, and come back in order
+    with ThreadPoolExecutor(max_workers = max_workers) as executor:
+        remaining = iter(ranges)
+        pending = deque(executor.submit(fetch_range,byte_range) for byte_range in islice(remaining,max_workers))
+        while pending:
+            body = pending.popleft().result()
+            for byte_range in islice(remaining,1):
+                pending.append(executor.submit(fetch_range,byte_range))
+            stats.bytes += len(body)
+            stats.parts += 1
+            stats.seconds = time.perf_counter() - start_time
+            yield body
+
+# ChunkReader class
+class ChunkReader(io.RawIOBase):
+    """
+    Read-only file object over an iterator of byte chunks,
+    lets pd.read_csv parse while later chunks are still downloading
+
+    """
+    def __init__(self,chunks: Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.leftover = memoryview(b"")
+
+    def readable(self)->bool:
+        return True
+
+    def readinto(self,buffer)->int:
+        while not self.leftover:
+            chunk = next(self.chunks,None)
+            if chunk is None:
+                return 0
+            self.leftover = memoryview(chunk)
+        size = min(len(buffer),len(self.leftover))
+        buffer[:size] = self.leftover[:size]
+        self.leftover = self.leftover[size:]
+        return size
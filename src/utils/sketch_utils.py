@@ -0,0 +1,280 @@
+import numpy as np
+import pandas as pd
+from typing import Dict,List,Optional,Tuple
+
+# floor for empty bins so the psi log term stays finite
+PSI_EPSILON = 1e-4
+
+def add_counts(store: Dict[int,int],keys: np.ndarray,counts: Optional[np.ndarray] = None):
+    if counts is None:
+        keys,counts = np.unique(keys,return_counts=True)
+    for key,count in zip(keys.tolist(),counts.tolist()):
+        store[key] = store.get(key,0) + count
+
+def population_stability_index(expected: np.ndarray,actual: np.ndarray)->float:
+    expected = np.maximum(expected,PSI_EPSILON)
+    actual = np.maximum(actual,PSI_EPSILON)
+    return float(np.sum((actual - expected)*np.log(actual/expected)))
+
+# QuantileSketch class
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch (DDSketch), quantiles are within the
+    relative accuracy and merging two sketches just adds bucket counts
+
+    """
+    def __init__(self,relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy)/(1 - relative_accuracy)
+        self.log_gamma = np.log(self.gamma)
+        self.positive: Dict[int,int] = {}
+        self.negative: Dict[int,int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.nulls = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def bucket_keys(self,values: np.ndarray)->np.ndarray:
+        return np.ceil(np.log(values)/self.log_gamma).astype(np.int64)
+
+    def update(self,values: np.ndarray):
+        values = np.asarray(values,dtype=float)
+        nulls = np.isnan(values)
+        self.nulls += int(nulls.sum())
+        values = values[~nulls]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.min = min(self.min,float(values.min()))
+        self.max = max(self.max,float(values.max()))
+        self.zeros += int((values == 0).sum())
+        add_counts(self.positive,self.bucket_keys(values[values > 0]))
+        add_counts(self.negative,self.bucket_keys(-values[values < 0]))
+
+    def merge(self,other: "QuantileSketch"):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches with the same relative accuracy can be merged")
+        for store,other_store in [(self.positive,other.positive),(self.negative,other.negative)]:
+            add_counts(store,np.array(list(other_store),dtype=np.int64),np.array(list(other_store.values()),dtype=np.int64))
+        self.zeros += other.zeros
+        self.count += other.count
+        self.nulls += other.nulls
+        self.min = min(self.min,other.min)
+        self.max = max(self.max,other.max)
+
+    def points(self)->Tuple[np.ndarray,np.ndarray]:
+        # every bucket collapses to the value with the smallest relative error inside it, in ascending order
+        negative_keys = np.array(sorted(self.negative,reverse=True),dtype=np.int64)
+        positive_keys = np.array(sorted(self.positive),dtype=np.int64)
+        values = np.concatenate([
+            -2*self.gamma**negative_keys.astype(float)/(self.gamma + 1),
+            [0.0] if self.zeros else [],
+            2*self.gamma**positive_keys.astype(float)/(self.gamma + 1)
+        ])
+        counts = np.concatenate([
+            [self.negative[key] for key in negative_keys.tolist()],
+            [self.zeros] if self.zeros else [],
+            [self.positive[key] for key in positive_keys.tolist()]
+        ]).astype(np.int64)
+        return values,counts
+
+    def quantile(self,q: np.ndarray)->np.ndarray:
+        values,counts = self.points()
+        if not len(values):
+            return np.full(np.shape(q),np.nan)
+        ranks = np.asarray(q)*(self.count - 1)
+        positions = np.searchsorted(np.cumsum(counts),ranks,side="right")
+        return np.clip(values[np.minimum(positions,len(values) - 1)],self.min,self.max)
+
+    def cdf(self,x: np.ndarray)->np.ndarray:
+        values,counts = self.points()
+        if not self.count:
+            return np.zeros(np.shape(x))
+        cumulative = np.concatenate([[0],np.cumsum(counts)])
+        return cumulative[np.searchsorted(values,x,side="right")]/self.count
+
+    def to_dict(self)->dict:
+        return {
+            "type": "quantile",
+            "relative_accuracy": self.relative_accuracy,
+            "positive": {str(key): count for key,count in sorted(self.positive.items())},
+            "negative": {str(key): count for key,count in sorted(self.negative.items())},
+            "zeros": self.zeros,
+            "count": self.count,
+            "nulls": self.nulls,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None
+        }
+
+    @classmethod
+    def from_dict(cls,data: dict)->"QuantileSketch":
+        sketch = cls(data["relative_accuracy"])
+        sketch.positive = {int(key): count for key,count in data["positive"].items()}
+        sketch.negative = {int(key): count for key,count in data["negative"].items()}
+        sketch.zeros,sketch.count,sketch.nulls = data["zeros"],data["count"],data["nulls"]
+        sketch.min = np.inf if data["min"] is None else data["min"]
+        sketch.max = -np.inf if data["max"] is None else data["max"]
+        return sketch
+
+    def compare(self,reference: "QuantileSketch")->dict:
+        # psi over the reference deciles plus a null bin, ks over the union of both sketches' bucket values
+        edges = np.unique(reference.quantile(np.linspace(0.1,0.9,9)))
+        reference_total,total = reference.count + reference.nulls,self.count + self.nulls
+        expected = np.append(np.diff(np.concatenate([[0],reference.cdf(edges),[1]]))*reference.count,reference.nulls)/max(reference_total,1)
+        actual = np.append(np.diff(np.concatenate([[0],self.cdf(edges),[1]]))*self.count,self.nulls)/max(total,1)
+        grid = np.union1d(self.points()[0],reference.points()[0])
+        return {
+            "psi": population_stability_index(expected,actual),
+            "ks": float(np.abs(self.cdf(grid) - reference.cdf(grid)).max()) if len(grid) else 0.0,
+            "null_ratio": self.nulls/max(total,1),
+            "reference_null_ratio": reference.nulls/max(reference_total,1),
+            "median": float(self.quantile(0.5)),
+            "reference_median": float(reference.quantile(0.5))
+        }
+
+# FrequencySketch class
+class FrequencySketch:
+    """
+    Count-min sketch for text columns, tracks the heaviest values seen so far
+    so their frequencies can be compared without keeping every category.
+    Streaming chunks through update gives the heavy hitters of a single pass,
+    every value is ranked on its running count when it last appears, merging
+    adds the tables exactly but only ranks the two heavy hitter lists, so a
+    value just below the top_k cutoff on both sides can be missed
+
+    """
+    def __init__(self,width: int = 2048,depth: int = 4,top_k: int = 50):
+        self.width = width
+        self.depth = depth
+        self.top_k = top_k
+        self.table = np.zeros((depth,width),dtype=np.int64)
+        self.count = 0
+        self.nulls = 0
+        self.heavy_hitters: List[str] = []
+
+    def rows(self,values: np.ndarray)->np.ndarray:
+        # double hashing derives all depth rows from one 64 bit hash
+        hashes = pd.util.hash_array(np.asarray(values,dtype=object))
+        low,high = hashes & np.uint64(0xFFFFFFFF),hashes >> np.uint64(32)
+        return np.stack([(low + np.uint64(row)*high) % np.uint64(self.width) for row in range(self.depth)]).astype(np.int64)
+
+    def estimate(self,values: List[str])->np.ndarray:
+        if not len(values):
+            return np.zeros(0,dtype=np.int64)
+        return self.table[np.arange(self.depth)[:,None],self.rows(values)].min(axis=0)
+
+    def refresh_heavy_hitters(self,candidates: List[str]):
+        candidates = sorted(set(self.heavy_hitters) | set(candidates))
+        estimates = self.estimate(candidates)
+        order = np.lexsort((candidates,-estimates))[:self.top_k]
+        self.heavy_hitters = [candidates[i] for i in order]
+
+    def update(self,values: pd.Series):
+        codes,uniques = pd.factorize(values)
+        self.nulls += int((codes == -1).sum())
+        counts = np.bincount(codes[codes >= 0],minlength=len(uniques))
+        self.count += int(counts.sum())
+        if not len(uniques):
+            return
+        uniques = [str(value) for value in uniques]
+        for row,columns in enumerate(self.rows(uniques)):
+            np.add.at(self.table[row],columns,counts)
+        self.refresh_heavy_hitters(uniques)
+
+    def merge(self,other: "FrequencySketch"):
+        if (other.width,other.depth) != (self.width,self.depth):
+            raise ValueError("Only sketches with the same width and depth can be merged")
+        self.table += other.table
+        self.count += other.count
+        self.nulls += other.nulls
+        # approximate, see the class docstring
+        self.refresh_heavy_hitters(other.heavy_hitters)
+
+    def to_dict(self)->dict:
+        return {
+            "type": "frequency",
+            "width": self.width,
+            "depth": self.depth,
+            "top_k": self.top_k,
+            "count": self.count,
+            "nulls": self.nulls,
+            "heavy_hitters": self.heavy_hitters,
+            # only the non-empty cells are stored
+            "cells": {str(cell): int(self.table.flat[cell]) for cell in np.flatnonzero(self.table).tolist()}
+        }
+
+    @classmethod
+    def from_dict(cls,data: dict)->"FrequencySketch":
+        sketch = cls(data["width"],data["depth"],data["top_k"])
+        for cell,count in data["cells"].items():
+            sketch.table.flat[int(cell)] = count
+        sketch.count,sketch.nulls,sketch.heavy_hitters = data["count"],data["nulls"],data["heavy_hitters"]
+        return sketch
+
+    def frequencies(self,values: List[str])->np.ndarray:
+        # heavy hitters, then everything else, then nulls
+        total = max(self.count + self.nulls,1)
+        estimates = np.minimum(self.estimate(values),self.count)
+        other = max(self.count - int(estimates.sum()),0)
+        return np.concatenate([estimates,[other,self.nulls]])/total
+
+    def compare(self,reference: "FrequencySketch")->dict:
+        values = sorted(set(self.heavy_hitters) | set(reference.heavy_hitters))
+        return {
+            "psi": population_stability_index(reference.frequencies(values),self.frequencies(values)),
+            "null_ratio": self.nulls/max(self.count + self.nulls,1),
+            "reference_null_ratio": reference.nulls/max(reference.count + reference.nulls,1),
+            "new_heavy_hitters": sorted(set(self.heavy_hitters) - set(reference.heavy_hitters))
+        }
+
+SKETCH_TYPES = {
+    "quantile": QuantileSketch,
+    "frequency": FrequencySketch
+}
+
+# DatasetSketch class
+class DatasetSketch:
+    """
+    One sketch per schema column, built by streaming chunks through update
+    before it is compared or persisted, sketches of separate partitions can
+    be merged, exactly for the numeric columns and the text column counts
+    and approximately for the text column heavy hitters
+
+    """
+    def __init__(self,sketches: Dict[str,object]):
+        self.sketches = sketches
+
+    @classmethod
+    def from_schema(cls,schema: dict,relative_accuracy: float = 0.01,width: int = 2048,depth: int = 4,top_k: int = 50)->"DatasetSketch":
+        return cls({
+            name: QuantileSketch(relative_accuracy) if dtype in ("float","float32","int") else FrequencySketch(width,depth,top_k)
+            for column in schema["columns"] for name,dtype in column.items()
+        })
+
+    def update(self,df: pd.DataFrame):
+        for name,sketch in self.sketches.items():
+            if name in df.columns:
+                sketch.update(df[name].to_numpy(dtype=float) if isinstance(sketch,QuantileSketch) else df[name])
+
+    def merge(self,other: "DatasetSketch"):
+        for name,sketch in self.sketches.items():
+            sketch.merge(other.sketches[name])
+
+    def to_dict(self)->dict:
+        return {name: sketch.to_dict() for name,sketch in self.sketches.items()}
+
+    @classmethod
+    def from_dict(cls,data: dict)->"DatasetSketch":
+        return cls({name: SKETCH_TYPES[sketch["type"]].from_dict(sketch) for name,sketch in data.items()})
+
+    def compare(self,reference: "DatasetSketch",psi_threshold: float,ks_threshold: float)->dict:
+        columns = {}
+        for name,sketch in self.sketches.items():
+            if name not in reference.sketches or type(reference.sketches[name]) is not type(sketch):
+                continue
+            metrics = sketch.compare(reference.sketches[name])
+            metrics["drift"] = metrics["psi"] > psi_threshold or metrics.get("ks",0.0) > ks_threshold
+            columns[name] = metrics
+        drifted = [name for name,metrics in columns.items() if metrics["drift"]]
+        return {"drift_detected": bool(drifted),"drifted_columns": drifted,"columns": columns}
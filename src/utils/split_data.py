@@ -1,12 +1,46 @@
 import numpy as np
 import pandas as pd
-from zlib import crc32
-from typing import Tuple
+from typing import List, Sequence, Tuple, Union
 
-def test_set_check(identifier: int, test_ratio: float)->bool:
-    return crc32(np.int64(identifier)) & 0xffffffff < test_ratio * 2**32
+def _make_crc32_table()->np.ndarray:
+    table = np.arange(256, dtype=np.uint32)
+    for _ in range(8):
+        table = np.where(table & 1, (table >> 1) ^ np.uint32(0xEDB88320), table >> 1)
+    return table.astype(np.uint32)
 
-def train_test_split(df: pd.DataFrame, test_ratio: float, id_col: str = "index")->Tuple[pd.DataFrame, pd.DataFrame]:
-    ids = df[id_col]
-    in_test_set = ids.apply(lambda id_: test_set_check(id_, test_ratio))
-    return df.loc[~in_test_set],df.loc[in_test_set]
\ No newline at end of file
+CRC32_TABLE = _make_crc32_table()
+
+def crc32_rows(data: np.ndarray)->np.ndarray:
+    # table-driven zlib crc32 over every row of an (n, nbytes) uint8 matrix at once
+    crc = np.full(len(data), 0xFFFFFFFF, dtype=np.uint32)
+    for column in data.T:
+        crc = CRC32_TABLE[(crc ^ column) & 0xFF] ^ (crc >> 8)
+    return crc ^ np.uint32(0xFFFFFFFF)
+
+def hash_ids(df: pd.DataFrame, id_col: Union[str, List[str]] = "index")->np.ndarray:
+    # integer keys hash to zlib.crc32 of their int64 bytes like the original split, other keys hash their 64 bit pandas hash
+    id_cols = [id_col] if isinstance(id_col, str) else list(id_col)
+    key_bytes = [
+        np.ascontiguousarray(
+            df[col].to_numpy().astype("<i8")
+            if pd.api.types.is_integer_dtype(df[col])
+            else pd.util.hash_array(df[col].to_numpy()).astype("<u8")
+        ).view(np.uint8).reshape(len(df), 8)
+        for col in id_cols
+    ]
+    return crc32_rows(np.hstack(key_bytes))
+
+def hash_split(df: pd.DataFrame, ratios: Sequence[float], id_col: Union[str, List[str]] = "index")->List[pd.DataFrame]:
+    # bucket i takes the hashes in [sum(ratios[:i]), sum(ratios[:i+1])) * 2**32
+    if not np.isclose(sum(ratios), 1):
+        raise ValueError(f"Split ratios must sum to 1, got {list(ratios)}")
+    edges = np.cumsum(ratios)[:-1] * 2**32
+    buckets = np.searchsorted(edges, hash_ids(df, id_col), side="right")
+    return [df.loc[buckets == bucket] for bucket in range(len(ratios))]
+
+def hash_folds(df: pd.DataFrame, n_folds: int, id_col: Union[str, List[str]] = "index")->np.ndarray:
+    return ((hash_ids(df, id_col).astype(np.uint64) * n_folds) >> 32).astype(np.int64)
+
+def train_test_split(df: pd.DataFrame, test_ratio: float, id_col: Union[str, List[str]] = "index")->Tuple[pd.DataFrame, pd.DataFrame]:
+    test_df, train_df = hash_split(df, [test_ratio, 1 - test_ratio], id_col)
+    return train_df, test_df
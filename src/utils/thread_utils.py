@@ -0,0 +1,40 @@
+from joblib import cpu_count
+from typing import Dict,NamedTuple,Optional
+
+# regressors that split their own work over n_jobs threads
+THREADED_REGRESSORS = {"XGBRegressor","RandomForestRegressor","KNeighborsRegressor"}
+# regressors whose fits run in BLAS, its thread pools are the only parallelism they have
+BLAS_REGRESSORS = {"LinearRegression","Ridge","Lasso"}
+
+# ThreadLayout class
+class ThreadLayout(NamedTuple):
+    """
+    How a core budget is split between folds fitted in parallel and the
+    threads each fold's estimator (and its BLAS/OpenMP pools) may use
+
+    """
+    fold_jobs: int
+    estimator_threads: int
+
+    @property
+    def cores(self)->int:
+        return self.fold_jobs*self.estimator_threads
+
+# the old behavior, every level asks for all cores
+UNBOUNDED_LAYOUT = ThreadLayout(fold_jobs=-1,estimator_threads=-1)
+
+def get_core_budget(n_cores: Optional[int] = None,n_workers: int = 1)->int:
+    # cores per trial worker, the machine's usable cores (cgroup and affinity aware) when not set
+    n_cores = n_cores or cpu_count()
+    return max(1,n_cores//max(1,n_workers))
+
+def get_thread_layout(regressor_name: str,n_cores: int,kfold_nsplits: int)->ThreadLayout:
+    # folds are independent, so they get the cores first, leftovers go to the estimator
+    # when there are more cores than folds and only if the estimator can use them
+    fold_jobs = max(1,min(kfold_nsplits,n_cores))
+    if regressor_name in THREADED_REGRESSORS or regressor_name in BLAS_REGRESSORS:
+        return ThreadLayout(fold_jobs=fold_jobs,estimator_threads=max(1,n_cores//fold_jobs))
+    return ThreadLayout(fold_jobs=fold_jobs,estimator_threads=1)
+
+def get_thread_layouts(regressor_names,n_cores: int,kfold_nsplits: int)->Dict[str,ThreadLayout]:
+    return {name: get_thread_layout(name,n_cores,kfold_nsplits) for name in regressor_names}
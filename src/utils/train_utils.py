@@ -1,27 +1,229 @@
 import optuna
-import warnings
+import hashlib
 import numpy as np
 import pandas as pd
+from pathlib import Path
+from scipy import sparse
 from src.utils import *
-from typing import Tuple
+from joblib import Parallel,delayed,parallel_config
+from threadpoolctl import threadpool_limits
+from functools import partial
+from typing import List,Optional,Sequence,Tuple,Union
+from optuna.trial import TrialState
+from optuna.study import MaxTrialsCallback
+from src.utils.split_data import hash_ids
+from src.utils.fold_utils import FoldCache,fit_and_score_fold
+from src.utils.fingerprint_utils import code_version
+from src.utils.thread_utils import UNBOUNDED_LAYOUT,get_core_budget,get_thread_layout
+from sklearn.pipeline import Pipeline
 from xgboost import XGBRegressor
 from sklearn.neighbors import KNeighborsRegressor
 from sklearn.preprocessing import FunctionTransformer
 from sklearn.compose import TransformedTargetRegressor
-from sklearn.model_selection import cross_val_score,KFold
+from sklearn.model_selection import KFold
 from sklearn.linear_model import LinearRegression,Lasso,Ridge
 from sklearn.ensemble import RandomForestRegressor,AdaBoostRegressor,GradientBoostingRegressor
 
-# Ignore warnings
-warnings.filterwarnings('ignore')
+REGRESSOR_NAMES = ["XGBRegressor","LinearRegression","Ridge","Lasso","KNeighborsRegressor","RandomForestRegressor","AdaBoostRegressor","GradientBoostingRegressor"]
 
-def train_model(X_train: pd.DataFrame,y_train: pd.Series,kfold_nsplits: int, optuna_ntrials: int)->Tuple[TransformedTargetRegressor,dict]:
+# regressors that fit csr matrices directly, the others get a dense copy in front of them
+SPARSE_REGRESSORS = {"XGBRegressor","LinearRegression","Ridge","Lasso"}
+
+def densify(X):
+    return X.toarray() if sparse.issparse(X) else X
+
+def with_input_format(regressor_name: str,regressor,sparse_input: bool):
+    if not sparse_input or regressor_name in SPARSE_REGRESSORS:
+        return regressor
+    to_dense = FunctionTransformer(func=densify,accept_sparse=True).set_output(transform="default")
+    return Pipeline(steps=[("densify",to_dense),("regressor",regressor)])
+
+# trials that count towards the study budget, stale running trials of a crashed worker do not
+FINISHED_STATES = (TrialState.COMPLETE,TrialState.PRUNED)
+
+def get_study_storage(storage_path: Optional[str]):
+    # .db/.sqlite files go to sqlite with heartbeats, anything else to a journal file that
+    # workers on several machines can share over a network filesystem
+    if storage_path is None:
+        return None
+    storage_path = Path(storage_path)
+    storage_path.parent.mkdir(parents=True,exist_ok=True)
+    if storage_path.suffix in {".db",".sqlite"}:
+        return optuna.storages.RDBStorage(
+            f"sqlite:///{storage_path}",
+            heartbeat_interval=60,
+            grace_period=180,
+            failed_trial_callback=optuna.storages.RetryFailedTrialCallback(max_retry=1)
+        )
+    return optuna.storages.JournalStorage(
+        optuna.storages.journal.JournalFileBackend(str(storage_path),lock_obj=optuna.storages.journal.JournalFileOpenLock(str(storage_path)))
+    )
+
+def create_study(study_name: str,storage_path: Optional[str],sampler: optuna.samplers.BaseSampler,pruner: Optional[optuna.pruners.BasePruner] = None,fresh: bool = False)->optuna.Study:
+    # a stored study is resumed, unless a fresh one is asked for, then its earlier trials are deleted first
+    storage = get_study_storage(storage_path)
+    if fresh and storage is not None and study_name in optuna.get_all_study_names(storage):
+        optuna.delete_study(study_name=study_name,storage=storage)
+    return optuna.create_study(study_name=study_name,storage=storage,sampler=sampler,pruner=pruner,direction="maximize",load_if_exists=True)
+
+def get_study_name(study_name: str,X_train: Union[pd.DataFrame,sparse.csr_matrix],y_train: pd.Series,kfold_nsplits: int,regressor_names: Sequence[str] = tuple(REGRESSOR_NAMES))->str:
+    # trials only carry over between runs on the same data, folds and search space
+    digest = hashlib.sha256()
+    if sparse.issparse(X_train):
+        for array in (X_train.data,X_train.indices,X_train.indptr):
+            digest.update(np.ascontiguousarray(array).tobytes())
+    else:
+        digest.update(pd.util.hash_pandas_object(X_train,index=False).to_numpy().tobytes())
+        digest.update(",".join(map(str,X_train.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(pd.Series(np.asarray(y_train)),index=False).to_numpy().tobytes())
+    digest.update(f"{kfold_nsplits}:{','.join(regressor_names)}:{code_version([__name__])}".encode())
+    return f"{study_name}-{digest.hexdigest()[:12]}"
+
+def get_pruner(pruner_name: str,n_startup_trials: int,percentile: float)->optuna.pruners.BasePruner:
+    # trials report their running mean fold score, one step per fold
+    if pruner_name == "median":
+        return optuna.pruners.MedianPruner(n_startup_trials=n_startup_trials)
+    if pruner_name == "percentile":
+        return optuna.pruners.PercentilePruner(percentile,n_startup_trials=n_startup_trials)
+    if pruner_name == "successive_halving":
+        return optuna.pruners.SuccessiveHalvingPruner(min_resource=1,reduction_factor=3)
+    if pruner_name == "none":
+        return optuna.pruners.NopPruner()
+    raise ValueError(f"Unknown pruner {pruner_name}, expected one of median, percentile, successive_halving, none")
+
+def score_folds(regressor,target_transformer_name: str,folds: FoldCache,fold_jobs: int,trial: Optional[optuna.Trial] = None)->np.ndarray:
+    # folds run fold_jobs at a time but come back in fold order, the pruner sees the running mean after every
+    # fold, the fold scores themselves are the ones cross_val_score gives for a TransformedTargetRegressor
+    pruned_at = []
+
+    def fold_tasks():
+        # dispatched lazily, so a pruned trial only waits for the folds already running and the
+        # workers are never torn down mid study
+        for fold in range(len(folds)):
+            if pruned_at:
+                return
+            yield delayed(fit_and_score_fold)(regressor,target_transformer_name,*folds.fold(fold,target_transformer_name))
+
+    scores = []
+    for score in Parallel(n_jobs=fold_jobs,return_as="generator",pre_dispatch="n_jobs")(fold_tasks()):
+        if pruned_at:
+            continue
+        scores.append(score)
+        # nothing is reported while every fold so far failed, a later failure turns the running mean nan
+        # like it turns the cross_val_score mean nan
+        if trial is not None and not np.isnan(scores).all():
+            trial.report(np.mean(scores),step=len(scores))
+            if trial.should_prune():
+                pruned_at.append(len(scores))
+    if pruned_at:
+        raise optuna.TrialPruned(f"Pruned after {pruned_at[0]} of {len(folds)} folds")
+    if np.isnan(scores).all():
+        raise ValueError(f"All {len(scores)} fold fits failed")
+    return np.array(scores)
+
+def count_finished_trials(study: optuna.Study)->int:
+    return len(study.get_trials(deepcopy=False,states=FINISHED_STATES))
+
+def run_study_worker(
+    objective,
+    study_name: str,
+    storage_path: Optional[str],
+    optuna_ntrials: int,
+    study: Optional[optuna.Study] = None,
+    seed: Optional[int] = None,
+    pruner: Optional[optuna.pruners.BasePruner] = None
+):
+    # every worker attaches to the shared study and stops once the study as a whole has its trials
+    study = study or optuna.load_study(study_name=study_name,storage=get_study_storage(storage_path),sampler=optuna.samplers.TPESampler(seed=seed),pruner=pruner)
+    remaining = optuna_ntrials - count_finished_trials(study)
+    if remaining > 0:
+        study.optimize(objective,n_trials=remaining,callbacks=[MaxTrialsCallback(optuna_ntrials,states=FINISHED_STATES)])
+
+def subsample_rows(X_train: Union[pd.DataFrame,sparse.csr_matrix],fraction: float)->np.ndarray:
+    # rows are picked by the hash of their values (their position for csr input), so a run picks the same
+    # rows every time and each subsample contains the smaller ones
+    if sparse.issparse(X_train):
+        hashes = hash_ids(pd.DataFrame({"row": np.arange(X_train.shape[0])}),"row")
+    else:
+        hashes = hash_ids(X_train,list(X_train.columns))
+    return np.flatnonzero(hashes < fraction*2**32)
+
+def race_regressor_families(
+    objective,
+    X_train: Union[pd.DataFrame,sparse.csr_matrix],
+    y_train: pd.Series,
+    kfold_nsplits: int,
+    fractions: Sequence[float],
+    trials_per_family: int,
+    keep_ratio: float,
+    study_name: str,
+    storage_path: Optional[str] = None,
+    seed: Optional[int] = None,
+    fold_cache_dir: Optional[str] = None,
+    fresh_study: bool = False
+)->List[str]:
+    # successive halving over the regressor families, each rung gives every surviving family a few random
+    # configurations on a growing subsample and keeps the best keep_ratio of them by their best score
+    families = list(REGRESSOR_NAMES)
+    for rung,fraction in enumerate(fractions):
+        if not 0 < fraction <= 1:
+            raise ValueError(f"Racing fractions must be in (0, 1], got {fraction}")
+        rows = subsample_rows(X_train,fraction)
+        if len(rows) < kfold_nsplits:
+            # too few rows to split into the folds, the rung is skipped and its families carry over
+            continue
+        X_rung = X_train[rows] if sparse.issparse(X_train) else X_train.iloc[rows]
+        y_rung = y_train.iloc[rows]
+        splits = list(KFold(n_splits = kfold_nsplits, shuffle = True, random_state = 42).split(X_rung))
+        rung_name = get_study_name(f"{study_name}-race{rung}",X_rung,y_rung,kfold_nsplits)
+        folds = FoldCache(X_rung,y_rung,splits,None if fold_cache_dir is None else Path(fold_cache_dir)/rung_name)
+        scores = {}
+        for family in families:
+            # one study per family and rung, so an interrupted race resumes where it stopped, families are ranked
+            # on complete trials only so none is pruned (optuna would otherwise default to a median pruner)
+            family_study = create_study(f"{rung_name}-{family}",storage_path,optuna.samplers.RandomSampler(seed=seed),optuna.pruners.NopPruner(),fresh_study)
+            run_study_worker(partial(objective,folds=folds,families=[family]),family_study.study_name,storage_path,trials_per_family,family_study)
+            values = [trial.value for trial in family_study.get_trials(deepcopy=False,states=(TrialState.COMPLETE,))]
+            scores[family] = max(values) if values else -np.inf
+        survivors = set(sorted(families,key=scores.get,reverse=True)[:max(1,int(np.ceil(len(families)*keep_ratio)))])
+        families = [family for family in families if family in survivors]
+    return families
+
+def train_model(
+    X_train: Union[pd.DataFrame,sparse.csr_matrix],
+    y_train: pd.Series,
+    kfold_nsplits: int,
+    optuna_ntrials: int,
+    study_name: str = "regressor-search",
+    storage_path: Optional[str] = None,
+    n_workers: int = 1,
+    n_cores: Optional[int] = None,
+    thread_budget: bool = True,
+    seed: Optional[int] = None,
+    pruner: Optional[optuna.pruners.BasePruner] = None,
+    racing_fractions: Sequence[float] = (),
+    racing_trials_per_family: int = 3,
+    racing_keep_ratio: float = 0.5,
+    fold_cache_dir: Optional[str] = None,
+    fresh_study: bool = False
+)->Tuple[TransformedTargetRegressor,dict]:
+            sparse_input = sparse.issparse(X_train)
+            if n_workers > 1 and storage_path is None:
+                raise ValueError("Parallel trial workers need a study storage path to share the study")
+            if n_workers > 1 and fold_cache_dir is None:
+                # workers get the memory mapped fold cache as its directory instead of a copy of every fold array
+                fold_cache_dir = str(Path(storage_path).parent/"fold_cache")
+            # every trial worker gets its share of the cores, split between folds and estimator threads per regressor
+            core_budget = get_core_budget(n_cores,n_workers)
+            splits = list(KFold(n_splits = kfold_nsplits, shuffle = True, random_state = 42).split(X_train))
+            # folds and transformed targets are built once here, every trial and worker reuses them
+            fold_cache = FoldCache(X_train,y_train,splits,None if fold_cache_dir is None else Path(fold_cache_dir)/get_study_name("folds",X_train,y_train,kfold_nsplits))
+            pruner = pruner or optuna.pruners.NopPruner()
               
-            def objective(trial):
-                regressor_name = trial.suggest_categorical(
-                     "regressor",
-                     ["XGBRegressor","LinearRegression","Ridge","Lasso","KNeighborsRegressor","RandomForestRegressor","AdaBoostRegressor","GradientBoostingRegressor"]
-                )
+            def objective(trial,folds=fold_cache,families=REGRESSOR_NAMES):
+                regressor_name = trial.suggest_categorical("regressor",families)
+                layout = get_thread_layout(regressor_name,core_budget,kfold_nsplits) if thread_budget else UNBOUNDED_LAYOUT
+                trial.set_user_attr("thread_layout",layout._asdict())
                 if regressor_name == "XGBRegressor":
                     n_estimators = trial.suggest_int("n_estimators", 50, 300)
                     learning_rate = trial.suggest_float("learning_rate", 0.001, 0.3, log=True)
@@ -34,13 +236,13 @@ def train_model(X_train: pd.DataFrame,y_train: pd.Series,kfold_nsplits: int, opt
                         max_depth=max_depth,
                         subsample=subsample,
                         colsample_bytree=colsample_bytree,
-                        n_jobs=-1
+                        n_jobs=layout.estimator_threads
                     )
                 elif regressor_name == "LinearRegression":
                     fit_intercept = trial.suggest_categorical("fit_intercept", [True, False])
                     regressor = LinearRegression(
                         fit_intercept=fit_intercept,
-                        n_jobs=-1
+                        n_jobs=layout.estimator_threads
                 )
                 elif regressor_name == "Ridge":
                     alpha = trial.suggest_float("alpha", 0.0001, 10.0, log=True)
@@ -64,7 +266,7 @@ def train_model(X_train: pd.DataFrame,y_train: pd.Series,kfold_nsplits: int, opt
                         n_neighbors=n_neighbors,
                         weights=weights,
                         p=p,
-                        n_jobs=-1
+                        n_jobs=layout.estimator_threads
                     )
                 elif regressor_name == "RandomForestRegressor":
                     n_estimators = trial.suggest_int("n_estimators", 50, 300)
@@ -76,7 +278,7 @@ def train_model(X_train: pd.DataFrame,y_train: pd.Series,kfold_nsplits: int, opt
                         max_depth=max_depth,
                         min_samples_split=min_samples_split,
                         max_features=max_features,
-                        n_jobs=-1
+                        n_jobs=layout.estimator_threads
                     )
                 elif regressor_name == "AdaBoostRegressor":
                     n_estimators = trial.suggest_int("n_estimators", 50, 300)
@@ -109,62 +311,54 @@ def train_model(X_train: pd.DataFrame,y_train: pd.Series,kfold_nsplits: int, opt
                         ["log","cbrt","sqrt","same"]
                 )
 
-                if target_transformer_name == "log":
-                    transformer = FunctionTransformer(
-                        func=np.log,
-                        inverse_func=np.exp
-                )
-                
-                elif target_transformer_name == "cbrt":
-                    transformer = FunctionTransformer(
-                        func=np.cbrt,
-                        inverse_func=lambda x:x**3
-                )
-        
-                elif target_transformer_name == "sqrt":
-                    transformer = FunctionTransformer(
-                        func=np.sqrt,
-                        inverse_func=lambda x:x**2
-                )
-        
-                elif target_transformer_name == "same":
-                    transformer = FunctionTransformer(
-                        func=lambda x:x,
-                        inverse_func=lambda x:x
-                )
-                        
-                model = TransformedTargetRegressor(
-                    regressor=regressor,
-                    transformer=transformer
-                )
-                
-                cv = KFold(n_splits = kfold_nsplits, shuffle = True, random_state = 42)
+                # the fold cache holds the targets under every transform, the regressor is fitted on them directly
+                regressor = with_input_format(regressor_name,regressor,sparse_input)
 
-                scores = cross_val_score(
-                        model,X_train,y_train,
-                        scoring = "neg_mean_absolute_error",
-                        cv = cv,
-                        n_jobs = -1
-                )
+                if thread_budget:
+                    # fold workers and this process both have their BLAS/OpenMP pools pinned to the estimator threads
+                    with parallel_config(backend="loky",inner_max_num_threads=layout.estimator_threads),threadpool_limits(limits=layout.estimator_threads):
+                        scores = score_folds(regressor,target_transformer_name,folds,layout.fold_jobs,trial)
+                else:
+                    scores = score_folds(regressor,target_transformer_name,folds,layout.fold_jobs,trial)
 
                 mean_score = np.mean(scores)
                 return mean_score
             
-            study = optuna.create_study(direction="maximize")
-            study.optimize(objective, n_trials=optuna_ntrials)
+            # the full data search only samples the families that survive the race on subsamples
+            families = race_regressor_families(
+                objective,X_train,y_train,kfold_nsplits,
+                racing_fractions,racing_trials_per_family,racing_keep_ratio,
+                study_name,storage_path,seed,fold_cache_dir,fresh_study
+            )
+            objective = partial(objective,families=families)
+            # an interrupted run finds its finished trials in the storage and only runs the rest
+            study_name = get_study_name(study_name,X_train,y_train,kfold_nsplits,families)
+            study = create_study(study_name,storage_path,optuna.samplers.TPESampler(seed=seed),pruner,fresh_study)
+            if n_workers > 1:
+                # each worker process is capped at its own core budget, the objective pickles with the fold cache
+                # directory and no data, every worker maps the fold files again (csr folds are still copied)
+                Parallel(n_jobs=n_workers,backend="loky",inner_max_num_threads=core_budget if thread_budget else None)(
+                    delayed(run_study_worker)(objective,study_name,storage_path,optuna_ntrials,seed=None if seed is None else seed + worker,pruner=pruner)
+                    for worker in range(n_workers)
+                )
+                study = optuna.load_study(study_name=study_name,storage=get_study_storage(storage_path),pruner=pruner)
+            else:
+                run_study_worker(objective,study_name,storage_path,optuna_ntrials,study)
 
             best_params = study.best_params
 
             regressor = regressor_dict[best_params["regressor"]]
             transformer = transformer_dict[best_params["target_transformer"]]
             regressor_params = {k:v for k,v in best_params.items() if k!="target_transformer" and k!="regressor"}
+            # the final fit has no folds to share the cores with
+            if thread_budget and "n_jobs" in regressor().get_params():
+                regressor_params["n_jobs"] = get_core_budget(n_cores)
 
             trained_model = TransformedTargetRegressor(
-                 regressor=regressor(**regressor_params),
+                 regressor=with_input_format(best_params["regressor"],regressor(**regressor_params),sparse_input),
                  transformer=transformer
             )
 
             trained_model.fit(X_train,y_train)
 
             return (trained_model,best_params)
-
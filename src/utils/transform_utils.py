@@ -1,4 +1,7 @@
 import sklearn
+import numpy as np
+import pandas as pd
+from typing import Optional
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline,FeatureUnion
 from feature_engine.encoding import RareLabelEncoder
@@ -7,63 +10,131 @@ from sklearn.preprocessing import OneHotEncoder,MinMaxScaler,RobustScaler,Ordina
 # Setting sklearn config to pandas
 sklearn.set_config(transform_output='pandas')
 
-def get_transformer_object()-> ColumnTransformer:
+# FusedColumnTransformer class
+class FusedColumnTransformer(ColumnTransformer):
+    """
+    ColumnTransformer whose branches output plain arrays, stacked into one
+    matrix of the given dtype, instead of concatenating per branch frames,
+    the set_output wrapper then builds the output frame once
+
+    """
+    _parameter_constraints = {**ColumnTransformer._parameter_constraints,"dtype": "no_validation"}
+
+    def __init__(self,transformers,*,remainder = "drop",sparse_threshold = 0.3,n_jobs = None,transformer_weights = None,verbose = False,verbose_feature_names_out = True,dtype = np.float64):
+        super().__init__(
+            transformers,
+            remainder = remainder,
+            sparse_threshold = sparse_threshold,
+            n_jobs = n_jobs,
+            transformer_weights = transformer_weights,
+            verbose = verbose,
+            verbose_feature_names_out = verbose_feature_names_out
+        )
+        self.dtype = dtype
+
+    def fit_transform(self,X,y = None,**params):
+        return self.cast(super().fit_transform(X,y,**params))
+
+    def transform(self,X,**params):
+        return self.cast(super().transform(X,**params))
+
+    def cast(self,output):
+        # the branches hand over plain arrays, so ColumnTransformer stacks them with a single
+        # np.hstack and only the stacked matrix is cast (a no-op for the float64 default)
+        return output.astype(self.dtype,copy=False)
+
+# CategoryCodesMixin class
+class CategoryCodesMixin:
+    """
+    Encodes every distinct value of a categorical column once and spreads the
+    encoded rows over the column through its integer codes
+
+    """
+    def transform(self,X):
+        if not (isinstance(X,pd.DataFrame) and X.shape[1] == 1 and isinstance(X.dtypes.iloc[0],pd.CategoricalDtype)):
+            return super().transform(X)
+        name,column = X.columns[0],X.iloc[:,0]
+        present,inverse = np.unique(column.cat.codes.to_numpy(),return_inverse=True)
+        # the handful of distinct values go through the encoder as plain objects, code -1 as nan
+        values = np.asarray(column.cat.categories,dtype=object)[present]
+        values[present < 0] = np.nan
+        encoded = super().transform(pd.DataFrame({name: values},index=pd.RangeIndex(len(values))))
+        if isinstance(encoded,pd.DataFrame) and list(encoded.columns) == [name] and not pd.api.types.is_numeric_dtype(encoded[name]):
+            # label groupers hand a text column on to the next step, it stays categorical
+            return pd.DataFrame({name: pd.Categorical(encoded[name].to_numpy())[inverse]},index=X.index)
+        if isinstance(encoded,pd.DataFrame):
+            return encoded.iloc[inverse].set_axis(X.index)
+        return encoded[inverse]
+
+class CodesRareLabelEncoder(CategoryCodesMixin,RareLabelEncoder):
+    pass
+
+class CodesOneHotEncoder(CategoryCodesMixin,OneHotEncoder):
+    pass
+
+class CodesOrdinalEncoder(CategoryCodesMixin,OrdinalEncoder):
+    pass
+
+class CodesTargetEncoder(CategoryCodesMixin,TargetEncoder):
+    pass
+
+def get_transformer_object(n_jobs: Optional[int] = None,sparse_output: bool = False,dtype = np.float64)-> ColumnTransformer:
 
     transaction_transformer = Pipeline(steps = [
-        ("grouper",RareLabelEncoder(tol = 0.1, n_categories = 2, replace_with = "Resale")),
-        ("encoder",OneHotEncoder(sparse_output = False,handle_unknown = 'ignore'))
+        ("grouper",CodesRareLabelEncoder(tol = 0.1, n_categories = 2, replace_with = "Resale")),
+        ("encoder",CodesOneHotEncoder(sparse_output = sparse_output,handle_unknown = 'ignore'))
     ])
 
     num_bhk_scaler = MinMaxScaler()
 
-    house_size_encoder = OrdinalEncoder(categories = [["small","normal","big"]])
+    house_size_encoder = CodesOrdinalEncoder(categories = [["small","normal","big"]])
 
     bathroom_scaler = MinMaxScaler()
 
-    bathroom_num_encoder = OrdinalEncoder(categories = [["low","medium","high"]])
+    bathroom_num_encoder = CodesOrdinalEncoder(categories = [["low","medium","high"]])
 
-    furnishing_encoder = OrdinalEncoder(categories = [["Unfurnished","Semi-Furnished","Furnished"]])
+    furnishing_encoder = CodesOrdinalEncoder(categories = [["Unfurnished","Semi-Furnished","Furnished"]])
 
     floor_num_scaler = RobustScaler()
 
-    floor_height_encoder = OrdinalEncoder(categories = [["low","medium","high"]])
+    floor_height_encoder = CodesOrdinalEncoder(categories = [["low","medium","high"]])
 
     num_floors_scaler = RobustScaler()
 
-    building_height_encoder = OrdinalEncoder(categories = [["short","medium","tall"]])
+    building_height_encoder = CodesOrdinalEncoder(categories = [["short","medium","tall"]])
 
-    location_encoder = TargetEncoder()
+    location_encoder = CodesTargetEncoder()
 
     balcony_scaler = MinMaxScaler()
 
-    ownership_encoder = OneHotEncoder(sparse_output = False,handle_unknown = 'ignore')
+    ownership_encoder = CodesOneHotEncoder(sparse_output = sparse_output,handle_unknown = 'ignore')
 
-    missingindicator_ownership_encoder = OneHotEncoder(drop = 'first',sparse_output = False,handle_unknown = 'ignore')
+    missingindicator_ownership_encoder = CodesOneHotEncoder(drop = 'first',sparse_output = sparse_output,handle_unknown = 'ignore')
 
     facing_encoder_union = FeatureUnion(
         transformer_list=[
-            ("facing_onehot",OneHotEncoder(sparse_output = False,handle_unknown = 'ignore')),
-            ("facing_target",TargetEncoder())
+            ("facing_onehot",CodesOneHotEncoder(sparse_output = sparse_output,handle_unknown = 'ignore')),
+            ("facing_target",CodesTargetEncoder())
         ]
     )
 
-    missingindicator_facing_encoder = OneHotEncoder(drop = 'first',sparse_output = False,handle_unknown = 'ignore')
+    missingindicator_facing_encoder = CodesOneHotEncoder(drop = 'first',sparse_output = sparse_output,handle_unknown = 'ignore')
 
-    overlooking_garden_encoder = OneHotEncoder(sparse_output = False,handle_unknown = 'ignore')
+    overlooking_garden_encoder = CodesOneHotEncoder(sparse_output = sparse_output,handle_unknown = 'ignore')
 
-    overlooking_mainroad_encoder = OneHotEncoder(categories=[[ -1, 0, 1 ]], drop=[-1], sparse_output=False, handle_unknown='ignore')
+    overlooking_mainroad_encoder = CodesOneHotEncoder(categories=[[ -1, 0, 1 ]], drop=[-1], sparse_output=sparse_output, handle_unknown='ignore')
 
-    overlooking_pool_encoder = OneHotEncoder(categories=[[ -1, 0, 1 ]], drop=[-1], sparse_output=False, handle_unknown='ignore')
+    overlooking_pool_encoder = CodesOneHotEncoder(categories=[[ -1, 0, 1 ]], drop=[-1], sparse_output=sparse_output, handle_unknown='ignore')
 
-    parking_cover_encoder = OneHotEncoder(sparse_output = False,handle_unknown = 'ignore')
+    parking_cover_encoder = CodesOneHotEncoder(sparse_output = sparse_output,handle_unknown = 'ignore')
     
-    has_parking_encoder = OneHotEncoder(categories = [["multiple","single","no parking"]],drop = [["no parking"]],sparse_output = False,handle_unknown = 'ignore')
+    has_parking_encoder = CodesOneHotEncoder(categories = [["multiple","single","no parking"]],drop = [["no parking"]],sparse_output = sparse_output,handle_unknown = 'ignore')
 
     effective_area_scaler = RobustScaler()
 
     area_per_room_scaler = RobustScaler()
 
-    column_transformer = ColumnTransformer(
+    column_transformer = FusedColumnTransformer(
         transformers=[
             ("transaction_transformer", transaction_transformer, ["transaction"]),
             ("num_bhk_scaler", num_bhk_scaler, ["num_bhk"]),
@@ -88,15 +159,25 @@ def get_transformer_object()-> ColumnTransformer:
             ("has_parking_encoder", has_parking_encoder, ["has_parking"]),
             ("effective_area_scaler", effective_area_scaler, ["effective_area"]),
             ("area_per_room_scaler", area_per_room_scaler, ["area_per_room"]),
-        ]
+        ],
+        # in sparse mode the output stays csr however dense the combined matrix is
+        sparse_threshold = 1.0 if sparse_output else 0.0,
+        n_jobs = n_jobs,
+        dtype = dtype
     )
-    
-
-    return column_transformer
-
-
-
-
 
+    # branches hand plain arrays to the fused output, only the combined output follows the pandas config
+    for _,transformer,_ in column_transformer.transformers:
+        transformer.set_output(transform = "default")
+    # pandas output cannot hold csr matrices
+    if sparse_output:
+        column_transformer.set_output(transform = "default")
 
+    return column_transformer
 
+def get_required_columns(column_transformer: ColumnTransformer)-> list:
+    # the input columns the transformer actually reads, everything else can be skipped upstream
+    columns = []
+    for _,_,transformer_columns in column_transformer.transformers:
+        columns += [column for column in transformer_columns if column not in columns]
+    return columns
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from dataclasses import dataclass,field
+from typing import Iterable,Iterator,List,Optional
+from src.utils.main_utils import ARTIFACT_FORMATS,SCHEMA_DTYPES
+
+NUMERIC_DTYPES = {"float","float32","int"}
+# number of offending values kept per column in the report
+MAX_EXAMPLES = 5
+
+# ColumnCheck class
+@dataclass
+class ColumnCheck:
+    name: str
+    dtype: str
+    max_null_ratio: float = 1.0
+    allowed: Optional[pd.Index] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    rows: int = 0
+    nulls: int = 0
+    uncoercible: int = 0
+    out_of_range: int = 0
+    disallowed: int = 0
+    examples: List = field(default_factory=list)
+
+    def add_examples(self,values: pd.Series):
+        if len(self.examples) < MAX_EXAMPLES:
+            self.examples += values.head(MAX_EXAMPLES - len(self.examples)).tolist()
+
+    def update(self,ser: pd.Series):
+        nulls = ser.isna().to_numpy()
+        self.rows += len(ser)
+        self.nulls += int(nulls.sum())
+        if self.dtype in NUMERIC_DTYPES:
+            values = ser if pd.api.types.is_numeric_dtype(ser) else pd.to_numeric(ser,errors='coerce')
+            bad = values.isna().to_numpy() & ~nulls
+            self.uncoercible += int(bad.sum())
+            self.add_examples(ser[bad])
+            values = values.to_numpy(dtype=float)
+            # nan compares false on both sides so missing values never count as out of range
+            out_of_range = np.zeros(len(values),dtype=bool)
+            if self.min is not None:
+                out_of_range |= values < self.min
+            if self.max is not None:
+                out_of_range |= values > self.max
+            self.out_of_range += int(out_of_range.sum())
+            self.add_examples(ser[out_of_range])
+        if self.allowed is not None:
+            disallowed = ~ser.isin(self.allowed).to_numpy() & ~nulls
+            self.disallowed += int(disallowed.sum())
+            self.add_examples(ser[disallowed])
+
+    @property
+    def null_ratio(self)->float:
+        return self.nulls/self.rows if self.rows else 0.0
+
+    @property
+    def passed(self)->bool:
+        return self.null_ratio <= self.max_null_ratio and not (self.uncoercible or self.out_of_range or self.disallowed)
+
+    def report(self)->dict:
+        return {
+            "dtype": self.dtype,
+            "rows": self.rows,
+            "nulls": self.nulls,
+            "null_ratio": round(self.null_ratio,6),
+            "max_null_ratio": self.max_null_ratio,
+            "uncoercible": self.uncoercible,
+            "out_of_range": self.out_of_range,
+            "disallowed": self.disallowed,
+            "examples": [str(value) for value in self.examples],
+            "passed": self.passed
+        }
+
+# SchemaValidator class
+class SchemaValidator:
+    """
+    Column checks compiled once from schema.yaml and applied to whole
+    columns at a time, counts add up across chunks of the same dataset
+
+    """
+    def __init__(self,schema: dict):
+        self.dtypes = {name: dtype for column in schema["columns"] for name,dtype in column.items()}
+        unknown = set(self.dtypes.values()) - set(SCHEMA_DTYPES)
+        if unknown:
+            raise ValueError(f"Unknown dtypes in schema: {sorted(unknown)}")
+        self.checks_config = schema.get("checks",{})
+        self.reset()
+
+    def reset(self):
+        self.checks = {}
+        for name,dtype in self.dtypes.items():
+            config = self.checks_config.get(name,{})
+            self.checks[name] = ColumnCheck(
+                name=name,
+                dtype=dtype,
+                max_null_ratio=config.get("max_null_ratio",1.0),
+                allowed=pd.Index(config["allowed"]) if "allowed" in config else None,
+                min=config.get("min"),
+                max=config.get("max")
+            )
+        self.rows = 0
+        self.missing_columns = set()
+        self.unexpected_columns = set()
+
+    def update(self,df: pd.DataFrame):
+        self.rows += len(df)
+        self.missing_columns |= set(self.checks) - set(df.columns)
+        self.unexpected_columns |= set(df.columns) - set(self.checks)
+        for name,check in self.checks.items():
+            if name in df.columns:
+                check.update(df[name])
+
+    def report(self)->dict:
+        columns = {name: check.report() for name,check in self.checks.items() if name not in self.missing_columns}
+        return {
+            "passed": not self.missing_columns and not self.unexpected_columns and all(column["passed"] for column in columns.values()),
+            "rows": self.rows,
+            "missing_columns": sorted(self.missing_columns),
+            "unexpected_columns": sorted(self.unexpected_columns),
+            "failed_columns": [name for name,column in columns.items() if not column["passed"]],
+            "columns": columns
+        }
+
+    def validate(self,df: pd.DataFrame)->dict:
+        self.reset()
+        self.update(df)
+        return self.report()
+
+    def validate_chunks(self,chunks: Iterable[pd.DataFrame])->dict:
+        self.reset()
+        for chunk in chunks:
+            self.update(chunk)
+        return self.report()
+
+    def validate_file(self,file_path: Path,chunk_size: int)->dict:
+        return self.validate_chunks(iter_file_chunks(file_path,chunk_size))
+
+def iter_file_chunks(file_path: Path,chunk_size: int)->Iterator[pd.DataFrame]:
+    suffix = Path(file_path).suffix
+    if suffix == ARTIFACT_FORMATS["parquet"]:
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    elif suffix == ARTIFACT_FORMATS["feather"]:
+        df = pd.read_feather(file_path)
+        for start in range(0,len(df),chunk_size):
+            yield df.iloc[start:start + chunk_size]
+    else:
+        yield from pd.read_csv(file_path,chunksize=chunk_size)
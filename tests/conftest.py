@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pathlib import Path
+from src.utils.main_utils import read_yaml_file,cast_to_dtypes,get_schema_dtypes
+
+SCHEMA_FILE_PATH = Path(__file__).resolve().parents[1]/"data_schema"/"schema.yaml"
+
+CATEGORIES = {
+    "location": ["bangalore","new-delhi","pune","gurgaon","mumbai","thane"],
+    "transaction": ["New Property","Resale","Other","Rent/Lease"],
+    "furnishing": ["Unfurnished","Semi-Furnished","Furnished"],
+    "facing": ["East","West","North","South","North - East","North - West","South - East","South - West"],
+    "ownership": ["Freehold","Leasehold","Co-operative Society","Power Of Attorney"],
+    "parking_cover": ["Covered","Open"]
+}
+# share of missing values per column, roughly those of the ingested data
+MISSING = {
+    "carpet_area": 0.2,"furnishing": 0.05,"facing": 0.3,"balcony": 0.25,"ownership": 0.3,"super_area": 0.2,
+    "floor_num": 0.05,"num_floors": 0.2,"overlooking_garden": 0.3,"overlooking_mainroad": 0.3,"overlooking_pool": 0.3,
+    "parking_spots": 0.6,"parking_cover": 0.6
+}
+
+def make_housing_frame(n_rows: int,seed: int,schema: dict)->pd.DataFrame:
+    # a schema-typed frame shaped like the validated listings, the price follows size and location
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({name: rng.choice(values,n_rows) for name,values in CATEGORIES.items()})
+    df["num_bhk"] = rng.integers(1,6,n_rows).astype(float)
+    df["bathroom"] = np.clip(df.num_bhk + rng.integers(-1,2,n_rows),1,None)
+    df["balcony"] = rng.integers(0,4,n_rows).astype(float)
+    df["carpet_area"] = np.round(df.num_bhk*rng.uniform(300,700,n_rows))
+    df["super_area"] = np.round(df.carpet_area*rng.uniform(1.1,1.4,n_rows))
+    df["num_floors"] = rng.integers(2,21,n_rows).astype(float)
+    df["floor_num"] = np.floor(df.num_floors*rng.uniform(0,1,n_rows))
+    for name in ["overlooking_garden","overlooking_mainroad","overlooking_pool"]:
+        df[name] = rng.integers(0,2,n_rows).astype(float)
+    df["parking_spots"] = rng.integers(1,4,n_rows).astype(float)
+    location_factor = df.location.map(dict(zip(CATEGORIES["location"],[1.0,1.3,0.8,1.1,1.6,0.9])))
+    df["amount"] = np.round(np.clip(df.super_area*location_factor*rng.lognormal(0,0.2,n_rows)/1000,0.1,99),4)
+    for name,ratio in MISSING.items():
+        df.loc[rng.random(n_rows) < ratio,name] = np.nan
+    columns = [name for column in schema["columns"] for name in column]
+    return cast_to_dtypes(df[columns],get_schema_dtypes(schema))
+
+# raw listing strings, including the odd ones clean_data special-cases
+RAW_VALUES = {
+    "Floor": ["1 out of 5","Ground out of 3","Upper Basement out of 10","Lower Basement out of 2","12 out of 20","200 out of 200","Ground","5","7 out of 7"],
+    "Bathroom": ["1","2","3","4","> 10"],
+    "Balcony": ["0","1","2","3","> 10"],
+    "Car Parking": ["1 Covered","2 Open","1,000 Covered","3 Covered","Open"],
+    "overlooking": ["Garden/Park","Main Road","Pool, Garden/Park","Garden/Park, Main Road","Main Road, Pool"],
+    "facing": ["East","North - East","South -West","North - West","South - East"],
+    "Transaction": CATEGORIES["transaction"],
+    "Furnishing": CATEGORIES["furnishing"],
+    "Ownership": CATEGORIES["ownership"],
+    "location": CATEGORIES["location"]
+}
+# area units, the last one is unknown and parses to nan
+RAW_AREA_UNITS = ["sqft","sqft","sqft","sqyrd","sqm","marla","cent","furlong"]
+
+def make_raw_frame(n_rows: int,seed: int,duplicates: float = 0.1)->pd.DataFrame:
+    # a frame shaped like raw_data/houses.csv as read by pd.read_csv, some listings are posted twice
+    rng = np.random.default_rng(seed)
+
+    def pick(values: list,missing: float = 0.0)->np.ndarray:
+        picked = np.array(values,dtype=object)[rng.integers(0,len(values),n_rows)]
+        picked[rng.random(n_rows) < missing] = np.nan
+        return picked
+
+    def area(missing: float)->np.ndarray:
+        return pick([f"{value:,} {unit}" for value,unit in zip(rng.integers(50,3000,50),pick(RAW_AREA_UNITS)[:50])],missing)
+
+    bhk = pick(["1","2","3","4","5","> 10"])
+    amount = np.array([f"{value} {unit}" for value,unit in zip(np.round(rng.uniform(5,99,n_rows),2),pick(["Lac","Cr"]))],dtype=object)
+    amount[rng.random(n_rows) < 0.05] = "Call for Price"
+    df = pd.DataFrame({
+        "Index": np.arange(n_rows),
+        "Title": np.where(rng.random(n_rows) < 0.05,"Plot for sale",[f"{value} BHK Ready to Occupy Flat for sale" for value in bhk]),
+        "Description": pick(["nice flat","great view "],0.3),
+        "Amount(in rupees)": amount,
+        "Price (in rupees)": np.round(rng.uniform(100,12000,n_rows)),
+        "location": pick(RAW_VALUES["location"]),
+        "Carpet Area": area(0.4),
+        "Status": pick(["Ready to Move"]),
+        "Floor": pick(RAW_VALUES["Floor"],0.05),
+        "Transaction": pick(RAW_VALUES["Transaction"],0.02),
+        "Furnishing": pick(RAW_VALUES["Furnishing"],0.05),
+        "facing": pick(RAW_VALUES["facing"],0.3),
+        "overlooking": pick(RAW_VALUES["overlooking"],0.3),
+        "Society": pick(["abc"],0.5),
+        "Bathroom": pick(RAW_VALUES["Bathroom"],0.05),
+        "Balcony": pick(RAW_VALUES["Balcony"],0.3),
+        "Car Parking": pick(RAW_VALUES["Car Parking"],0.5),
+        "Ownership": pick(RAW_VALUES["Ownership"],0.3),
+        "Super Area": area(0.4),
+        "Dimensions": np.nan,
+        "Plot Area": np.nan
+    })
+    # reposts differ only in their index and land anywhere in the file
+    reposts = df.sample(frac=duplicates,random_state=seed)
+    df = pd.concat([df,reposts]).sample(frac=1,random_state=seed).reset_index(drop=True)
+    return df.assign(Index=np.arange(len(df)))
+
+@pytest.fixture(scope="session")
+def raw_frame()->pd.DataFrame:
+    return make_raw_frame(1000,0)
+
+@pytest.fixture(scope="session")
+def schema()->dict:
+    return read_yaml_file(SCHEMA_FILE_PATH)
+
+@pytest.fixture(scope="session")
+def housing_frames(schema)->tuple:
+    return make_housing_frame(800,0,schema),make_housing_frame(200,1,schema)
+
+@pytest.fixture(scope="session")
+def make_frame(schema):
+    def make(n_rows: int,seed: int)->pd.DataFrame:
+        return make_housing_frame(n_rows,seed,schema)
+    return make
@@ -0,0 +1,614 @@
+# implementations the library has replaced, kept as the reference for the parity tests and benchmarks
+import numpy as np
+import pandas as pd
+from zlib import crc32
+from typing import Tuple
+from sklearn.pipeline import Pipeline
+from sklearn.impute import SimpleImputer
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import FunctionTransformer
+from src.utils.impute_utils import GroupAggregateImputer
+
+# clean_data as it was before the single pass parsers
+def clean_data(data:pd.DataFrame)->pd.DataFrame:
+        # convert the values to crores scale
+        
+        def convert_to_crores(ser: pd.Series)->pd.Series:
+            return(
+                    ser
+                    .str.split(" ",expand = True)
+                    .set_axis(["amount","unit"],axis=1)
+                    .assign(
+                        amount = lambda df:(
+                            np.where(
+                                df.unit.eq("Lac"),
+                                df.amount.astype(float).mul(0.01),
+                                df.amount.astype(float)
+                            )
+                        )
+                    )
+                    .amount
+            )
+        
+        # all the units converted to sqft
+        
+        conversion_factors = {
+            "sqft": 1,
+            "sqyrd": 9,
+            "sqm": 10.7639,
+            "marla": 272.25,
+            "kanal": 5445,
+            "ground": 2400,
+            "biswa2": 1350,
+            "aankadam": 75,
+            "acre": 43560,
+            "hectare": 107639,
+            "cent": 435.6,
+            "bigha": 27225
+        }
+        
+        def remove_area_units_and_standardize(ser: pd.Series)->pd.Series:
+            return(
+                ser
+                .str.replace(",","")
+                .str.split(" ",expand = True)
+                .set_axis(["value","unit"],axis=1)
+                .assign(
+                    value = lambda df:(
+                        pd.to_numeric(df.value)*df.unit.map(conversion_factors)
+                    )
+                )
+                .value
+            )
+        
+        return(
+             data
+            .assign(**{
+                col: data[col].str.strip()
+                for col in data.select_dtypes(include = "O").columns
+            })
+            .rename(columns = lambda col: col.lower().replace(" ","_").split("_(")[0].split("(")[0])
+            .drop(columns = ["index","description","status","society","dimensions","plot_area"])
+            .query('amount != "Call for Price"')
+            .assign(
+                bathroom = lambda df: pd.to_numeric(df.bathroom.str.replace("> ","")),
+                balcony = lambda df: pd.to_numeric(df.balcony.str.replace("> ","")),
+                amount = lambda df: df.amount.pipe(convert_to_crores),
+                carpet_area = lambda df: df.carpet_area.pipe(remove_area_units_and_standardize),
+                super_area = lambda df: df.super_area.pipe(remove_area_units_and_standardize),
+                floor = lambda df: df.floor.str.replace("200 out of 200","2 out of 2"),
+                car_parking = lambda df: df.car_parking.str.replace(",",""),
+                facing = lambda df: df.facing.str.replace("South -West","South - West"),
+                num_bhk = lambda df: (
+                    pd.to_numeric(
+                        np.where(
+                            df.title.str.contains("BHK"),
+                            df.title.str.split("BHK").str[0].str.replace(">","").str.strip(),
+                            np.nan
+                    )
+                  )
+                ),
+               floor_num = lambda df: (
+                   np.where(
+                           df.floor.str.contains("out of"),
+                           pd.to_numeric(
+                               df.floor
+                               .str.split("out of")
+                               .str[0]
+                               .str.replace("Ground","0")
+                               .str.replace("Lower Basement","0")
+                               .str.replace("Upper Basement","0")
+                           ),
+                           np.where(
+                               df.floor.isnull(),
+                               np.nan,
+                               df.floor
+                               .str.split("out of")
+                               .str[0]
+                               .str.replace("Ground","0")
+                               .str.replace("Lower Basement","0")
+                               .str.replace("Upper Basement","0")
+                           )
+                   )
+               ),
+               num_floors = lambda df: (
+                   np.where(
+                       df.floor.str.contains("out of"),
+                       pd.to_numeric(
+                           df.floor
+                           .str.split("out of")
+                           .str[1]
+                       ),
+                       np.nan
+                   )
+               ),
+               overlooking_garden = lambda df: (
+                   np.where(
+                       df.overlooking.isnull(),
+                       np.nan,
+                       np.where(df.overlooking.str.contains("Garden"),True,False)
+                   )
+               ),
+               overlooking_mainroad = lambda df: (
+                   np.where(
+                       df.overlooking.isnull(),
+                       np.nan,
+                       np.where(df.overlooking.str.contains("Main Road"),True,False)
+                   )
+               ),
+               overlooking_pool = lambda df: (
+                   np.where(
+                       df.overlooking.isnull(),
+                       np.nan,
+                       np.where(df.overlooking.str.contains("Pool"),True,False)
+                   )
+               ),
+               parking_spots = lambda df: (
+                   pd.to_numeric(
+                       df.car_parking
+                       .str.extract(r"(\d+)")[0],
+                       errors = 'coerce'
+                   )
+               ),
+               parking_cover = lambda df: (
+                       np.where(
+                           df.car_parking.isnull(),
+                           np.nan,
+                           df.car_parking
+                           .str.split(" ")
+                           .str[1]
+                       )
+               )
+            )
+            .assign(
+                balcony = lambda df:(
+                    np.where(df.floor_num == 0,0,df.balcony)
+                )
+            )
+            .loc[lambda df: (df.carpet_area.between(90,10000)) | (df.super_area.between(100,10000))]
+            .loc[lambda df: (df.price.between(200,10000))]
+            .loc[lambda df: df.amount.between(0.1,100)]
+            .loc[lambda df:
+                (
+                    df.num_bhk.isnull()
+                    | (df.bathroom.isnull() | df.bathroom.lt(df.num_bhk + 2))
+                    & (df.balcony.isnull() | df.balcony.lt(df.num_bhk + 2))
+                )
+            ]
+            .drop(columns = ["title","floor","overlooking","car_parking","price"])
+            .drop_duplicates()
+            .dropna(subset = ["transaction","num_bhk","bathroom"])
+            .reset_index()
+        )
+
+# the row by row split hash_split replaced
+def test_set_check(identifier: int, test_ratio: float)->bool:
+    return crc32(np.int64(identifier)) & 0xffffffff < test_ratio * 2**32
+
+def train_test_split(df: pd.DataFrame, test_ratio: float, id_col: str = "index")->Tuple[pd.DataFrame, pd.DataFrame]:
+    ids = df[id_col]
+    in_test_set = ids.apply(lambda id_: test_set_check(id_, test_ratio))
+    return df.loc[~in_test_set],df.loc[in_test_set]
+
+# the chained imputation pipeline FusedImputer replaced, one ColumnTransformer per column
+def get_chained_imputer_object()-> Pipeline:
+        # Function to rename the columns before putting back into imputation pipeline
+        def prefix_remover(X, prefixes):
+
+            prefix_list = [f"{prefix}__" for prefix in prefixes]
+            new_cols = X.columns
+            
+            for prefix in prefix_list:
+                new_cols = [col.replace(prefix,"") if col.startswith(prefix) else col for col in new_cols]
+
+            return X.rename(
+                columns = dict(zip(X.columns,new_cols))
+            )
+
+        furnishing_imputer = ColumnTransformer(transformers = [
+            ("furnishing_imputer",GroupAggregateImputer(targets = [{"variable": "furnishing","group_col": "transaction","estimator": "mode"}]),["furnishing","transaction"])
+        ],remainder = "passthrough")
+
+        furnishing_imputation_pipeline = Pipeline(steps = [
+            ("furnishing_imputer",furnishing_imputer),
+            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["furnishing_imputer","remainder"]}))
+        ])
+
+        floor_num_imputer = ColumnTransformer(transformers = [
+            ("floor_num_imputer",SimpleImputer(strategy = "median"),["floor_num"])
+        ],remainder = "passthrough")
+
+        floor_num_imputation_pipeline = Pipeline(steps = [
+            ("floor_num_imputer",floor_num_imputer),
+            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["floor_num_imputer","remainder"]}))
+        ])
+
+        num_floors_imputer = ColumnTransformer(transformers = [
+            ("num_floors_imputer",GroupAggregateImputer(targets = [{"variable": "num_floors","group_col": "floor_num","estimator": "median"}]),["num_floors","floor_num"])
+        ],remainder = "passthrough")
+
+        num_floors_imputation_pipeline = Pipeline(steps = [
+            ("num_floors_imputer",num_floors_imputer),
+            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["num_floors_imputer","remainder"]}))
+        ])
+
+        balcony_imputer = ColumnTransformer(transformers = [
+            ("balcony_imputer", GroupAggregateImputer(targets = [{"variable": "balcony","group_col": "num_bhk","estimator": "median"}]),["balcony","num_bhk"])
+        ],remainder = "passthrough")
+
+        balcony_imputation_pipeline = Pipeline(steps = [
+            ("balcony_imputer",balcony_imputer),
+            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["balcony_imputer","remainder"]}))
+        ])
+
+        ownership_imputer = ColumnTransformer(transformers = [
+            ("ownership_imputer",SimpleImputer(strategy = 'most_frequent',add_indicator = True),["ownership"])
+        ], remainder = "passthrough")
+
+
+        ownership_imputation_pipeline = Pipeline(steps = [
+            ("ownership_imputer",ownership_imputer),
+            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["ownership_imputer","remainder"]}))
+        ])
+
+        facing_imputer = ColumnTransformer(transformers = [
+            ("facing_imputer",SimpleImputer(strategy = 'constant',fill_value = 'Missing',add_indicator = True),["facing"])
+        ], remainder = "passthrough")
+
+        facing_imputation_pipeline = Pipeline(steps = [
+            ("facing_imputer",facing_imputer),
+            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["facing_imputer","remainder"]}))
+        ])
+
+        overlooking_garden_imputer = ColumnTransformer(transformers = [
+            ("overlooking_garden_imputer",SimpleImputer(strategy = 'constant',fill_value = -1),["overlooking_garden"])
+        ], remainder = "passthrough")
+
+        overlooking_garden_imputation_pipeline = Pipeline(steps = [
+            ("overlooking_garden_imputer",overlooking_garden_imputer),
+            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["overlooking_garden_imputer","remainder"]}))
+        ])
+
+        overlooking_mainroad_imputer = ColumnTransformer(transformers = [
+            ("overlooking_mainroad_imputer",SimpleImputer(strategy = 'constant',fill_value = -1),["overlooking_mainroad"])
+        ], remainder = "passthrough")
+
+        overlooking_mainroad_imputation_pipeline = Pipeline(steps = [
+            ("overlooking_mainroad_imputer",overlooking_mainroad_imputer),
+            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["overlooking_mainroad_imputer","remainder"]}))
+        ])
+
+        overlooking_pool_imputer = ColumnTransformer(transformers = [
+            ("overlooking_pool_imputer",SimpleImputer(strategy = 'constant',fill_value = -1),["overlooking_pool"])
+        ], remainder = "passthrough")
+
+        overlooking_pool_imputation_pipeline = Pipeline(steps = [
+            ("overlooking_pool_imputer",overlooking_pool_imputer),
+            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["overlooking_pool_imputer","remainder"]}))
+        ])
+
+        parking_cover_imputer =  ColumnTransformer(transformers = [
+            ("parking_cover_imputer",SimpleImputer(strategy = 'constant',fill_value = "No parking"),["parking_cover"])
+        ],remainder = "passthrough")
+
+        parking_cover_imputation_pipeline = Pipeline(steps = [
+            ("parking_cover_imputer",parking_cover_imputer),
+            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["parking_cover_imputer","remainder"]}))
+        ])
+
+        parking_spots_imputer =  ColumnTransformer(transformers = [
+            ("parking_spots_imputer",SimpleImputer(strategy = 'constant',fill_value = 0),["parking_spots"])
+        ],remainder = "passthrough")
+
+        parking_spots_imputation_pipeline = Pipeline(steps = [
+            ("parking_spots_imputer",parking_spots_imputer),
+            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["parking_spots_imputer","remainder"]}))
+        ])
+
+        carpet_area_imputer =  ColumnTransformer(transformers = [
+            ("carpet_area_imputer",SimpleImputer(strategy = 'constant',fill_value = -1),["carpet_area"])
+        ],remainder = "passthrough")
+
+        carpet_area_imputation_pipeline = Pipeline(steps = [
+            ("carpet_area_imputer",carpet_area_imputer),
+            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["carpet_area_imputer","remainder"]}))
+        ])
+
+        super_area_imputer =  ColumnTransformer(transformers = [
+            ("super_area_imputer",SimpleImputer(strategy = 'constant',fill_value = -1),["super_area"])
+        ],remainder = "passthrough")
+
+        super_area_imputation_pipeline = Pipeline(steps = [
+            ("super_area_imputer",super_area_imputer),
+            ("prefix_remover",FunctionTransformer(func = prefix_remover, kw_args = {"prefixes" : ["super_area_imputer","remainder"]}))
+        ])
+
+        imputation_pipeline = Pipeline(steps = [
+            ("furnishing_imputation_pipeline",furnishing_imputation_pipeline),
+            ("floor_num_imputation_pipeline",floor_num_imputation_pipeline),
+            ("num_floors_imputation_pipeline",num_floors_imputation_pipeline),
+            ("balcony_imputation_pipeline",balcony_imputation_pipeline),
+            ("ownership_imputation_pipeline",ownership_imputation_pipeline),
+            ("facing_imputation_pipeline",facing_imputation_pipeline),
+            ("overlooking_garden_imputation_pipeline",overlooking_garden_imputation_pipeline),
+            ("overlooking_mainroad_imputation_pipeline",overlooking_mainroad_imputation_pipeline),
+            ("overlooking_pool_imputation_pipeline",overlooking_pool_imputation_pipeline),
+            ("parking_cover_imputation_pipeline",parking_cover_imputation_pipeline),
+            ("parking_spots_imputation_pipeline",parking_spots_imputation_pipeline),
+            ("carpet_area_imputation_pipeline",carpet_area_imputation_pipeline),
+            ("super_area_imputation_pipeline",super_area_imputation_pipeline)
+        ])
+
+        return imputation_pipeline
+
+# make_features as it was, one assign per feature
+def make_features_chained(df: pd.DataFrame)->pd.DataFrame:
+
+   # Function to bin house sizes
+   def house_size_binner(X):
+
+      return (
+            X.assign(
+                house_size = lambda df: (
+                    np.select(
+                    [
+                        df.num_bhk.between(1,3,inclusive = "left"),
+                        df.num_bhk.between(3,4,inclusive = "left")
+                    ],
+                    ["small","normal"],
+                    default = "big"
+                )
+                ) 
+            )
+        )
+   
+   df = house_size_binner(df)
+   
+   # Function to bin bathroom number
+   def bathroom_num_binner(X):
+
+    return (
+        X.assign(
+               bathroom_num = lambda df: (
+                np.select(
+                [
+                    df.bathroom.between(1,3,inclusive = "left"),
+                    df.bathroom.between(3,4,inclusive = "left")
+                ],
+                ["low","medium"],
+                default = "high"
+              )
+            ) 
+        )
+    )
+   
+   df = bathroom_num_binner(df)
+
+   # Function to check is unfurnished
+   def is_unfurnished(X):
+
+
+    return (
+        X.assign(
+            is_unfurnished = lambda df:(
+                    np.where(
+                      df.furnishing.eq('Unfurnished'),1,0
+                    )
+            )
+        )
+    )
+   
+   df = is_unfurnished(df)
+   
+   # Function to bin floor height
+   def floor_height_binner(X):
+
+
+    return (
+        X.assign(
+            floor_height = lambda df:(
+                    np.select(
+                        [
+                            (df.floor_num.between(0,3, inclusive = "left")),
+                            (df.floor_num.between(3,6, inclusive = "left"))
+                        ],
+                        ["low","medium"],
+                        default = "high"
+                    )
+            )
+        )
+    )
+   
+   df = floor_height_binner(df)
+   
+   # Function to bin building height
+   def building_height_binner(X):
+
+
+    return (
+        X.assign(
+            building_height = lambda df:(
+                np.select(
+                [
+                    (df.num_floors.between(0,5, inclusive = "left")),
+                    (df.num_floors.between(5,13, inclusive = "left"))
+                ],
+                ["short","medium"],
+                default = "tall"
+            )
+            )
+        )
+    )
+   
+   df = building_height_binner(df)
+   
+   # Function to bin cities
+   def city_binner(X):
+    
+
+
+     return (
+        X.assign(
+            city_tier = lambda df:(
+                np.where(
+                    df.location.isin(["mumbai","gurgaon","new-delhi"]),
+                    1,
+                    0
+                )
+            )
+        )
+    )
+   
+   df = city_binner(df)
+   
+   # Function to round balcony to nearest integer
+   def nearest_integer(X):
+
+
+     return (
+        X.assign(
+            balcony = lambda df:(
+                np.round(df.balcony)
+            )
+        )
+     )
+   
+   df = nearest_integer(df)
+   
+   # Function to bin direction
+   def direction_binner(X):
+
+
+
+     return (
+        X.assign(
+            direction_tier = lambda df:(
+                np.where(
+                    df.facing.isin(["North - East","North - West"]),
+                    1,
+                    0
+                )
+            )
+        )
+     )
+   
+   df = direction_binner(df)
+   
+   # Function to check has parking
+   def has_parking(X):
+
+
+    return (
+        X.assign(
+            has_parking = lambda df:(
+                np.select(
+                            [
+                                df.parking_spots.eq(0),
+                                df.parking_spots.eq(1)
+                            ],
+                            ["no parking","single"],
+                            default = "multiple"
+                        )
+            )
+        )
+     )
+   
+   df = has_parking(df)
+   
+   # Function to check effective area
+   def effective_area(X):
+
+
+    return(
+        X
+        .assign(
+            effective_area = lambda df:(
+                np.where(
+                    df.carpet_area.eq(-1),
+                    df.super_area,
+                    df.carpet_area
+                )
+            ),
+            carpet_areamissing = lambda df:(
+                np.where(
+                    df.carpet_area.eq(-1),
+                    1,
+                    0
+                )
+            ),
+            super_areamissing = lambda df:(
+                np.where(
+                    df.super_area.eq(-1),
+                    1,
+                    0
+                )
+            )
+        )
+    )
+   
+   df = effective_area(df)
+
+   # Function to log transform effective area
+   def effective_area_log(X):
+
+
+     return(
+            X
+            .assign(
+                effective_area = lambda df:(
+                    np.log(df.effective_area)
+                )
+            )
+        )
+   
+   df = effective_area_log(df)
+   
+   # Function for area per room
+   def area_per_room(X):
+
+
+    return(
+        X
+        .assign(
+            area_per_room = lambda df:(
+                np.where(
+                    df.carpet_area.eq(-1),
+                    df.super_area/df.num_bhk,
+                    df.carpet_area/df.num_bhk
+                )
+            )
+        )
+    )
+   
+   df = area_per_room(df)
+   
+   # Function for balcony per room
+   def balcony_per_room(X):
+
+
+    return(
+        X
+        .assign(
+            balcony_per_room = lambda df:(
+                df.balcony/df.num_bhk
+            )
+        )
+    )
+   
+   df = balcony_per_room(df)
+   
+   # Function for bathroom per room
+   def bathroom_per_room(X):
+
+    return(
+        X
+        .assign(
+            bathroom_per_room = lambda df:(
+                df.bathroom/df.num_bhk
+            )
+        )
+    )
+   
+   df = bathroom_per_room(df)
+
+   return df
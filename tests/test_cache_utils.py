@@ -0,0 +1,69 @@
+import itertools
+import pandas as pd
+import pytest
+from src.utils import cache_utils
+from src.utils.cache_utils import ObjectCache
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    # every access gets a later time, so the LRU order does not depend on the clock resolution
+    ticks = itertools.count()
+    monkeypatch.setattr(cache_utils.time,"time",lambda: float(next(ticks)))
+
+def download(cache: ObjectCache,etag: str,size: int = 100)->bytes:
+    return b"".join(cache.write_through(etag,size,[b"x"*(size//2),b"y"*(size - size//2)]))
+
+def test_hits_and_misses_are_counted_and_persisted(tmp_path):
+    cache = ObjectCache(tmp_path,1000)
+    assert cache.get("etag",100) is None
+    assert download(cache,"etag") == b"x"*50 + b"y"*50
+    entry_dir = cache.get("etag",100)
+    assert (entry_dir/ObjectCache.RAW_FILE_NAME).read_bytes() == b"x"*50 + b"y"*50
+    # the same etag with another size is another object
+    assert cache.get("etag",101) is None
+    assert ObjectCache(tmp_path,1000).stats() == {"hits": 1,"misses": 2,"entries": 1,"bytes": 100}
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path):
+    cache = ObjectCache(tmp_path,250)
+    download(cache,"first")
+    download(cache,"second")
+    # reading first makes second the least recently used
+    cache.get("first",100)
+    download(cache,"third")
+    assert cache.get("second",100) is None
+    assert cache.get("first",100) is not None and cache.get("third",100) is not None
+    assert cache.stats()["bytes"] == 200
+
+def test_the_entry_in_use_is_kept(tmp_path):
+    cache = ObjectCache(tmp_path,50)
+    download(cache,"large")
+    entry_dir = cache.get("large",100)
+    assert entry_dir is not None
+    cache.put_frame("large",100,pd.DataFrame({"a": range(100)}))
+    assert cache.get_frame(entry_dir) is not None
+
+def test_abandoned_download_leaves_no_partial_copy(tmp_path):
+    cache = ObjectCache(tmp_path,1000)
+    chunks = cache.write_through("etag",100,iter([b"x"*50,b"y"*50]))
+    next(chunks)
+    # the parser stopped reading after the first chunk
+    chunks.close()
+    assert not (tmp_path/ObjectCache.entry_key("etag",100)).exists()
+
+    def failing():
+        yield b"x"*50
+        raise ConnectionError("connection reset")
+
+    with pytest.raises(ConnectionError):
+        b"".join(cache.write_through("etag",100,failing()))
+    assert not (tmp_path/ObjectCache.entry_key("etag",100)).exists()
+    assert cache.get("etag",100) is None and cache.stats()["entries"] == 0
+
+def test_parsed_frame_round_trip(tmp_path,housing_frames):
+    cache = ObjectCache(tmp_path,10*1024*1024)
+    # a frame is only kept next to a cached raw copy
+    cache.put_frame("etag",100,housing_frames[0])
+    assert not (tmp_path/ObjectCache.entry_key("etag",100)).exists()
+    download(cache,"etag")
+    cache.put_frame("etag",100,housing_frames[0])
+    pd.testing.assert_frame_equal(cache.get_frame(cache.get("etag",100)),housing_frames[0])
@@ -0,0 +1,33 @@
+import pandas as pd
+from src.utils.clean_data import clean_data,clean_data_in_chunks,clean_data_in_parallel
+from tests import reference
+
+def test_clean_data_matches_the_reference(raw_frame):
+    # the raw frame has every special case the parsers reproduce
+    assert raw_frame.Floor.isin(["200 out of 200","Upper Basement out of 10","Lower Basement out of 2","Ground"]).any()
+    assert raw_frame["Amount(in rupees)"].eq("Call for Price").any()
+    assert raw_frame["Carpet Area"].str.contains(",").any() and raw_frame["Carpet Area"].str.endswith("furlong").any()
+    assert raw_frame.Bathroom.eq("> 10").any() and raw_frame.Balcony.eq("> 10").any()
+    cleaned = clean_data(raw_frame)
+    assert len(cleaned) > 100
+    pd.testing.assert_frame_equal(cleaned,reference.clean_data(raw_frame))
+
+def reposts_span(raw: pd.DataFrame,size: int)->bool:
+    # some listing and its repost fall in different blocks of size rows
+    rows = raw.drop(columns="Index")
+    blocks = pd.Series(range(len(raw)),index=raw.index)//size
+    spans = blocks.groupby(pd.util.hash_pandas_object(rows,index=False)).agg(["min","max"])
+    return spans["min"].ne(spans["max"]).any()
+
+def test_clean_data_in_parallel_matches_clean_data(raw_frame):
+    assert reposts_span(raw_frame,97)
+    pd.testing.assert_frame_equal(clean_data_in_parallel(raw_frame,3,97),clean_data(raw_frame))
+
+def test_clean_data_in_chunks_matches_clean_data(raw_frame,tmp_path):
+    file_path = tmp_path/"houses.csv"
+    raw_frame.to_csv(file_path,index=False,encoding='latin1')
+    assert reposts_span(raw_frame,97)
+    chunks = list(clean_data_in_chunks(file_path,97))
+    assert len(chunks) > 1
+    # every chunk keeps the raw row labels in its index column, like clean_data does
+    pd.testing.assert_frame_equal(pd.concat(chunks,ignore_index=True),clean_data(pd.read_csv(file_path,encoding='latin1')))
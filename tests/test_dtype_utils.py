@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import Ridge
+from sklearn.metrics import mean_absolute_error
+from src.utils.dtype_utils import get_category_dictionary,to_compact_dtypes
+from src.utils.impute_utils import get_imputer_object
+from src.utils.feature_utils import make_features
+from src.utils.transform_utils import get_transformer_object,get_required_columns
+
+@pytest.fixture(scope="module")
+def category_dictionary(housing_frames,schema):
+    return get_category_dictionary(housing_frames,schema,"amount",max_levels=1000,rtol=1e-6)
+
+def run(train_df: pd.DataFrame,test_df: pd.DataFrame,compact: bool)->tuple:
+    X_train,y_train = train_df.drop(columns=["amount"]),train_df.amount
+    X_test,y_test = test_df.drop(columns=["amount"]),test_df.amount
+    imputer = get_imputer_object().fit(X_train)
+    transformer = get_transformer_object(dtype=np.float32 if compact else np.float64)
+    required_columns = get_required_columns(transformer)
+    # fit then transform, the cross fitted target encodings of fit_transform are not seeded
+    transformer.fit(make_features(imputer.transform(X_train),required_columns),y_train)
+    X_train,X_test = [transformer.transform(make_features(imputer.transform(X),required_columns)) for X in (X_train,X_test)]
+    # rows with unscaled missing values are left out of the metric, the same rows in both modes
+    keep_train,keep_test = X_train.notna().all(axis=1),X_test.notna().all(axis=1)
+    model = Ridge().fit(X_train[keep_train],np.log(y_train[keep_train]))
+    return X_test,mean_absolute_error(y_test[keep_test],np.exp(model.predict(X_test[keep_test])))
+
+def test_compact_dictionary(housing_frames,category_dictionary):
+    assert category_dictionary["categories"]
+    compact = to_compact_dtypes(housing_frames[0],category_dictionary)
+    for column in category_dictionary["categories"]:
+        assert isinstance(compact[column].dtype,pd.CategoricalDtype)
+    assert (compact[category_dictionary["float32_columns"]].dtypes == np.float32).all()
+    assert compact.memory_usage(deep=True).sum() < housing_frames[0].memory_usage(deep=True).sum()
+
+def test_compact_matches_default(housing_frames,category_dictionary):
+    X_default,mae_default = run(*housing_frames,compact=False)
+    X_compact,mae_compact = run(*[to_compact_dtypes(df,category_dictionary) for df in housing_frames],compact=True)
+    np.testing.assert_array_equal(X_compact.columns,X_default.columns)
+    assert (X_compact.dtypes == np.float32).all()
+    np.testing.assert_allclose(X_compact.to_numpy(dtype=float),X_default.to_numpy(),rtol=1e-5,atol=1e-6)
+    assert mae_compact == pytest.approx(mae_default,rel=1e-4)
+
+def test_unknown_category_fails(housing_frames,category_dictionary):
+    column = next(iter(category_dictionary["categories"]))
+    df = housing_frames[1].iloc[:5].copy()
+    df[column] = "not-a-level"
+    with pytest.raises(ValueError,match=column):
+        to_compact_dtypes(df,category_dictionary)
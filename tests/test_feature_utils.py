@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+from src.utils.impute_utils import get_imputer_object
+from src.utils.feature_utils import OUTPUT_FEATURES,make_features,select_features
+from tests.reference import make_features_chained
+from src.utils.transform_utils import get_transformer_object,get_required_columns
+
+@pytest.fixture(scope="module")
+def imputed(housing_frames):
+    train_df,_ = housing_frames
+    return get_imputer_object().fit_transform(train_df.drop(columns=["amount"]))
+
+def test_registry_matches_chained_assigns(imputed):
+    # binned features come back as categoricals, the chained assigns kept objects
+    pd.testing.assert_frame_equal(make_features(imputed),make_features_chained(imputed),check_dtype=False,check_categorical=False)
+
+@pytest.mark.parametrize("position",[0,3,11])
+def test_dict_row_matches_chained_assigns(imputed,position):
+    row = imputed.iloc[position].to_dict()
+    expected = make_features_chained(imputed.iloc[[position]]).iloc[0].to_dict()
+    features = make_features(row)
+    assert features.keys() == expected.keys()
+    for name,value in features.items():
+        assert (pd.isna(value) and pd.isna(expected[name])) or value == expected[name],name
+
+def test_required_features_only(imputed):
+    required = list(get_required_columns(get_transformer_object()))
+    skipped = set(OUTPUT_FEATURES) - set(select_features(required))
+    output = make_features(imputed,required)
+    assert not skipped & (set(output.columns) - set(imputed.columns))
+    pd.testing.assert_frame_equal(make_features(imputed,required)[required],make_features_chained(imputed)[required],check_dtype=False,check_categorical=False)
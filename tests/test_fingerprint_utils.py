@@ -0,0 +1,118 @@
+import ast
+import sys
+import importlib
+import pytest
+from pathlib import Path
+from src.entity.config_entity import TrainingPipelineConfig
+from src.entity.artifact_entity import DataIngestionArtifact
+from src.utils.fingerprint_utils import StageCache,stage_fingerprint
+
+@pytest.fixture(scope="module")
+def pipeline_module(tmp_path_factory):
+    # the loggers create their folder under the working directory on import, keep it out of the repo
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(tmp_path_factory.mktemp("run"))
+        return importlib.import_module("src.pipeline.training_pipeline")
+
+def write_outputs(tmp_path: Path)->DataIngestionArtifact:
+    paths = {name: tmp_path/f"{name}.csv" for name in ["feature_store","train","test"]}
+    for name,path in paths.items():
+        path.write_text(f"a,b\n1,{name}\n")
+    return DataIngestionArtifact(feature_store_path=paths["feature_store"],train_file_path=paths["train"],test_file_path=paths["test"])
+
+@pytest.fixture
+def stage_module(tmp_path,monkeypatch):
+    # a throwaway module standing in for a stage's code
+    module_dir = tmp_path/"modules"
+    module_dir.mkdir()
+    (module_dir/"stage_module.py").write_text("STEP = 1\n")
+    monkeypatch.syspath_prepend(str(module_dir))
+    yield module_dir/"stage_module.py"
+    sys.modules.pop("stage_module",None)
+
+def test_cache_hit_until_config_or_code_changes(tmp_path,stage_module):
+    cache = StageCache(tmp_path/"manifest.json")
+    artifact = write_outputs(tmp_path)
+    fingerprint = stage_fingerprint("data_ingestion",[],{"ratio": 0.2},["stage_module"])
+    cache.record("data_ingestion",fingerprint,artifact)
+    # a new cache reads the manifest back from disk
+    cache = StageCache(tmp_path/"manifest.json")
+    assert cache.lookup("data_ingestion",fingerprint)["artifact"]["train_file_path"] == {"path": str(artifact.train_file_path)}
+    assert stage_fingerprint("data_ingestion",[],{"ratio": 0.2},["stage_module"]) == fingerprint
+    assert cache.lookup("data_ingestion",stage_fingerprint("data_ingestion",[],{"ratio": 0.3},["stage_module"])) is None
+    stage_module.write_text("STEP = 2\n")
+    assert cache.lookup("data_ingestion",stage_fingerprint("data_ingestion",[],{"ratio": 0.2},["stage_module"])) is None
+
+def test_cache_miss_when_an_output_is_tampered_with(tmp_path):
+    cache = StageCache(tmp_path/"manifest.json")
+    artifact = write_outputs(tmp_path)
+    cache.record("data_ingestion","fingerprint",artifact)
+    # same size, different content
+    artifact.test_file_path.write_text(artifact.test_file_path.read_text().replace("1","2"))
+    assert cache.lookup("data_ingestion","fingerprint") is None
+
+def test_upstream_fingerprint_chains_the_stages():
+    first = stage_fingerprint("data_validation",["upstream-1"],{},[])
+    assert stage_fingerprint("data_validation",["upstream-2"],{},[]) != first
+
+def test_stage_modules_cover_their_imports(pipeline_module):
+    # a utility a stage imports (directly or through the src.utils package) has to be part of its code version
+    package_tree = ast.parse(Path(importlib.import_module("src.utils").__file__).read_text())
+    exports = {}
+    for node in package_tree.body:
+        if isinstance(node,ast.ImportFrom):
+            module = importlib.import_module(node.module)
+            names = [alias.name for alias in node.names]
+            if names == ["*"]:
+                names = getattr(module,"__all__",[name for name in vars(module) if not name.startswith("_")])
+            exports.update({name: node.module for name in names})
+    for stage,modules in pipeline_module.STAGE_MODULES.items():
+        for module in modules:
+            tree = ast.parse(Path(importlib.import_module(module).__file__).read_text())
+            used = {node.id for node in ast.walk(tree) if isinstance(node,ast.Name)}
+            for node in ast.walk(tree):
+                if not isinstance(node,ast.ImportFrom) or not (node.module or "").startswith("src.utils"):
+                    continue
+                if node.module == "src.utils":
+                    names = used if node.names[0].name == "*" else [alias.name for alias in node.names]
+                    imported = {exports[name] for name in names if name in exports}
+                else:
+                    imported = {node.module}
+                assert imported <= set(modules),f"{stage} misses {imported - set(modules)} imported by {module}"
+
+@pytest.fixture
+def pipeline_config(tmp_path)->TrainingPipelineConfig:
+    config = TrainingPipelineConfig()
+    config.artifact_path = tmp_path
+    config.stage_manifest_path = tmp_path/"manifest.json"
+    config.stage_cache = True
+    config.in_memory = False
+    return config
+
+def test_forcing_a_stage_forces_every_later_stage(pipeline_module,pipeline_config):
+    pipeline = pipeline_module.TrainingPipeline(pipeline_config,force=["data_transformation"])
+    assert pipeline.forced_stages == {"data_transformation","model_trainer"}
+    assert pipeline_module.TrainingPipeline(pipeline_config,force=["data_ingestion"]).forced_stages == set(pipeline_module.STAGES)
+    # a forced stage ignores a matching cache entry
+    pipeline.stage_cache.record("data_transformation","fingerprint",write_outputs(pipeline_config.artifact_path))
+    assert pipeline.load_cached_stage("data_transformation","fingerprint",DataIngestionArtifact) is None
+
+def test_offline_ingestion_reuses_the_last_run(pipeline_module,pipeline_config,monkeypatch):
+    artifact = write_outputs(pipeline_config.artifact_path)
+    StageCache(pipeline_config.stage_manifest_path).record("data_ingestion","last-run",artifact)
+
+    def unreachable(self):
+        try:
+            raise ConnectionError("no network")
+        except ConnectionError as e:
+            raise pipeline_module.CustomException(e,sys)
+
+    def not_expected(self):
+        raise AssertionError("ingestion should not re-run")
+
+    monkeypatch.setattr(pipeline_module.DataIngestion,"get_source_metadata",unreachable)
+    monkeypatch.setattr(pipeline_module.DataIngestion,"initiate_data_ingestion",not_expected)
+    pipeline = pipeline_module.TrainingPipeline(pipeline_config)
+    assert pipeline.start_data_ingestion() == artifact
+    # the downstream stages chain on the recorded fingerprint
+    assert pipeline.stage_fingerprints["data_ingestion"] == "last-run"
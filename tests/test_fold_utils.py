@@ -0,0 +1,75 @@
+import pickle
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+from sklearn.model_selection import KFold,cross_val_score
+from sklearn.compose import TransformedTargetRegressor
+from sklearn.linear_model import Lasso,Ridge
+from src.utils.dict_utils import transformer_dict
+from src.utils.fold_utils import FoldCache,fit_and_score_fold
+
+@pytest.fixture(scope="module")
+def training_frame():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(2000,12)),columns=[f"x{i}" for i in range(12)])
+    y = pd.Series(np.exp(X.x0 + 0.5*X.x1 + rng.normal(scale=0.1,size=2000)) + 1,name="amount")
+    return X,y,list(KFold(n_splits = 5, shuffle = True, random_state = 42).split(X))
+
+def assert_same_folds(folds: FoldCache,expected: FoldCache):
+    assert len(folds) == len(expected)
+    for fold in range(len(expected)):
+        for (rows,expected_rows) in zip(folds.splits[fold],expected.splits[fold]):
+            np.testing.assert_array_equal(rows,expected_rows)
+        for name in transformer_dict:
+            for array,expected_array in zip(folds.fold(fold,name),expected.fold(fold,name)):
+                np.testing.assert_array_equal(array,expected_array)
+
+def test_memory_mapped_cache_pickles_as_its_directory(training_frame,tmp_path):
+    X,y,splits = training_frame
+    folds = FoldCache(X,y,splits,tmp_path/"folds")
+    payload = pickle.dumps(folds)
+    # a reference to the files, not the roughly 1MB of fold arrays
+    assert len(payload) < 1000
+    unpickled = pickle.loads(payload)
+    assert all(isinstance(array,np.memmap) for array in unpickled.fold(0,"log"))
+    assert_same_folds(unpickled,FoldCache(X,y,splits))
+
+def test_in_memory_cache_pickles_its_arrays(training_frame):
+    X,y,splits = training_frame
+    folds = FoldCache(X,y,splits)
+    assert_same_folds(pickle.loads(pickle.dumps(folds)),folds)
+
+def test_failed_fold_scores_nan_and_warns(training_frame):
+    X,y,splits = training_frame
+    folds = FoldCache(X,y,splits)
+    with pytest.warns(UserWarning,match="Fold fit failed"):
+        score = fit_and_score_fold(Ridge(alpha=-1.0,solver="sag"),"log",*folds.fold(0,"log"))
+    assert np.isnan(score)
+
+def test_convergence_warnings_stay_inside_the_fold_fit(training_frame):
+    X,y,splits = training_frame
+    folds = FoldCache(X,y,splits)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert np.isfinite(fit_and_score_fold(Lasso(alpha=1e-6,max_iter=2,tol=0),"log",*folds.fold(0,"log")))
+
+@pytest.mark.parametrize("target_transformer_name",list(transformer_dict))
+@pytest.mark.parametrize("memory_mapped",[False,True])
+def test_fold_scores_match_cross_val_score(training_frame,tmp_path,target_transformer_name,memory_mapped):
+    X,y,splits = training_frame
+    folds = FoldCache(X,y,splits,tmp_path/"folds" if memory_mapped else None)
+    model = TransformedTargetRegressor(regressor=Ridge(alpha=0.5),transformer=transformer_dict[target_transformer_name])
+    expected = cross_val_score(model,X,y,scoring = "neg_mean_absolute_error",cv = splits)
+    scores = [fit_and_score_fold(Ridge(alpha=0.5),target_transformer_name,*folds.fold(fold,target_transformer_name)) for fold in range(len(folds))]
+    np.testing.assert_array_equal(scores,expected)
+
+def test_csr_folds_match_dense_folds(training_frame):
+    X,y,splits = training_frame
+    dense,csr = FoldCache(X,y,splits),FoldCache(sparse.csr_matrix(X.to_numpy()),y,splits)
+    for fold in range(len(dense)):
+        X_fold_train,_,X_fold_valid,_ = csr.fold(fold,"log")
+        assert sparse.issparse(X_fold_train) and sparse.issparse(X_fold_valid)
+        np.testing.assert_array_equal(X_fold_train.toarray(),dense.fold(fold,"log")[0])
+        np.testing.assert_array_equal(X_fold_valid.toarray(),dense.fold(fold,"log")[2])
@@ -0,0 +1,63 @@
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+from src.utils.impute_utils import GroupAggregateImputer,IMPUTATION_STEPS,get_imputer_object
+from tests.reference import get_chained_imputer_object
+
+@pytest.fixture(scope="module")
+def features(housing_frames):
+    train_df,test_df = housing_frames
+    return train_df.drop(columns=["amount"]),test_df.drop(columns=["amount"])
+
+@pytest.fixture(scope="module")
+def imputers(features):
+    X_train,_ = features
+    chained = get_chained_imputer_object().fit(X_train)
+    fused = pickle.loads(pickle.dumps(get_imputer_object().fit(X_train)))
+    return chained,fused
+
+def test_fused_matches_chained_pipeline(features,imputers):
+    chained,fused = imputers
+    for X in features:
+        pd.testing.assert_frame_equal(fused.transform(X),chained.transform(X))
+
+def test_indicator_columns_and_no_missing_values(features,imputers):
+    _,fused = imputers
+    output = fused.transform(features[1])
+    indicators = [f"missingindicator_{step['column']}" for step in IMPUTATION_STEPS if step.get("add_indicator")]
+    assert set(indicators) <= set(output.columns)
+    for indicator in indicators:
+        column = indicator.removeprefix("missingindicator_")
+        np.testing.assert_array_equal(output[indicator].astype(bool),features[1][column].isna())
+    assert not output[[step["column"] for step in IMPUTATION_STEPS]].isna().any().any()
+
+@pytest.mark.parametrize("position",[0,5,17])
+def test_single_row_transform(features,imputers,position):
+    chained,fused = imputers
+    row = features[1].iloc[[position]]
+    pd.testing.assert_frame_equal(fused.transform(row),chained.transform(row))
+
+def test_unseen_group_keys_match_chained_pipeline(features,imputers):
+    chained,fused = imputers
+    X = features[1].iloc[:20].copy()
+    X["num_bhk"] = 42.0
+    X["balcony"] = np.nan
+    pd.testing.assert_frame_equal(fused.transform(X),chained.transform(X))
+
+def test_group_statistics_match_groupby(features):
+    X = features[0]
+    X = X.assign(floor_num=X.floor_num.fillna(X.floor_num.median()))
+    targets = [
+        {"variable": "furnishing","group_col": "transaction","estimator": "mode"},
+        {"variable": "num_floors","group_col": "floor_num","estimator": "median"},
+        {"variable": "balcony","group_col": "num_bhk","estimator": "median"}
+    ]
+    group_imputer = GroupAggregateImputer(targets=targets).fit(X)
+    for target in targets:
+        expected = X.groupby(target["group_col"])[target["variable"]].agg(
+            "median" if target["estimator"] == "median" else lambda x: x.mode().iloc[0] if x.notna().any() else np.nan
+        )
+        group_index = group_imputer.group_index_[target["group_col"]]
+        statistics = pd.Series(group_imputer.lookups_[target["variable"]][:-1],index=group_index)
+        pd.testing.assert_series_equal(statistics,expected.reindex(group_index),check_dtype=False,check_names=False,check_index_type=False)
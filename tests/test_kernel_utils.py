@@ -0,0 +1,47 @@
+import pickle
+import numpy as np
+import pytest
+from src.utils.impute_utils import get_imputer_object
+from src.utils.feature_utils import make_features
+from src.utils.kernel_utils import compile_inference_kernel
+from src.utils.transform_utils import get_transformer_object,get_required_columns
+
+@pytest.fixture(scope="module")
+def fitted(housing_frames):
+    train_df,test_df = housing_frames
+    X_train,y_train = train_df.drop(columns=["amount"]),train_df.amount
+    imputer = get_imputer_object().fit(X_train)
+    transformer = get_transformer_object()
+    required_columns = get_required_columns(transformer)
+    transformer.fit(make_features(imputer.transform(X_train),required_columns),y_train)
+    X_test = test_df.drop(columns=["amount"])
+    expected = transformer.transform(make_features(imputer.transform(X_test),required_columns)).to_numpy()
+    kernel = pickle.loads(pickle.dumps(compile_inference_kernel(imputer,transformer)))
+    return kernel,X_test,expected
+
+def test_kernel_matches_sklearn_path(fitted):
+    kernel,X_test,expected = fitted
+    np.testing.assert_allclose(kernel.transform(X_test),expected,rtol=1e-9,atol=1e-12)
+
+def test_single_records_match_sklearn_path(fitted):
+    kernel,X_test,expected = fitted
+    records = X_test.iloc[:50].to_dict(orient="records")
+    np.testing.assert_allclose(np.vstack([kernel.transform(record) for record in records]),expected[:50],rtol=1e-9,atol=1e-12)
+
+def test_kernel_survives_pickle_and_accepts_arrays(fitted):
+    kernel,X_test,expected = fitted
+    kernel = pickle.loads(pickle.dumps(kernel))
+    array = X_test[kernel.input_columns].to_numpy(dtype=object)
+    np.testing.assert_allclose(kernel.transform(array),expected,rtol=1e-9,atol=1e-12)
+
+def test_unknown_categories_raise_like_sklearn(fitted):
+    kernel,X_test,_ = fitted
+    # furnishing has a fixed category list and no handle_unknown, location is target encoded and takes unknowns
+    unknown = X_test.iloc[:5].assign(furnishing="Fully-Furnished")
+    with pytest.raises(ValueError,match="Fully-Furnished"):
+        kernel.transform(unknown)
+    with pytest.raises(ValueError,match="Fully-Furnished"):
+        kernel.transform(unknown.iloc[0].to_dict())
+    output = kernel.transform(X_test.iloc[:5].assign(location="atlantis"))
+    location = [position for position,name in enumerate(kernel.feature_names) if name.startswith("location_encoder")]
+    assert np.isfinite(output[:,location]).all() and (output[:,location] == output[0,location]).all()
@@ -0,0 +1,27 @@
+import time
+import pytest
+import pandas as pd
+from src.utils.main_utils import ArtifactWriter,read_data
+
+def test_artifact_writer_background_writes_are_on_disk_after_wait(tmp_path):
+    writer = ArtifactWriter(background=True)
+    df = pd.DataFrame({"a": [1.0,2.0],"b": ["x","y"]})
+    writer.save(tmp_path/"df.csv",df)
+    writer.wait()
+    pd.testing.assert_frame_equal(read_data(tmp_path/"df.csv"),df)
+
+def test_artifact_writer_wait_raises_background_error_and_skips_later_tasks(tmp_path):
+    writer = ArtifactWriter(background=True)
+    done = []
+
+    def fail():
+        time.sleep(0.05)
+        raise OSError("disk full")
+
+    writer.run(fail)
+    writer.run(done.append,"after")
+    with pytest.raises(OSError,match="disk full"):
+        writer.wait()
+    # the task queued behind the failed write never ran, and the error is raised only once
+    assert done == []
+    writer.wait()
@@ -0,0 +1,102 @@
+import io
+import gzip
+import boto3
+import numpy as np
+import pandas as pd
+import pytest
+from botocore.exceptions import ClientError
+from src.utils.s3_utils import MIN_PART_SIZE,TransferStats,ChunkReader,infer_compression,iter_frame_chunks,iter_csv_parts,upload_parts,iter_object_ranges
+
+moto = pytest.importorskip("moto")
+
+BUCKET_NAME = "test-bucket"
+
+@pytest.fixture
+def client(monkeypatch):
+    for name in ["AWS_ACCESS_KEY_ID","AWS_SECRET_ACCESS_KEY"]:
+        monkeypatch.setenv(name,"testing")
+    with moto.mock_aws():
+        client = boto3.client("s3",region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET_NAME)
+        yield client
+
+@pytest.fixture(scope="module")
+def large_frame()->pd.DataFrame:
+    # random floats barely compress, so even gzip/zstd output spans several parts
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(rng.random((250000,4)),columns=["a","b","c","d"])
+
+@pytest.mark.parametrize("compression",[None,"gzip","zstd"])
+def test_multipart_round_trip(client,large_frame,compression):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    parts = list(iter_csv_parts(iter_frame_chunks(large_frame,20000),MIN_PART_SIZE,compression))
+    assert len(parts) > 1
+    assert all(len(part) >= MIN_PART_SIZE for part in parts[:-1])
+    assert upload_parts(client,BUCKET_NAME,"houses.csv",iter(parts),max_workers=2) == len(parts)
+    body = client.get_object(Bucket=BUCKET_NAME,Key="houses.csv")["Body"].read()
+    pd.testing.assert_frame_equal(pd.read_csv(io.BytesIO(body),compression=compression),large_frame)
+
+def test_empty_frame_uploads_its_header(client):
+    df = pd.DataFrame({"a": pd.Series(dtype=float),"b": pd.Series(dtype=float)})
+    upload_parts(client,BUCKET_NAME,"empty.csv",iter_csv_parts(iter_frame_chunks(df,10),MIN_PART_SIZE),max_workers=2)
+    assert client.get_object(Bucket=BUCKET_NAME,Key="empty.csv")["Body"].read() == b"a,b\n"
+
+def test_failing_parts_abort_the_upload(client):
+    def parts():
+        yield b"x"*MIN_PART_SIZE
+        raise RuntimeError("chunk failed")
+
+    with pytest.raises(RuntimeError,match="chunk failed"):
+        upload_parts(client,BUCKET_NAME,"houses.csv",parts(),max_workers=2)
+    # no multipart upload is left behind to be billed, and no object was written
+    assert client.list_multipart_uploads(Bucket=BUCKET_NAME).get("Uploads",[]) == []
+    assert client.list_objects_v2(Bucket=BUCKET_NAME).get("KeyCount") == 0
+
+class FlakyClient:
+    # fails the first get_object calls, the way a throttled or dropped request would
+    def __init__(self,client,failures: int):
+        self.client = client
+        self.failures = failures
+
+    def __getattr__(self,name: str):
+        return getattr(self.client,name)
+
+    def get_object(self,**kwargs)->dict:
+        if self.failures:
+            self.failures -= 1
+            raise ClientError({"Error": {"Code": "SlowDown","Message": "Please reduce your request rate"}},"GetObject")
+        return self.client.get_object(**kwargs)
+
+def read_ranges(client,key: str,part_size: int,stats: TransferStats,**kwargs)->pd.DataFrame:
+    chunks = iter_object_ranges(client,BUCKET_NAME,key,part_size=part_size,max_workers=3,max_retries=2,stats=stats)
+    return pd.read_csv(io.BufferedReader(ChunkReader(chunks)),**kwargs)
+
+@pytest.mark.parametrize("key,compress",[("houses.csv",bytes),("houses.csv.gz",gzip.compress)])
+def test_ranged_read_equals_a_plain_read(client,housing_frames,key,compress):
+    client.put_object(Bucket=BUCKET_NAME,Key=key,Body=compress(housing_frames[0].to_csv(index=False).encode()))
+    body = client.get_object(Bucket=BUCKET_NAME,Key=key)["Body"].read()
+    stats = TransferStats()
+    df = read_ranges(client,key,4096,stats,compression=infer_compression(key))
+    pd.testing.assert_frame_equal(df,pd.read_csv(io.BytesIO(body),compression=infer_compression(key)))
+    assert (stats.bytes,stats.parts,stats.retries) == (len(body),-(-len(body)//4096),0)
+
+def test_failed_ranges_are_retried(client,housing_frames):
+    client.put_object(Bucket=BUCKET_NAME,Key="houses.csv",Body=housing_frames[1].to_csv(index=False).encode())
+    body = client.get_object(Bucket=BUCKET_NAME,Key="houses.csv")["Body"].read()
+    stats = TransferStats()
+    chunks = iter_object_ranges(FlakyClient(client,2),BUCKET_NAME,"houses.csv",part_size=4096,max_workers=1,max_retries=2,stats=stats)
+    assert b"".join(chunks) == body
+    assert stats.retries == 2
+
+def test_retries_give_up_after_max_retries(client):
+    client.put_object(Bucket=BUCKET_NAME,Key="houses.csv",Body=b"a,b\n1,2\n")
+    with pytest.raises(ClientError):
+        list(iter_object_ranges(FlakyClient(client,3),BUCKET_NAME,"houses.csv",part_size=4096,max_workers=1,max_retries=2,stats=TransferStats()))
+
+def test_zero_byte_object(client):
+    client.put_object(Bucket=BUCKET_NAME,Key="empty.csv",Body=b"")
+    stats = TransferStats()
+    chunks = iter_object_ranges(client,BUCKET_NAME,"empty.csv",part_size=4096,max_workers=2,max_retries=2,stats=stats)
+    assert io.BufferedReader(ChunkReader(chunks)).read() == b""
+    assert (stats.bytes,stats.parts) == (0,0)
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+from src.utils.sketch_utils import DatasetSketch,FrequencySketch
+
+def sketch_of(schema,*dfs)->DatasetSketch:
+    sketch = DatasetSketch.from_schema(schema)
+    for df in dfs:
+        sketch.update(df)
+    return sketch
+
+def many_locations(df: pd.DataFrame,seed: int)->pd.DataFrame:
+    # far more locations than top_k, with a long tail so the cutoff falls between close counts
+    rng = np.random.default_rng(seed)
+    names = np.array([f"city-{rank}" for rank in range(300)])
+    return df.assign(location=pd.Series(names[np.minimum(rng.zipf(1.3,len(df)),300) - 1],index=df.index,dtype=df.location.dtype))
+
+def test_streamed_chunks_equal_a_single_pass(schema,housing_frames):
+    df = many_locations(housing_frames[0],0)
+    assert df.location.nunique() > 50
+    full = DatasetSketch.from_schema(schema)
+    full.update(df)
+    streamed = sketch_of(schema,*[df.iloc[start:start + 150] for start in range(0,len(df),150)])
+    assert streamed.to_dict() == full.to_dict()
+
+def test_streamed_heavy_hitters_beyond_top_k():
+    # x is third on each side but first overall
+    first = pd.Series(["a"]*10 + ["b"]*9 + ["x"]*8)
+    second = pd.Series(["c"]*10 + ["d"]*9 + ["x"]*8)
+    full = FrequencySketch(top_k=2)
+    full.update(pd.concat([first,second]))
+    streamed = FrequencySketch(top_k=2)
+    streamed.update(first)
+    streamed.update(second)
+    assert full.heavy_hitters == streamed.heavy_hitters == ["x","a"]
+
+def test_merge_keeps_counts_exact_beyond_top_k(schema,housing_frames):
+    df = many_locations(housing_frames[0],1)
+    full = DatasetSketch.from_schema(schema)
+    full.update(df)
+    merged = DatasetSketch.from_schema(schema)
+    for start in range(0,len(df),200):
+        part = DatasetSketch.from_schema(schema)
+        part.update(df.iloc[start:start + 200])
+        merged.merge(part)
+    full_dict,merged_dict = full.to_dict(),merged.to_dict()
+    for name,sketch in full_dict.items():
+        if name == "location":
+            # only the heavy hitters are approximate after a merge
+            assert {key: value for key,value in merged_dict[name].items() if key != "heavy_hitters"} == {key: value for key,value in sketch.items() if key != "heavy_hitters"}
+        else:
+            assert merged_dict[name] == sketch
+
+def test_round_trip_through_dict(schema,housing_frames):
+    sketch = sketch_of(schema,housing_frames[0])
+    assert DatasetSketch.from_dict(sketch.to_dict()).to_dict() == sketch.to_dict()
+
+def test_quantiles_within_relative_accuracy(schema,housing_frames):
+    amount = housing_frames[0].amount.to_numpy()
+    sketch = sketch_of(schema,housing_frames[0])
+    np.testing.assert_allclose(sketch.sketches["amount"].quantile(np.array([0.5,0.9])),np.nanquantile(amount,[0.5,0.9]),rtol=0.05)
+
+def test_drift_only_on_shifted_columns(schema,make_frame):
+    # a reference large enough that sampling noise stays under the psi threshold
+    reference = sketch_of(schema,make_frame(2000,2))
+    test_df = make_frame(400,3)
+    assert not sketch_of(schema,test_df).compare(reference,psi_threshold=0.2,ks_threshold=0.1)["drift_detected"]
+    shifted = test_df.assign(amount=test_df.amount*1.5,location=test_df.location.where(np.arange(len(test_df)) % 3 != 0,"new-city"))
+    report = sketch_of(schema,shifted).compare(reference,psi_threshold=0.2,ks_threshold=0.1)
+    assert set(report["drifted_columns"]) == {"amount","location"}
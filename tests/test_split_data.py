@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.utils.split_data import hash_ids,hash_split,hash_folds,train_test_split
+from tests import reference
+
+@pytest.fixture(scope="module")
+def id_frame()->pd.DataFrame:
+    # negative, large and boundary int64 ids next to the usual row numbers
+    rng = np.random.default_rng(0)
+    ids = np.concatenate([
+        np.arange(2000),
+        rng.integers(np.iinfo(np.int64).min,np.iinfo(np.int64).max,2000,dtype=np.int64),
+        [np.iinfo(np.int64).min,np.iinfo(np.int64).max,-1]
+    ])
+    return pd.DataFrame({"index": ids,"city": rng.choice(["pune","thane","mumbai"],len(ids)),"value": rng.random(len(ids))})
+
+def test_integer_ids_match_the_reference_split(id_frame):
+    in_test = hash_ids(id_frame,"index") < 0.2*2**32
+    assert in_test.tolist() == [reference.test_set_check(identifier,0.2) for identifier in id_frame["index"]]
+    for split,reference_split in zip(train_test_split(id_frame,0.2),reference.train_test_split(id_frame,0.2)):
+        pd.testing.assert_frame_equal(split,reference_split)
+
+def test_k_way_split_partitions_the_rows(id_frame):
+    splits = hash_split(id_frame,[0.2,0.3,0.5])
+    assert sorted(np.concatenate([split.index for split in splits])) == list(id_frame.index)
+    np.testing.assert_allclose([len(split)/len(id_frame) for split in splits],[0.2,0.3,0.5],atol=0.03)
+    # a row's bucket depends on its id only, not on the rows around it
+    shuffled = hash_split(id_frame.sample(frac=1,random_state=0),[0.2,0.3,0.5])
+    assert [sorted(split.index) for split in shuffled] == [sorted(split.index) for split in splits]
+    with pytest.raises(ValueError,match="sum to 1"):
+        hash_split(id_frame,[0.2,0.3])
+
+def test_hash_folds_agree_with_an_even_split(id_frame):
+    folds = hash_folds(id_frame,5)
+    assert folds.min() == 0 and folds.max() == 4
+    np.testing.assert_allclose(np.bincount(folds)/len(id_frame),0.2,atol=0.03)
+    for fold,split in enumerate(hash_split(id_frame,[0.2]*5)):
+        assert (folds[id_frame.index.isin(split.index)] == fold).all()
+    np.testing.assert_array_equal(hash_folds(id_frame.iloc[::-1],5),folds[::-1])
+
+def test_composite_keys_hash_every_column(id_frame):
+    composite = hash_ids(id_frame,["city","index"])
+    assert (composite != hash_ids(id_frame,"index")).mean() > 0.99
+    # the same key gets the same hash wherever its row is
+    repeated = pd.concat([id_frame,id_frame.iloc[::-1]],ignore_index=True)
+    np.testing.assert_array_equal(hash_ids(repeated,["city","index"]),np.concatenate([composite,composite[::-1]]))
+    # float and text keys go through their pandas hash
+    train_df,test_df = train_test_split(id_frame,0.2,["city","value"])
+    assert len(train_df) + len(test_df) == len(id_frame) and 0.15 < len(test_df)/len(id_frame) < 0.25
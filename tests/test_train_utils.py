@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+import optuna
+from joblib import parallel_config
+from xgboost import XGBRegressor
+from sklearn.linear_model import Ridge
+from sklearn.neighbors import KNeighborsRegressor
+from sklearn.compose import TransformedTargetRegressor
+from sklearn.model_selection import KFold,cross_val_score
+from src.utils.dict_utils import transformer_dict
+from src.utils.fold_utils import FoldCache
+from src.utils.train_utils import REGRESSOR_NAMES,race_regressor_families,score_folds
+
+class RecordingTrial:
+    # the part of optuna.Trial score_folds uses, pruning once prune_at folds are reported
+    def __init__(self,prune_at: int = None):
+        self.prune_at = prune_at
+        self.reports = []
+
+    def report(self,value: float,step: int):
+        self.reports.append((step,value))
+
+    def should_prune(self)->bool:
+        return self.prune_at is not None and len(self.reports) >= self.prune_at
+
+class CountingRidge(Ridge):
+    fits = 0
+
+    def fit(self,X,y,sample_weight = None):
+        CountingRidge.fits += 1
+        return super().fit(X,y,sample_weight)
+
+@pytest.fixture(scope="module")
+def training_frame():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(600,8)),columns=[f"x{i}" for i in range(8)])
+    y = pd.Series(np.exp(X.x0 + 0.5*X.x1 + rng.normal(scale=0.1,size=600)) + 1,name="amount")
+    return X,y
+
+@pytest.fixture(scope="module")
+def folds(training_frame):
+    X,y = training_frame
+    return FoldCache(X,y,list(KFold(n_splits = 5, shuffle = True, random_state = 42).split(X)))
+
+@pytest.mark.parametrize("regressor,target_transformer_name",[
+    (Ridge(alpha=0.5),"same"),
+    (XGBRegressor(n_estimators=20,n_jobs=1),"log"),
+    (KNeighborsRegressor(),"sqrt")
+])
+def test_fold_scores_match_cross_val_score(training_frame,folds,regressor,target_transformer_name):
+    X,y = training_frame
+    model = TransformedTargetRegressor(regressor=regressor,transformer=transformer_dict[target_transformer_name])
+    expected = cross_val_score(model,X,y,scoring = "neg_mean_absolute_error",cv = KFold(n_splits = 5, shuffle = True, random_state = 42))
+    np.testing.assert_array_equal(score_folds(regressor,target_transformer_name,folds,fold_jobs=1),expected)
+
+@pytest.mark.parametrize("fold_jobs",[1,2,-1])
+def test_running_mean_reported_after_every_fold(folds,fold_jobs):
+    trial = RecordingTrial()
+    # threads keep the parallel case cheap, scores are reported in fold order whichever fold finishes first
+    with parallel_config(backend="threading"):
+        scores = score_folds(Ridge(),"log",folds,fold_jobs,trial)
+    assert [step for step,_ in trial.reports] == [1,2,3,4,5]
+    np.testing.assert_allclose([value for _,value in trial.reports],np.cumsum(scores)/np.arange(1,6))
+
+def test_pruned_trial_stops_the_remaining_folds(folds):
+    CountingRidge.fits = 0
+    with pytest.raises(optuna.TrialPruned,match="after 2 of 5 folds"):
+        score_folds(CountingRidge(),"log",folds,1,RecordingTrial(prune_at=2))
+    assert CountingRidge.fits == 2
+
+@pytest.mark.filterwarnings("ignore:Fold fit failed")
+def test_all_failed_folds_raise(folds):
+    trial = RecordingTrial()
+    with pytest.raises(ValueError,match="All 5 fold fits failed"):
+        score_folds(Ridge(alpha=-1.0,solver="sag"),"log",folds,1,trial)
+    assert trial.reports == []
+
+def test_pruned_trial_leaves_the_workers_usable(folds):
+    # a pruned trial stops dispatching folds but leaves the worker pool to the next trial
+    with pytest.raises(optuna.TrialPruned):
+        score_folds(Ridge(),"log",folds,2,RecordingTrial(prune_at=1))
+    np.testing.assert_array_equal(score_folds(Ridge(),"log",folds,2),score_folds(Ridge(),"log",folds,1))
+
+def test_race_skips_rungs_smaller_than_the_folds(training_frame):
+    X,y = training_frame
+
+    def objective(trial,folds,families):
+        raise AssertionError("no trial runs on a rung smaller than the folds")
+
+    # 600 rows, 0.005 of them is 3 or so rows for 5 folds
+    assert race_regressor_families(objective,X,y,5,[0.005],1,0.5,"race") == REGRESSOR_NAMES
+
+def test_race_keeps_the_best_families(training_frame):
+    X,y = training_frame
+
+    def objective(trial,folds,families):
+        family = trial.suggest_categorical("regressor",families)
+        assert len(folds) == 5 and len(folds.splits[0][0]) + len(folds.splits[0][1]) < len(X)
+        return -REGRESSOR_NAMES.index(family)
+
+    assert race_regressor_families(objective,X,y,5,[0.5],1,0.25,"race",seed=0) == REGRESSOR_NAMES[:2]
+
+def test_race_never_prunes(training_frame):
+    X,y = training_frame
+    pruners = set()
+
+    def objective(trial,folds,families):
+        trial.suggest_categorical("regressor",families)
+        # a worse report every trial, a median pruner would prune from the sixth trial on
+        trial.report(-trial.number,0)
+        pruners.add(type(trial.study.pruner))
+        if trial.should_prune():
+            raise optuna.TrialPruned()
+        return 0.0
+
+    race_regressor_families(objective,X,y,5,[0.5],8,0.5,"race",seed=0)
+    assert pruners == {optuna.pruners.NopPruner}
+
+def test_race_rejects_bad_fractions(training_frame):
+    X,y = training_frame
+    with pytest.raises(ValueError,match="fractions"):
+        race_regressor_families(None,X,y,5,[1.5],1,0.5,"race")
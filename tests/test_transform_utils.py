@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from src.utils.impute_utils import get_imputer_object
+from src.utils.feature_utils import make_features
+from src.utils.transform_utils import get_transformer_object,get_required_columns
+
+def concatenating_transformer(**kwargs)->ColumnTransformer:
+    # the same branches in a plain ColumnTransformer, each one handing pandas frames to the concatenation
+    fused = get_transformer_object(**kwargs)
+    for _,transformer,_ in fused.transformers:
+        transformer.set_output(transform = "pandas")
+    return ColumnTransformer(transformers = fused.transformers)
+
+@pytest.fixture(scope="module")
+def features(housing_frames):
+    train_df,test_df = housing_frames
+    imputer = get_imputer_object().fit(train_df.drop(columns=["amount"]))
+    required = get_required_columns(get_transformer_object())
+    X_train,X_test = [make_features(imputer.transform(df.drop(columns=["amount"])),required) for df in (train_df,test_df)]
+    return X_train,train_df.amount,X_test
+
+@pytest.fixture(scope="module")
+def expected(features):
+    X_train,y_train,X_test = features
+    return concatenating_transformer().fit(X_train,y_train)
+
+def test_fused_matches_plain_column_transformer(features,expected):
+    X_train,y_train,X_test = features
+    fused = get_transformer_object().fit(X_train,y_train)
+    np.testing.assert_array_equal(fused.get_feature_names_out(),expected.get_feature_names_out())
+    pd.testing.assert_frame_equal(fused.transform(X_test),expected.transform(X_test))
+    assert (fused.transform(X_test).dtypes == np.float64).all()
+
+def test_fit_transform_matches_plain_column_transformer(features):
+    X_train,y_train,_ = features
+    output = get_transformer_object().fit_transform(X_train,y_train)
+    expected = concatenating_transformer().fit_transform(X_train,y_train)
+    np.testing.assert_array_equal(output.columns,expected.columns)
+    # the target encoders cross fit on unseeded shuffled folds, every other column is deterministic
+    columns = [column for column in output.columns if not column.startswith(("location_encoder__","facing_encoder_union__facing_target"))]
+    pd.testing.assert_frame_equal(output[columns],expected[columns])
+
+def test_float32_output(features,expected):
+    X_train,y_train,X_test = features
+    fused = get_transformer_object(dtype=np.float32).fit(X_train,y_train)
+    output = fused.transform(X_test)
+    assert (output.dtypes == np.float32).all()
+    np.testing.assert_array_equal(output.columns,expected.get_feature_names_out())
+    np.testing.assert_allclose(output.to_numpy(),expected.transform(X_test).to_numpy(),rtol=1e-6,atol=1e-6)
+
+def test_sparse_output(features,expected):
+    X_train,y_train,X_test = features
+    fused = get_transformer_object(sparse_output=True).fit(X_train,y_train)
+    output = fused.transform(X_test)
+    assert sparse.issparse(output) and output.format == "csr" and output.dtype == np.float64
+    np.testing.assert_array_equal(fused.get_feature_names_out(),expected.get_feature_names_out())
+    np.testing.assert_allclose(output.toarray(),expected.transform(X_test).to_numpy())
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+from src.utils.main_utils import save_data
+from src.utils.validation_utils import SchemaValidator
+
+def test_valid_frame_passes(schema,housing_frames):
+    report = SchemaValidator(schema).validate(housing_frames[0])
+    assert report["passed"]
+    assert report["rows"] == len(housing_frames[0])
+
+@pytest.mark.parametrize("suffix",[".csv",".parquet"])
+def test_chunked_file_report_equals_single_pass(schema,housing_frames,tmp_path,suffix):
+    file_path = tmp_path/f"train{suffix}"
+    save_data(file_path,housing_frames[0])
+    validator = SchemaValidator(schema)
+    assert validator.validate_file(file_path,chunk_size=97) == validator.validate(housing_frames[0])
+
+def test_failed_checks_are_reported(schema,housing_frames):
+    df = housing_frames[0].copy()
+    df.loc[df.index[:3],"transaction"] = "Auction"
+    df.loc[df.index[3],"amount"] = 500.0
+    df.loc[df.index[4],"bathroom"] = np.nan
+    df = df.drop(columns=["facing"]).assign(extra=1)
+    report = SchemaValidator(schema).validate(df)
+    assert not report["passed"]
+    assert report["missing_columns"] == ["facing"]
+    assert report["unexpected_columns"] == ["extra"]
+    assert report["columns"]["transaction"]["disallowed"] == 3
+    assert report["columns"]["amount"]["out_of_range"] == 1
+    assert set(report["failed_columns"]) == {"transaction","amount","bathroom"}